@@ -1,13 +1,14 @@
 from actions.actions import ButtonClickedAction
-from lib.react.components.component import Component
+from lib.react.components.component import Component, PureComponent
+from lib.react.components.store_provider import StoreContext
 from lib.react.dom import DOM as d
 
 __pragma__('kwargs')
 
 
-class Button(Component):
+class Button(PureComponent):
     """
-    Example of a simple button component
+    Example of a simple button component, it only re-renders when its props change
     """
 
     class Props:
@@ -37,18 +38,11 @@ class Button(Component):
 
 class App(Component):
     """
-    App is our root component for our application
+    App is our root component for our application, it reads the store and dispatcher from the StoreProvider above it
     """
 
-    class Props:
-        """
-        Define the props for our app component
-        """
-
-        def __init__(self, store, dispatcher):
-            # Store and dispatcher are the only props we care about
-            self.store = store
-            self.dispatcher = dispatcher
+    # Read the store and dispatcher from the closest StoreProvider
+    context_type = StoreContext
 
     class State:
         """
@@ -59,9 +53,17 @@ class App(Component):
             # A simple message state attribute to display the counter is all that is needed
             self.count = count
 
-    def __init__(self, store, dispatcher):
-        # Call the super constructor to pass in the initial props and the initial state
-        super().__init__(App.Props(store, dispatcher), App.State)
+    def __init__(self):
+        # Call the super constructor to pass in the initial state, the store and dispatcher come from the context
+        super().__init__(None, App.State)
+
+    def get_initial_state(self):
+        """
+        Start from the current count in the store, so that a prerendered page hydrates without changing
+
+        :return: The initial state
+        """
+        return App.State(self.context.store.count)
 
     def render(self):
         """
@@ -81,7 +83,7 @@ class App(Component):
                 Button.Props(
                     'Decrease!',
                     # When it's clicked, trigger a button clicked action to decrease the counter
-                    lambda: self.props.dispatcher.handle_view_action(ButtonClickedAction(False)),
+                    self.bound_action(self.context.dispatcher.handle_view_action, ButtonClickedAction, False),
                     0
                 )
             ),
@@ -90,7 +92,7 @@ class App(Component):
                 Button.Props(
                     'Increase!',
                     # When it's clicked, trigger a button clicked action to increase the counter
-                    lambda: self.props.dispatcher.handle_view_action(ButtonClickedAction(True)),
+                    self.bound_action(self.context.dispatcher.handle_view_action, ButtonClickedAction, True),
                     1
                 )
             ),
@@ -102,11 +104,12 @@ class App(Component):
 
     def component_did_mount(self):
         """
-        When the component mounts, register our app with the store so that we can receive updates
+        When the component mounts, subscribe our app to the store so that we can receive updates. The subscription is
+        removed when the component unmounts
 
         :return: Nothing
         """
-        self.props.store.register(self.on_change)
+        self.subscribe(self.context.store, self.on_change)
 
     def on_change(self):
         """
@@ -115,4 +118,4 @@ class App(Component):
         :return: Nothing
         """
         # Get the new value of the counter from the store and update our state
-        self.set_state(App.State(self.props.store.count))
+        self.set_state(App.State(self.context.store.count))
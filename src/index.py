@@ -1,6 +1,9 @@
-from actions.actions import StoreInitialisedAction
+from actions.actions import ButtonClickedAction, StoreInitialisedAction
 from components.app import App
 from lib.flux.dispatcher import AppDispatcher
+from lib.flux.journal import ActionJournal
+from lib.flux.recorder import ActionRecorder
+from lib.react.components.store_provider import StoreProvider
 from lib.react.react import React
 from stores.store import MyStore
 
@@ -10,13 +13,97 @@ dispatcher = AppDispatcher()
 # Create a store to track the state of our application
 store = MyStore(dispatcher)
 
-# Create our app and mount it in the dom
-React.render(
-    # Create our application component specifying the store and the dispatcher
-    App(store, dispatcher),
-    # Get the dom element to mount our application to
-    document.getElementById('container')
-)
+# Check if the page was prerendered by the production build (see prerender.py)
+initial_state = window.__INITIAL_STATE__
+if initial_state:
+    # It was, start the store from the state that the page was prerendered with
+    store.restore(initial_state.store)
+
+# Get the options the page was opened with
+options = __new__(URLSearchParams(window.location.search))
+
+# Check if the page was opened with ?record
+if options.has('record'):
+    # It was, record the actions of the session from the state the store starts in, save_recording() can then be called
+    # from the console to download the recording for replay.py
+    recorder = ActionRecorder(dispatcher, [ButtonClickedAction], [store])
+    window.save_recording = recorder.save
+
+# Check if the page was opened with ?journal
+journal = None
+if options.has('journal'):
+    # It was, journal the actions so that the store can be moved through its history with journal.undo(), redo() and
+    # seek() from the console
+    journal = ActionJournal(dispatcher, [store])
+    window.journal = journal
+
+
+def create_app():
+    """
+    Creates our application component
+
+    :return: The root component
+    """
+    # Provide the store and the dispatcher to our application component and anything beneath it
+    return StoreProvider(store, dispatcher, App())
+
+
+def render():
+    """
+    Renders our app in to the dom, or updates the mounted app if it has already been rendered
+
+    :return: Nothing
+    """
+    # Get the dom element to mount our application to and render our app in to it
+    React.render(create_app(), document.getElementById('container'))
+
+    # Mark each render, so that how long a change takes to show after it is saved can be measured (see
+    # benchmark_hot_reload.py)
+    performance.mark('rendered')
+
+
+def on_store_module_changed():
+    """
+    Replaces the store with one from the changed store module, carrying over its state
+
+    :return: Nothing
+    """
+    global store
+
+    # Create a store from the changed module and have it take over from the current store
+    previous = store
+    store = MyStore(dispatcher)
+    store.adopt(previous)
+
+    # Repoint the journal to the new store, so that seeking restores it rather than the store it replaced. The recorder
+    # only snapshots the store when it starts and records through the dispatcher, so it carries on recording as it was
+    if journal:
+        journal.replace_store(previous, store)
+
+    # Update the mounted app with the new store
+    render()
+
+
+# Mark the start of the mount, so that how long it takes shows in the performance timeline (see
+# benchmark_first_paint.py)
+performance.mark('mount')
+
+# Check if the page was prerendered
+if initial_state:
+    # It was, attach our app to the prerendered markup rather than rendering it from scratch
+    React.hydrate(create_app(), document.getElementById('container'))
+    performance.measure('hydrate', 'mount')
+else:
+    # Create our app and mount it in the dom
+    render()
+    performance.measure('render', 'mount')
 
 # Now that our application is mounted, tell it that we have initialised the store
 dispatcher.handle_view_action(StoreInitialisedAction(store))
+
+# During development, swap changed modules in place rather than reloading the page and losing the application state
+if module.hot:
+    # Changed components are re-rendered, their react classes are swapped in place so mounted state is kept
+    module.hot.accept('./components.app.js', render)
+    # Changed stores take over the state of the store they replace
+    module.hot.accept('./stores.store.js', on_store_module_changed)
@@ -0,0 +1,99 @@
+def _fields(action):
+    """
+    Returns the own attributes of an action
+    """
+    fields = {}
+
+    # Transcrypt renames keys to py_keys (for dicts), which Object doesn't have
+    __pragma__('noalias', 'keys')
+    names = Object.keys(action)
+    __pragma__('alias', 'keys', 'py_keys')
+
+    for name in names:
+        # Transcrypt instances hold their class as an own attribute
+        if name != '__class__':
+            fields[name] = action[name]
+    return fields
+
+
+def _instantiate(cls):
+    """
+    Creates an instance of a class without calling its constructor, in the same way that Transcrypt creates instances
+    """
+    return Object.create(cls, {'__class__': {'value': cls, 'enumerable': True}})
+
+
+# Under CPython python objects don't have their attributes as items, and are created with __new__
+# __pragma__ ('skip')
+from lib.react.reference.host import Object
+
+
+def _fields(action):
+    return dict(vars(action))
+
+
+def _instantiate(cls):
+    return cls.__new__(cls)
+# __pragma__ ('noskip')
+
+
+class ActionCodec:
+    """
+    Encodes actions as json serialisable values and decodes them again, so that actions can be sent between tabs or
+    written to a file
+
+    An action is encoded as [class name, {attribute: value}], so the attributes of the actions must themselves be json
+    serialisable. Only actions of the classes passed to the codec can be encoded, actions are decoded without calling
+    their constructor.
+    """
+    def __init__(self, action_classes):
+        """
+        :param action_classes: The list of action classes that can be encoded, their names must be unique
+        """
+        # The classes keyed by name
+        self._classes = {}
+        for cls in action_classes:
+            if cls.__name__ in self._classes:
+                raise Exception("Action classes must have unique names, " + cls.__name__ + " is used twice")
+            self._classes[cls.__name__] = cls
+
+    def can_encode(self, action):
+        """
+        :param action: The action
+        :return: True if the action is of one of the classes of the codec
+        """
+        name = type(action).__name__
+        return name in self._classes and self._classes[name] is type(action)
+
+    def encode(self, action):
+        """
+        Encodes an action
+
+        :param action: The action, it must be of one of the classes of the codec
+        :return: The encoded action
+        """
+        if not self.can_encode(action):
+            raise Exception("Can't encode " + type(action).__name__ + ", it isn't an action class of the codec")
+        return [type(action).__name__, _fields(action)]
+
+    def decode(self, encoded):
+        """
+        Decodes an action
+
+        :param encoded: The encoded action, as returned by encode (after a trip through json)
+        :return: The action
+        """
+        name = encoded[0]
+        if name not in self._classes:
+            raise Exception("Can't decode " + name + ", it isn't an action class of the codec")
+
+        action = _instantiate(self._classes[name])
+        fields = encoded[1]
+
+        __pragma__('noalias', 'keys')
+        names = Object.keys(fields)
+        __pragma__('alias', 'keys', 'py_keys')
+
+        for field in names:
+            setattr(action, field, fields[field])
+        return action
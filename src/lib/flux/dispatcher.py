@@ -1,3 +1,6 @@
+from lib.flux.scheduler import Scheduler, SlicedWork
+
+
 class Action:
     """
     Action is the basic class that all actions should inherit from
@@ -40,6 +43,10 @@ class DispatcherMessage:
         # The message has been matched yet
         self._matched = False
 
+        # Any work that matched callbacks asked to run in slices, and where the current match chain's work starts
+        self._work = []
+        self._chain_work_start = 0
+
     @property
     def source(self):
         """
@@ -70,6 +77,7 @@ class DispatcherMessage:
         """
         # Reset the match
         self._matched = False
+        self._chain_work_start = len(self._work)
 
         # Check if the action in this message matches the class provided
         if type(self._action) is cls:
@@ -101,27 +109,120 @@ class DispatcherMessage:
         # Return self so that calls to this class can be chained
         return self
 
+    def first_sliced(self, cls, cb, progress=None):
+        """
+        Operates similarly to "first()", but for actions that are too expensive to process in one go
+
+        The callback must return a generator that yields between chunks of work. The dispatcher runs the generator in
+        slices with its scheduler so that the browser can keep handling input, and "if_any_matched()" is deferred until
+        the generator completes. Other actions can be handled between chunks, and the work of view actions pre-empts
+        work that has started (see Scheduler.schedule), so the store must be consistent whenever the generator yields.
+
+        :param cls: The action class to check against
+        :param cb: The generator function to call if the action class matches the action of this message
+        :param progress: An optional callback that is triggered after each slice until the work completes
+        :return: self so that next/if_any_matched can be chained
+        """
+        # Reset the match
+        self._matched = False
+        self._chain_work_start = len(self._work)
+
+        # Check the action in the same way as next_sliced
+        return self.next_sliced(cls, cb, progress)
+
+    def next_sliced(self, cls, cb, progress=None):
+        """
+        Operates similarly to "first_sliced()", but does not reset the matcher
+
+        :param cls: The action class to check against
+        :param cb: The generator function to call if the action class matches the action of this message
+        :param progress: An optional callback that is triggered after each slice until the work completes
+        :return: self so that next/if_any_matched can be chained
+        """
+        # Check if the action in this message matches the class provided
+        if type(self._action) is cls:
+            # Yes it does, record that we had a message match
+            self._matched = True
+            # Create the generator with the action from this message, and record it to be run in slices
+            self._work.append(SlicedWork(cb(self._action), progress))
+
+        # Return self so that calls to this class can be chained
+        return self
+
+    @property
+    def work(self):
+        """
+        Get any work that matched callbacks asked to run in slices (SlicedWork)
+
+        :return: The list of work
+        """
+        return self._work
+
     def if_any_matched(self, cb):
         """
         If any actions were matched since a call to "first()" thin this function will trigger the callback specified
 
-        If no action was matched, his function is a noop
+        If no action was matched, his function is a noop. If any of the matches were sliced, the callback is triggered
+        once all of their work has completed.
 
         :param cb: The callback to trigger if a match has been found
         :return: Nothing
         """
-        if self._matched:
+        if not self._matched:
+            return
+
+        # Get the sliced work created since the call to "first()"
+        pending = self._work[self._chain_work_start:]
+
+        # If there isn't any, the callback can be triggered now
+        if not len(pending):
             cb()
+            return
+
+        # Otherwise trigger the callback once the last of the work completes
+        remaining = [len(pending)]
+
+        def on_complete():
+            remaining[0] -= 1
+            if not remaining[0]:
+                cb()
+
+        for work in pending:
+            work.on_complete = on_complete
 
 
 class AppDispatcher:
     """
     AppDispatcher is a class for proxying messages to various sinks, typically a sync would be a store
+
+    Middleware can be added with "use()" to observe, drop, transform or delay messages before they are delivered. The
+    middleware chain is composed when middleware is added, so dispatching without middleware costs nothing extra.
     """
-    def __init__(self):
+    def __init__(self, scheduler=None):
+        """
+        :param scheduler: The scheduler used to run sliced work, a default Scheduler is created if none is provided
+        """
         # Initally create an empty array of dispatchers (message sinks)
         self._dispatchers = []
 
+        # Record the scheduler for sliced work
+        self._scheduler = scheduler or Scheduler()
+
+        # The composed dispatch functions for each source. Without any middleware they are the delivery loops
+        # themselves, so dispatching costs nothing extra
+        self._dispatch_view = self._deliver_view
+        self._dispatch_server = self._deliver_server
+
+        # The composed middleware chain, None until middleware is added
+        self._chain = None
+
+    @property
+    def scheduler(self):
+        """
+        Returns the scheduler that runs sliced work
+        """
+        return self._scheduler
+
     def register(self, cb):
         """
         Registers a new dispatcher (message sink)
@@ -131,24 +232,116 @@ class AppDispatcher:
         """
         self._dispatchers.append(cb)
 
-    def handle_view_action(self, action):
+    def unregister(self, cb):
         """
-        Handles dispatch of an action originating from a view
+        Removes a dispatcher (message sink) that was registered with "register()"
 
-        :param action: The message to dispatch
+        :param cb: The callback that was registered
         :return: Nothing
         """
-        # Confirm that an action was provided
-        assert action
+        self._dispatchers.remove(cb)
+
+    def use(self, middleware, action_classes=None):
+        """
+        Adds middleware around the dispatch of every message, or only of messages for the provided action classes
+
+        Middleware is called as middleware(message, next), where next delivers the message to the rest of the chain and
+        finally the dispatchers. Middleware can:
+
+        * Observe the message and then call next(message) (eg, logging or analytics)
+        * Drop the message by not calling next
+        * Transform the message by calling next with a new DispatcherMessage
+        * Delay the message by calling next later (eg, throttling)
+
+        Middleware added last is called first. The chain is composed here, once, rather than on every dispatch.
+
+        :param middleware: The middleware function
+        :param action_classes: An optional list of action classes, the middleware is skipped for any other action (so
+            it is skipped for every action if the list is empty)
+        :return: Nothing
+        """
+        # Get the chain that the middleware wraps, the first middleware wraps delivery to the dispatchers
+        following = self._chain or self._deliver
+
+        # Check if the middleware is restricted to some action classes
+        if action_classes is not None:
+            # Yes, only call the middleware for messages with actions of those classes
+            def dispatch(message):
+                if type(message.action) in action_classes:
+                    middleware(message, following)
+                else:
+                    following(message)
+        else:
+            # No, always call the middleware
+            def dispatch(message):
+                middleware(message, following)
+
+        # Record the composed chain, messages from every source now go through it
+        self._chain = dispatch
+        self._dispatch_view = dispatch
+        self._dispatch_server = dispatch
+
+    def _deliver(self, message):
+        """
+        Delivers a message from any source, this is the end of the middleware chain
+
+        Middleware can pass on a new message from another source, so the source is checked here rather than the
+        message being delivered as the source it was dispatched from
+
+        :param message: The message to deliver (DispatcherMessage)
+        :return: Nothing
+        """
+        if message.source == MessageSourceOptions.view:
+            self._deliver_view(message)
+        else:
+            self._deliver_server(message)
 
-        # Create the message from the action
-        message = DispatcherMessage(MessageSourceOptions.view, action)
+    def _deliver_view(self, message):
+        """
+        Delivers a message from a view to every dispatcher and schedules any sliced work that they created
 
+        :param message: The message to deliver (DispatcherMessage)
+        :return: Nothing
+        """
         # Iterate over the dispatchers and call each one with the provided message
         for dispatcher in self._dispatchers:
             # Call this dispatcher with the message
             dispatcher(message)
 
+        # Schedule any sliced work, work for view actions is urgent input so it pre-empts work that is already queued
+        # (in reverse, so that the work keeps its order at the front of the queue)
+        for work in message.work[::-1]:
+            self._scheduler.schedule(work, True)
+
+    def _deliver_server(self, message):
+        """
+        Delivers a message from the server to every dispatcher and schedules any sliced work that they created
+
+        :param message: The message to deliver (DispatcherMessage)
+        :return: Nothing
+        """
+        # Iterate over the dispatchers and call each one with the provided message
+        for dispatcher in self._dispatchers:
+            # Call this dispatcher with the message
+            dispatcher(message)
+
+        # Schedule any sliced work behind any work that is already queued
+        for work in message.work:
+            self._scheduler.schedule(work)
+
+    def handle_view_action(self, action):
+        """
+        Handles dispatch of an action originating from a view
+
+        :param action: The message to dispatch
+        :return: Nothing
+        """
+        # Confirm that an action was provided
+        assert action
+
+        # Create the message from the action and dispatch it
+        self._dispatch_view(DispatcherMessage(MessageSourceOptions.view, action))
+
     def handle_server_action(self, action):
         """
         Handles dispatch of an action originating from the server
@@ -159,10 +352,5 @@ class AppDispatcher:
         # Confirm that an action was provided
         assert action
 
-        # Create the message from the action
-        message = DispatcherMessage(MessageSourceOptions.view, action)
-
-        # Iterate over the dispatchers and call each one with the provided message
-        for dispatcher in self._dispatchers:
-            # Call this dispatcher with the message
-            dispatcher(message)
+        # Create the message from the action and dispatch it
+        self._dispatch_server(DispatcherMessage(MessageSourceOptions.server, action))
@@ -0,0 +1,335 @@
+from lib.flux.store import Store
+
+# The list returned by find for a key with no records, shared so that it is the same list on every call
+_no_records = []
+
+
+class _Bucket:
+    """
+    The records that share a key, either every record in the store or the records with one key of an index
+    """
+    def __init__(self):
+        # The records keyed by id. Under CPython they are in the order they were added, once transpiled javascript
+        # lists integer-like keys first in numeric order
+        self.records = {}
+
+        # The number of records, kept rather than counted since counting the keys of a javascript object is O(n)
+        self.size = 0
+
+        # The memoized list of the records, or None if the bucket has changed since it was last built
+        self.result = None
+
+    def put(self, record_id, record):
+        """
+        Adds or replaces a record
+
+        :param record_id: The id of the record
+        :param record: The record
+        :return: Nothing
+        """
+        if record_id not in self.records:
+            self.size += 1
+        self.records[record_id] = record
+        self.result = None
+
+    def remove(self, record_id):
+        """
+        Removes a record
+
+        :param record_id: The id of the record
+        :return: Nothing
+        """
+        del self.records[record_id]
+        self.size -= 1
+        self.result = None
+
+    def as_list(self):
+        """
+        Returns the records in the bucket, the same list is returned until the bucket changes
+
+        :return: The list of records
+        """
+        if self.result is None:
+            self.result = list(self.records.values())
+        return self.result
+
+
+class EntityStore(Store):
+    """
+    A store that holds a collection of records keyed by id, with secondary indexes
+
+    Records are looked up, added, replaced and removed in constant time, and the records with a key of an index are
+    found without scanning the collection. Indexes are kept up to date as records are upserted and removed, only the
+    buckets of the keys that changed are touched.
+
+    The lists returned by all and find are memoized, the same list is returned until a record in it changes. This lets
+    components pass them straight to PureComponent props. The lists must not be modified.
+
+    Records are treated as immutable, to change a record upsert a new record with the same id. Modifying a record that
+    is in the store would leave it in the wrong index buckets, and would change the snapshots used by the journal.
+
+    Ids and index keys should be strings or numbers, since they are javascript object keys once transpiled.
+
+    This class should be inherited from, the inheriting class handles the messages and calls upsert and remove. eg:
+
+        class TodoStore(EntityStore):
+            def __init__(self, dispatcher):
+                super().__init__(dispatcher, {
+                    'by_owner': lambda todo: todo.owner_id,
+                    'by_status': lambda todo: todo.status,
+                })
+
+            def handle_message(self, message):
+                message.first(
+                    TodosLoadedAction, lambda action: self.upsert(action.todos)
+                ).if_any_matched(self.on_change)
+
+        store.find('by_owner', user_id)
+    """
+    def __init__(self, dispatcher, indexes=None, id_of=None):
+        """
+        Creates the store and registers it with the provided dispatcher
+
+        :param dispatcher: The dispatcher to register this store with
+        :param indexes: A dict of the name of each index to a function that returns the key of a record in the index
+        :param id_of: A function that returns the id of a record, defaults to the id attribute of the record
+        """
+        # Call the super constructor to handle the boilerplate
+        super().__init__(dispatcher)
+
+        # Record the parameters
+        self._index_keys = indexes or {}
+        self._id_of = id_of or (lambda record: record.id)
+
+        # Every record, and the buckets of each index keyed by index name then key
+        self._entities = _Bucket()
+        self._indexes = {}
+        for name in self._index_keys.keys():
+            self._indexes[name] = {}
+
+        # While changes are tracked (see track_changes), the records upserted and the ids removed since changes was
+        # last called, both keyed by id. The ids are kept as values, since keys are strings once transpiled
+        self._upserted = None
+        self._removed = None
+
+        # True if the store was cleared since changes was last called, so every record is sent
+        self._changes_reset = False
+
+    def get(self, record_id):
+        """
+        Returns the record with an id
+
+        :param record_id: The id of the record
+        :return: The record, or None if there isn't a record with the id
+        """
+        return self._entities.records.get(record_id, None)
+
+    def has(self, record_id):
+        """
+        :param record_id: The id of the record
+        :return: True if there is a record with the id
+        """
+        return record_id in self._entities.records
+
+    @property
+    def count(self):
+        """
+        Returns the number of records in the store
+        """
+        return self._entities.size
+
+    def all(self):
+        """
+        Returns every record in the store. Records with string ids are in the order they were added, but once
+        transpiled records with integer ids come first in order of id (javascript orders integer-like object keys), so
+        sort a copy if the order matters
+
+        :return: The memoized list of records
+        """
+        return self._entities.as_list()
+
+    def find(self, index, key):
+        """
+        Returns the records with a key of an index, in the same order as all
+
+        :param index: The name of the index
+        :param key: The key to find
+        :return: The memoized list of records, the same empty list whenever there are none
+        """
+        bucket = self._index(index).get(key, None)
+        if bucket is None:
+            return _no_records
+        return bucket.as_list()
+
+    def count_of(self, index, key):
+        """
+        Returns the number of records with a key of an index
+
+        :param index: The name of the index
+        :param key: The key to count
+        :return: The number of records
+        """
+        bucket = self._index(index).get(key, None)
+        return 0 if bucket is None else bucket.size
+
+    def upsert(self, records):
+        """
+        Adds records to the store, replacing any records with the same ids
+
+        :param records: The list of records
+        :return: Nothing
+        """
+        for record in records:
+            record_id = self._id_of(record)
+            previous = self._entities.records.get(record_id, None)
+            self._entities.put(record_id, record)
+
+            if self._upserted is not None:
+                self._upserted[record_id] = record
+                if record_id in self._removed:
+                    del self._removed[record_id]
+
+            # Move the record between the buckets of each index, or replace it in its bucket if its key is unchanged
+            for name, key_of in self._index_keys.items():
+                key = key_of(record)
+                if previous is not None:
+                    previous_key = key_of(previous)
+                    if previous_key != key:
+                        self._remove_from_index(name, previous_key, record_id)
+                self._add_to_index(name, key, record_id, record)
+
+    def remove(self, record_ids):
+        """
+        Removes records from the store, ids that aren't in the store are ignored
+
+        :param record_ids: The list of ids of the records to remove
+        :return: Nothing
+        """
+        for record_id in record_ids:
+            previous = self._entities.records.get(record_id, None)
+            if previous is None:
+                continue
+
+            self._entities.remove(record_id)
+            for name, key_of in self._index_keys.items():
+                self._remove_from_index(name, key_of(previous), record_id)
+
+            if self._upserted is not None:
+                if record_id in self._upserted:
+                    del self._upserted[record_id]
+                self._removed[record_id] = record_id
+
+    def clear(self):
+        """
+        Removes every record from the store
+
+        :return: Nothing
+        """
+        self._entities = _Bucket()
+        for name in self._index_keys.keys():
+            self._indexes[name] = {}
+
+        # Every record will have to be sent, rather than the individual removals
+        if self._upserted is not None:
+            self._upserted = {}
+            self._removed = {}
+            self._changes_reset = True
+
+    def snapshot(self):
+        """
+        Returns a copy of the records in this store, the records themselves are shared since they are immutable
+
+        :return: The snapshot
+        """
+        return list(self._entities.records.values())
+
+    def restore(self, snapshot):
+        """
+        Restores the records of this store from a snapshot, rebuilding the indexes
+
+        :param snapshot: The snapshot to restore
+        :return: Nothing
+        """
+        self.clear()
+        self.upsert(snapshot)
+
+    def track_changes(self, enabled):
+        """
+        Starts or stops tracking the records that are upserted and removed, for changes
+
+        :param enabled: True to start tracking from the current records, False to stop
+        :return: Nothing
+        """
+        self._upserted = {} if enabled else None
+        self._removed = {} if enabled else None
+        self._changes_reset = False
+
+    def changes(self):
+        """
+        Returns the records upserted and the ids removed since changes was last called, or every record if changes
+        aren't being tracked or the store was cleared
+
+        :return: The changes, as {'reset': bool, 'upsert': [records], 'remove': [ids]}
+        """
+        if self._upserted is None or self._changes_reset:
+            result = {'reset': True, 'upsert': self.snapshot(), 'remove': []}
+        else:
+            result = {'reset': False, 'upsert': list(self._upserted.values()), 'remove': list(self._removed.values())}
+
+        if self._upserted is not None:
+            self.track_changes(True)
+
+        return result
+
+    def apply_changes(self, changes):
+        """
+        Applies changes returned by changes, only the buckets of the records that changed are updated
+
+        :param changes: The changes to apply
+        :return: Nothing
+        """
+        if changes['reset']:
+            self.clear()
+        self.remove(changes['remove'])
+        self.upsert(changes['upsert'])
+
+    def _index(self, name):
+        """
+        :param name: The name of an index
+        :return: The buckets of the index, keyed by key
+        """
+        if name not in self._indexes:
+            raise Exception("There is no index named " + name)
+        return self._indexes[name]
+
+    def _add_to_index(self, name, key, record_id, record):
+        """
+        Adds or replaces a record in the bucket of a key of an index
+
+        :param name: The name of the index
+        :param key: The key of the record in the index
+        :param record_id: The id of the record
+        :param record: The record
+        :return: Nothing
+        """
+        buckets = self._indexes[name]
+        bucket = buckets.get(key, None)
+        if bucket is None:
+            bucket = _Bucket()
+            buckets[key] = bucket
+        bucket.put(record_id, record)
+
+    def _remove_from_index(self, name, key, record_id):
+        """
+        Removes a record from the bucket of a key of an index, removing the bucket if it is empty
+
+        :param name: The name of the index
+        :param key: The key of the record in the index
+        :param record_id: The id of the record
+        :return: Nothing
+        """
+        buckets = self._indexes[name]
+        bucket = buckets[key]
+        bucket.remove(record_id)
+        if not bucket.size:
+            del buckets[key]
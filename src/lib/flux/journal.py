@@ -0,0 +1,232 @@
+from lib.flux.dispatcher import DispatcherMessage
+
+# The default number of actions between store snapshots
+_default_snapshot_interval = 100
+
+# The default number of actions retained in the journal
+_default_retention = 10000
+
+
+class ActionJournal:
+    """
+    The action journal records the actions dispatched through a dispatcher so that the stores can be moved to any
+    point in the retained history (undo/redo and time travel)
+
+    Actions are kept in a fixed size ring buffer, and the stores are snapshotted every snapshot_interval actions.
+    Seeking restores the nearest earlier snapshot and replays at most snapshot_interval actions, so the cost of a seek
+    does not grow with the length of the history. Memory is bounded by the retention, older actions and snapshots are
+    discarded as new actions are recorded. Recording after seeking backwards discards the later actions, but they still
+    count towards the retention until the ring has moved past them.
+
+    Every store passed to the journal must implement Store.snapshot and Store.restore. Snapshots are taken as actions
+    are dispatched, so they should not be taken while stores have sliced work in progress.
+    """
+    def __init__(self, dispatcher, stores, snapshot_interval=_default_snapshot_interval,
+                 retention=_default_retention):
+        """
+        Creates the journal and starts recording the actions dispatched through the dispatcher
+
+        :param dispatcher: The dispatcher to record (AppDispatcher)
+        :param stores: The list of stores to snapshot and restore, these should be registered with the dispatcher
+        :param snapshot_interval: The number of actions between store snapshots, the most actions replayed by a seek
+        :param retention: The number of actions to retain, a multiple of snapshot_interval. Seeking before the oldest
+            retained action is not possible
+        """
+        # Confirm the parameters are valid
+        assert dispatcher
+        assert stores
+        assert snapshot_interval > 0
+        assert retention >= snapshot_interval and retention % snapshot_interval == 0
+
+        # Record the parameters
+        self._stores = stores
+        self._snapshot_interval = snapshot_interval
+        self._retention = retention
+
+        # The ring buffer of recorded [source, action], the action at position i lives at i % retention. Only the
+        # source and action are kept, not the message with the work it started
+        self._actions = [None for i in range(retention)]
+
+        # The position after the last recorded action
+        self._end = 0
+
+        # The position after the furthest action ever recorded. This is more than end after seeking backwards and
+        # recording, and the slots it has overwritten stay overwritten
+        self._written = 0
+
+        # The position the stores are currently at, this is less than end after seeking backwards
+        self._position = 0
+
+        # Snapshots of the stores, keyed by the position of the action they were taken before
+        self._snapshots = {}
+
+        # Record middleware with the dispatcher, so that every action is journaled before the stores receive it
+        dispatcher.use(self._record)
+
+    @property
+    def position(self):
+        """
+        Returns the position in the history that the stores are currently at
+        """
+        return self._position
+
+    @property
+    def end(self):
+        """
+        Returns the position after the last recorded action
+        """
+        return self._end
+
+    @property
+    def start(self):
+        """
+        Returns the earliest position that can be seeked to
+        """
+        # Get the position of the oldest retained action, the ring may have been written beyond the end before it was
+        # truncated
+        oldest = max(0, self._written - self._retention)
+
+        # Round it up to the next snapshot, seeking needs a snapshot at or before the target position
+        return oldest + (self._snapshot_interval - oldest % self._snapshot_interval) % self._snapshot_interval
+
+    def can_undo(self):
+        """
+        :return: True if there is an earlier position to seek to
+        """
+        return self._position > self.start
+
+    def can_redo(self):
+        """
+        :return: True if there is a later position to seek to
+        """
+        return self._position < self._end
+
+    def undo(self):
+        """
+        Moves the stores back by one action
+
+        :return: Nothing
+        """
+        self.seek(self._position - 1)
+
+    def redo(self):
+        """
+        Moves the stores forward by one action
+
+        :return: Nothing
+        """
+        self.seek(self._position + 1)
+
+    def seek(self, position):
+        """
+        Moves the stores to the state they were in after the action before the specified position was dispatched
+
+        The stores notify their change receivers once, after the seek has completed
+
+        :param position: The position to move to, between start and end
+        :return: Nothing
+        """
+        # Check that the position is within the retained history
+        if position < self.start or position > self._end:
+            raise Exception("Position " + str(position) + " is outside of the retained history")
+
+        # Check if anything has been recorded, there is no snapshot until the first action is
+        if self._end == 0:
+            # No, the stores are already at the only position
+            return
+
+        # Get the nearest snapshot at or before the position
+        snapshot_position = position - position % self._snapshot_interval
+
+        # The snapshot at the end of the history is only taken when the next action is recorded, so use the one before
+        if snapshot_position not in self._snapshots:
+            snapshot_position -= self._snapshot_interval
+
+        snapshot = self._snapshots[snapshot_position]
+
+        # Batch the store notifications
+        for store in self._stores:
+            store.pause_notifications()
+
+        # Restore the stores from the snapshot
+        for i in range(len(self._stores)):
+            self._stores[i].restore(snapshot[i])
+            # Make sure the receivers are told about the restore even if no actions are replayed
+            self._stores[i].on_change()
+
+        # Replay the actions between the snapshot and the position
+        for i in range(snapshot_position, position):
+            self._replay(self._actions[i % self._retention])
+
+        # Record the new position
+        self._position = position
+
+        # Notify the receivers of the changes
+        for store in self._stores:
+            store.resume_notifications()
+
+    def replace_store(self, previous, store):
+        """
+        Snapshots and restores a store in place of one it replaced, such as a store that took over from the store of a
+        hot replaced module (see Store.adopt). The snapshots already taken are restored in to the new store, so it must
+        accept the snapshots of the store it replaced
+
+        :param previous: The store being replaced
+        :param store: The store replacing it
+        :return: Nothing
+        """
+        self._stores = [store if journaled is previous else journaled for journaled in self._stores]
+
+    def _replay(self, recorded):
+        """
+        Delivers a recorded message to the stores without recording it again, running any sliced work to completion
+
+        :param recorded: The recorded [source, action]
+        :return: Nothing
+        """
+        # Create a fresh message to deliver the action in
+        message = DispatcherMessage(recorded[0], recorded[1])
+
+        # Deliver the message to each store
+        for store in self._stores:
+            store.handle_message(message)
+
+        # Run any sliced work now, the replay must complete before the seek returns
+        for work in message.work:
+            while not work.step():
+                pass
+
+    def _record(self, message, following):
+        """
+        Middleware that records a message before it is delivered to the stores
+
+        :param message: The message being dispatched
+        :param following: The rest of the dispatch chain
+        :return: Nothing
+        """
+        # Check if the stores were moved back in the history
+        if self._position < self._end:
+            # Yes, this message starts a new history from here, so discard the actions and snapshots after it
+            for key in list(self._snapshots.keys()):
+                if int(key) > self._position:
+                    del self._snapshots[key]
+            self._end = self._position
+
+        # Check if the stores should be snapshotted before this action
+        if self._end % self._snapshot_interval == 0:
+            # Yes, take the snapshot
+            self._snapshots[self._end] = [store.snapshot() for store in self._stores]
+
+            # Discard the snapshot that can no longer be used, as the actions after it will be overwritten
+            expired = self._end - self._retention
+            if expired >= 0 and expired in self._snapshots:
+                del self._snapshots[expired]
+
+        # Record the action
+        self._actions[self._end % self._retention] = [message.source, message.action]
+        self._end += 1
+        self._written = max(self._written, self._end)
+        self._position = self._end
+
+        # Deliver the message
+        following(message)
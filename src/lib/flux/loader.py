@@ -0,0 +1,209 @@
+from lib.flux.dispatcher import Action
+
+# The default time in milliseconds that a response is fresh for, and is returned without a request
+_default_ttl = 30000
+
+# The default time in milliseconds after a response stops being fresh that it is still returned while it is revalidated
+_default_stale_ttl = 300000
+
+# The default number of responses kept in the cache
+_default_max_entries = 100
+
+
+def _now():
+    """
+    Returns a high resolution timestamp in milliseconds
+    """
+    return performance.now()
+
+
+def _fetch_json(url, on_success, on_failure):
+    """
+    Requests json from a url, calling back with the parsed response or the reason the request failed
+    """
+    def on_response(response):
+        # Treat error statuses as failures, fetch only rejects if the request couldn't be made
+        if not response.ok:
+            return Promise.reject(__new__(Error('Request for ' + url + ' failed with status ' + response.status)))
+        return response.json()
+
+    fetch(url).then(on_response).then(on_success, on_failure)
+
+
+# Under CPython there is no browser, so requests are made by the reference host instead
+# __pragma__ ('skip')
+from lib.react.reference.host import now as _now, fetch_json as _fetch_json
+# __pragma__ ('noskip')
+
+
+class ResourceLoadedAction(Action):
+    """
+    This action is dispatched as a server action when a resource has been loaded by a ResourceLoader
+    """
+    def __init__(self, url, data):
+        """
+        :param url: The url of the resource
+        :param data: The parsed json of the response
+        """
+        # Record the parameters
+        self.url = url
+        self.data = data
+
+
+class ResourceFailedAction(Action):
+    """
+    This action is dispatched as a server action when a ResourceLoader fails to load a resource
+    """
+    def __init__(self, url, error):
+        """
+        :param url: The url of the resource
+        :param error: The reason the request failed
+        """
+        # Record the parameters
+        self.url = url
+        self.error = error
+
+
+class _CacheEntry:
+    """
+    A response held in the cache of a ResourceLoader
+    """
+    def __init__(self, data, loaded_at):
+        """
+        :param data: The parsed json of the response
+        :param loaded_at: The time the response was received
+        """
+        self.data = data
+        self.loaded_at = loaded_at
+
+
+class ResourceLoader:
+    """
+    The resource loader requests json from the server for components, dispatching the responses to the stores as
+    server actions (ResourceLoadedAction or ResourceFailedAction)
+
+    Components ask for a resource with load, typically when they mount, and render the data once a store has it. Any
+    number of components can ask for the same resource, only one request is made while a request for it is in flight.
+
+    Responses are cached by url. A response is fresh for ttl milliseconds, during which it is returned without a request.
+    After that it is stale for stale_ttl milliseconds, during which it is still returned but a request is made to
+    revalidate it (stale-while-revalidate). After that it has expired and load must wait for a new response. The cache
+    holds at most max_entries responses, evicting the least recently loaded.
+    """
+    def __init__(self, dispatcher, ttl=_default_ttl, stale_ttl=_default_stale_ttl, max_entries=_default_max_entries):
+        """
+        :param dispatcher: The dispatcher to dispatch the responses through
+        :param ttl: The time in milliseconds that a response is fresh for
+        :param stale_ttl: The time in milliseconds after a response stops being fresh that it is still returned while
+            it is revalidated
+        :param max_entries: The number of responses to keep in the cache
+        """
+        # Confirm the parameters are valid
+        assert dispatcher
+        assert max_entries > 0
+
+        # Record the parameters
+        self._dispatcher = dispatcher
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_entries = max_entries
+
+        # The cached responses keyed by url, in the order they were last used
+        self._entries = {}
+        self._entry_count = 0
+
+        # The urls of the requests that are in flight
+        self._in_flight = {}
+
+    def load(self, url):
+        """
+        Loads a resource, making a request only if there is no fresh response cached and no request in flight
+
+        The response is dispatched as a ResourceLoadedAction when it arrives, or a ResourceFailedAction if the request
+        fails. Nothing is dispatched for a cached response, the stores already received it when it was loaded.
+
+        :param url: The url of the resource
+        :return: The cached data if there is a fresh or stale response, otherwise None
+        """
+        entry = self._entries.get(url, None)
+
+        # Check if there is a response cached that hasn't expired
+        if entry is not None:
+            age = _now() - entry.loaded_at
+            if age < self._ttl + self._stale_ttl:
+                # Yes, mark it as the most recently used
+                del self._entries[url]
+                self._entries[url] = entry
+
+                # Revalidate it if it is stale
+                if age >= self._ttl:
+                    self._request(url)
+
+                return entry.data
+
+        self._request(url)
+        return None
+
+    def is_loading(self, url):
+        """
+        :param url: The url of the resource
+        :return: True if there is a request for the resource in flight
+        """
+        return url in self._in_flight
+
+    def invalidate(self, url):
+        """
+        Removes a response from the cache, so that the next load makes a request
+
+        :param url: The url of the resource
+        :return: Nothing
+        """
+        if url in self._entries:
+            del self._entries[url]
+            self._entry_count -= 1
+
+    def _request(self, url):
+        """
+        Requests a resource, unless a request for it is already in flight
+
+        :param url: The url of the resource
+        :return: Nothing
+        """
+        if url in self._in_flight:
+            return
+
+        self._in_flight[url] = True
+        _fetch_json(url, lambda data: self._on_loaded(url, data), lambda error: self._on_failed(url, error))
+
+    def _on_loaded(self, url, data):
+        """
+        Caches a response and dispatches it to the stores
+
+        :param url: The url of the resource
+        :param data: The parsed json of the response
+        :return: Nothing
+        """
+        del self._in_flight[url]
+
+        # Replace any cached response, moving it to the most recently used
+        self.invalidate(url)
+        self._entries[url] = _CacheEntry(data, _now())
+        self._entry_count += 1
+
+        # Evict the least recently used responses
+        if self._entry_count > self._max_entries:
+            for evicted in list(self._entries.keys())[:self._entry_count - self._max_entries]:
+                self.invalidate(evicted)
+
+        self._dispatcher.handle_server_action(ResourceLoadedAction(url, data))
+
+    def _on_failed(self, url, error):
+        """
+        Dispatches a failed request to the stores, any cached response is kept
+
+        :param url: The url of the resource
+        :param error: The reason the request failed
+        :return: Nothing
+        """
+        del self._in_flight[url]
+        self._dispatcher.handle_server_action(ResourceFailedAction(url, error))
@@ -0,0 +1,196 @@
+from lib.flux.codec import ActionCodec
+from lib.flux.dispatcher import MessageSourceOptions
+
+# The version of the recording format written by ActionRecorder
+_format = 1
+
+
+def _now():
+    """
+    Returns a high resolution timestamp in milliseconds
+    """
+    return performance.now()
+
+
+def _save_file(text, filename):
+    """
+    Saves some text to a file, by having the browser download it
+    """
+    url = URL.createObjectURL(__new__(Blob([text], {'type': 'application/json'})))
+    link = document.createElement('a')
+    link.href = url
+    link.download = filename
+    link.click()
+
+    # Revoke the url once the download has started, revoking it straight away can cancel the download in some browsers
+    setTimeout(lambda: URL.revokeObjectURL(url), 0)
+
+
+# Under CPython there is no browser, so the file is written directly
+# __pragma__ ('skip')
+from lib.react.reference.host import JSON, now as _now
+
+
+def _save_file(text, filename):
+    with open(filename, 'w') as f:
+        f.write(text)
+# __pragma__ ('noskip')
+
+
+class ActionRecorder:
+    """
+    Records the actions dispatched through a dispatcher, with the time each was dispatched, so that a real session can
+    be replayed later as a repeatable workload (see ActionRecording and replay.py)
+
+    Only actions of the classes passed to the recorder are recorded, so they must be json serialisable (see
+    ActionCodec). Actions such as StoreInitialisedAction, which the application dispatches itself as it starts, should
+    be left out. If stores are passed, their state when recording starts is recorded so that the replay can start from
+    the same state.
+
+    The recording is kept compact by writing the names of each class's fields once, and each action as the values of
+    its fields in that order along with the milliseconds since the action before it.
+    """
+    def __init__(self, dispatcher, action_classes, stores=None):
+        """
+        Starts recording the actions dispatched through the dispatcher
+
+        :param dispatcher: The dispatcher to record (AppDispatcher)
+        :param action_classes: The list of action classes to record
+        :param stores: An optional list of stores to record the initial state of, these must implement Store.snapshot
+        """
+        # Confirm the parameters are valid
+        assert dispatcher
+        assert action_classes
+
+        self._codec = ActionCodec(action_classes)
+
+        # The state of the stores when recording started
+        self._snapshots = [store.snapshot() for store in (stores or [])]
+
+        # The [class name, field names] of each kind of action recorded, and the index of each keyed by both joined
+        self._schemas = []
+        self._schema_indexes = {}
+
+        # The recorded [milliseconds since the previous action, source, schema index, field values]
+        self._actions = []
+
+        # The time recording started, and of the last action recorded in whole milliseconds since then
+        self._start = _now()
+        self._last_time = 0
+
+        # Record middleware with the dispatcher, so that actions are recorded before the stores receive them
+        dispatcher.use(self._record)
+
+    @property
+    def count(self):
+        """
+        Returns the number of actions recorded
+        """
+        return len(self._actions)
+
+    def _schema_index(self, name, fields):
+        """
+        Returns the index of the schema for a class and its field names, adding it if it is new
+
+        :param name: The class name
+        :param fields: The list of field names
+        :return: The index
+        """
+        key = name + ':' + ','.join(fields)
+        if key not in self._schema_indexes:
+            self._schema_indexes[key] = len(self._schemas)
+            self._schemas.append([name, fields])
+        return self._schema_indexes[key]
+
+    def _record(self, message, following):
+        """
+        Middleware that records a message before it is delivered to the stores
+
+        :param message: The message being dispatched
+        :param following: The rest of the dispatch chain
+        :return: Nothing
+        """
+        if self._codec.can_encode(message.action):
+            encoded = self._codec.encode(message.action)
+            fields = sorted(encoded[1].keys())
+
+            # Work out the delay from rounded times, so that rounding errors don't add up over a long recording
+            time = round(_now() - self._start)
+            self._actions.append([
+                time - self._last_time, message.source, self._schema_index(encoded[0], fields),
+                [encoded[1][field] for field in fields]
+            ])
+            self._last_time = time
+
+        following(message)
+
+    def to_json(self):
+        """
+        :return: The recording as json, which can be read by ActionRecording
+        """
+        return JSON.stringify({
+            'format': _format, 'snapshots': self._snapshots, 'schemas': self._schemas, 'actions': self._actions
+        })
+
+    def save(self, filename='recording.json'):
+        """
+        Saves the recording to a file, in the browser the file is downloaded
+
+        :param filename: The name of the file
+        :return: Nothing
+        """
+        _save_file(self.to_json(), filename)
+
+
+class ActionRecording:
+    """
+    A recording made by ActionRecorder, read back from its json
+    """
+    def __init__(self, text, action_classes):
+        """
+        :param text: The json of the recording
+        :param action_classes: The list of action classes that may be in the recording
+        """
+        data = JSON.parse(text)
+        if data['format'] != _format:
+            raise Exception("Unsupported recording format " + str(data['format']))
+
+        codec = ActionCodec(action_classes)
+
+        # The state of the stores when recording started, in the order they were passed to the recorder
+        self.snapshots = data['snapshots']
+
+        # The [milliseconds since recording started, source, action] of each action recorded
+        self.actions = []
+
+        time = 0
+        for recorded in data['actions']:
+            time += recorded[0]
+            schema = data['schemas'][recorded[2]]
+
+            fields = {}
+            for i in range(len(schema[1])):
+                fields[schema[1][i]] = recorded[3][i]
+
+            self.actions.append([time, recorded[1], codec.decode([schema[0], fields])])
+
+    @property
+    def duration(self):
+        """
+        Returns the time in milliseconds from the start of the recording to the last action
+        """
+        return self.actions[len(self.actions) - 1][0] if len(self.actions) else 0
+
+    def dispatch(self, dispatcher, index):
+        """
+        Dispatches a recorded action from the source it was originally dispatched from
+
+        :param dispatcher: The dispatcher (AppDispatcher)
+        :param index: The index of the action
+        :return: Nothing
+        """
+        source, action = self.actions[index][1], self.actions[index][2]
+        if source == MessageSourceOptions.server:
+            dispatcher.handle_server_action(action)
+        else:
+            dispatcher.handle_view_action(action)
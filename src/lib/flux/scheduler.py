@@ -0,0 +1,209 @@
+# The default amount of time in milliseconds that a single slice of work may run for before yielding to the browser
+_default_budget = 5
+
+
+def _now():
+    """
+    Returns a high resolution timestamp in milliseconds
+    """
+    return performance.now()
+
+
+def _request_slice(cb):
+    """
+    Asks the browser to call the callback once it has handled any pending input, preferring idle time when the
+    browser supports requestIdleCallback and falling back to a MessageChannel message otherwise
+    """
+    # Check if the browser supports idle callbacks
+    if window.requestIdleCallback:
+        # Yes, run when idle, but don't let the work starve if the browser never becomes idle
+        window.requestIdleCallback(lambda deadline: cb(), {'timeout': 50})
+    else:
+        # No, a message channel message is delivered after any pending input events without the 4ms timer clamp
+        channel = __new__(MessageChannel())
+        channel.port1.onmessage = lambda event: cb()
+        channel.port2.postMessage(None)
+
+
+# Under CPython there is no browser, so slices are queued on the event loop of the reference host instead
+# __pragma__ ('skip')
+from lib.react.reference.host import now as _now, request_callback as _request_slice
+# __pragma__ ('noskip')
+
+
+class SlicedWork:
+    """
+    Wraps a generator returned by a store that processes a large action in chunks, yielding between each chunk
+    """
+    def __init__(self, generator, progress=None):
+        """
+        :param generator: The generator that does the work, it should yield after each chunk
+        :param progress: An optional callback triggered after each slice in which the work made progress
+        """
+        # Record the parameters
+        self._generator = generator
+        self._progress = progress
+
+        # The callback to trigger when the work completes, set by the message that created the work
+        self.on_complete = None
+
+        # The work has not finished yet, work finishes when it completes or fails
+        self.done = False
+
+        # If a chunk of the work raised an error, failed work is done but never completes
+        self.failed = False
+
+    def step(self):
+        """
+        Runs the next chunk of the work
+
+        If the chunk raises an error the work is marked as failed and the error is raised on to the caller, the
+        completion callback is not triggered as a generator that raised can't be resumed to finish the work
+
+        :return: True if the work has completed, otherwise False
+        """
+        # Assume the chunk fails until it returns, so that errors of any type are caught (including javascript errors,
+        # which aren't python exceptions)
+        failed = True
+        try:
+            # Run the next chunk
+            next(self._generator)
+            failed = False
+            return False
+        except StopIteration:
+            # The generator is exhausted, the work is complete
+            failed = False
+            self.done = True
+
+            # Trigger the completion callback if there is one
+            if self.on_complete:
+                self.on_complete()
+
+            return True
+        finally:
+            # Check if the chunk raised
+            if failed:
+                # It did, the work is finished
+                self.done = True
+                self.failed = True
+
+    def report_progress(self):
+        """
+        Triggers the progress callback, if one was provided, called at the end of each slice that ran this work
+
+        :return: Nothing
+        """
+        if self._progress and not self.done:
+            self._progress()
+
+
+class Scheduler:
+    """
+    A cooperative scheduler that runs SlicedWork in small slices so that the browser can handle input between them
+    """
+    def __init__(self, budget=_default_budget):
+        """
+        :param budget: The amount of time in milliseconds that a single slice may run for
+        """
+        # Record the parameters
+        self._budget = budget
+
+        # The queue of work that is yet to complete
+        self._queue = []
+
+        # If a slice has been requested from the browser
+        self._slice_requested = False
+
+        # The duration of the longest slice run so far in milliseconds
+        self._longest_slice = 0
+
+    @property
+    def pending(self):
+        """
+        Returns the number of items of work that are yet to complete
+        """
+        return len(self._queue)
+
+    @property
+    def longest_slice(self):
+        """
+        Returns the duration of the longest slice run so far in milliseconds, this is the longest main thread task
+        caused by sliced work
+        """
+        return self._longest_slice
+
+    def schedule(self, work, urgent=False):
+        """
+        Queues work to be run in slices
+
+        Urgent work pre-empts work that has already started, so the started work resumes with its next chunk once the
+        urgent work completes, and the chunks of the two interleave. A store must leave its state consistent each time
+        its generator yields, as other actions (urgent sliced work among them) can be handled before it resumes.
+
+        :param work: The SlicedWork to run
+        :param urgent: If True the work is run before any work that is already queued (eg, for user input)
+        :return: Nothing
+        """
+        # Urgent work goes to the front of the queue so that it pre-empts work that is already queued
+        if urgent:
+            self._queue.insert(0, work)
+        else:
+            self._queue.append(work)
+
+        # Make sure that a slice will run
+        self._request()
+
+    def _request(self):
+        """
+        Requests a slice from the browser if there is queued work and one isn't already requested
+
+        :return: Nothing
+        """
+        if len(self._queue) and not self._slice_requested:
+            self._slice_requested = True
+            _request_slice(self._run_slice)
+
+    def _run_slice(self):
+        """
+        Runs queued work until the budget for this slice is spent, then yields back to the browser
+
+        :return: Nothing
+        """
+        self._slice_requested = False
+
+        # Work out when this slice must end
+        start = _now()
+        end = start + self._budget
+
+        # Track the work that made progress during this slice
+        progressed = []
+
+        try:
+            # Run chunks from the front of the queue until the queue is empty or the budget is spent
+            while len(self._queue) and _now() < end:
+                work = self._queue[0]
+
+                # Record that this work made progress
+                if work not in progressed:
+                    progressed.append(work)
+
+                # Run the next chunk, and remove the work from the queue if it completed
+                if work.step():
+                    self._queue.pop(0)
+        finally:
+            # Remove the work at the front of the queue if a chunk of it raised (or its completion callback did), the
+            # error is raised on to the browser but the rest of the queue keeps draining
+            if len(self._queue) and self._queue[0].done:
+                self._queue.pop(0)
+
+            # Record the duration of this slice
+            duration = _now() - start
+            if duration > self._longest_slice:
+                self._longest_slice = duration
+
+            # Let anything that progressed but did not finish report its progress
+            for work in progressed:
+                work.report_progress()
+
+            # Request another slice if there is work remaining
+            self._request()
@@ -0,0 +1,598 @@
+from lib.flux.codec import ActionCodec
+
+# The default time in milliseconds between heartbeats from the leader, and between the ticks of every tab
+_default_heartbeat_interval = 500
+
+# The default number of ticks without a heartbeat before a follower decides the leader has gone
+_default_timeout_ticks = 4
+
+# The default number of ticks that a tab claims leadership for before it becomes the leader
+_default_election_ticks = 2
+
+# The roles that a tab can have
+_follower = 'follower'
+_candidate = 'candidate'
+_leader = 'leader'
+
+
+def _open_channel(name):
+    """
+    Opens a BroadcastChannel, which delivers messages to every other tab of the same origin that opened one by the name
+    """
+    return __new__(BroadcastChannel(name))
+
+
+def _new_tab_id():
+    """
+    Returns an id for this tab, tabs opened earlier have lower ids so they are preferred as the leader
+    """
+    return Date.now() + Math.random()
+
+
+def _when_closed(close, reopen):
+    """
+    Calls close when the tab is closed or navigated away from, and reopen if the page is shown again from the
+    back/forward cache (where it was frozen rather than closed)
+    """
+    window.addEventListener('pagehide', lambda event: close())
+    window.addEventListener('pageshow', lambda event: reopen() if event.persisted else None)
+
+
+def _request_flush(cb):
+    """
+    Calls the callback once the current task has finished, so that changes made by a whole action are sent at once
+    """
+    Promise.resolve().then(lambda value: cb())
+
+
+# Under CPython there is no browser, so each SharedStores stands in for a tab of its own, connected by the channel and
+# interval stand-ins of the reference host
+# __pragma__ ('skip')
+import random as _random
+import time as _time
+
+from lib.react.reference.host import JSON, open_broadcast_channel as _open_channel, request_callback as _request_flush
+from lib.react.reference.host import set_interval as setInterval, clear_interval as clearInterval
+
+
+def _new_tab_id():
+    return _time.time() * 1000 + _random.random()
+
+
+def _when_closed(close, reopen):
+    pass
+# __pragma__ ('noskip')
+
+
+class SharedStores:
+    """
+    Shares the stores of an application between every tab that has it open, so that only one tab (the leader) handles
+    actions, keeps the authoritative state and holds the connection to the server
+
+    Every tab creates its dispatcher and stores as usual, then creates a SharedStores for them. The tabs elect a leader
+    over a BroadcastChannel. The leader broadcasts a heartbeat every heartbeat_interval, and a follower that misses
+    timeout_ticks heartbeats (or hears the leader resign as its tab closes) becomes a candidate. A candidate claims
+    leadership for election_ticks ticks, giving way to any leader it hears or any candidate with a lower id (an older
+    tab), and becomes the leader if nobody stops it.
+
+    Actions of the classes passed in action_classes are forwarded from followers to the leader rather than delivered
+    to their own stores, so they must be json serialisable (see ActionCodec). Other actions are delivered locally in
+    every tab, for actions like StoreInitialisedAction which don't change the shared state. The leader acknowledges
+    the actions it has handled, and a follower forwards any that weren't acknowledged again to the next leader, so
+    that actions aren't lost if the leader's tab closes while they are on their way.
+
+    The leader sends the changes to its stores (see Store.changes) to the followers once each action has been handled,
+    numbered so that a follower that misses some asks for the whole state instead. Followers apply them to their stores
+    and notify their components, without handling the action themselves. A tab that becomes the leader sends the whole
+    state, and calls connect so that it alone talks to the server.
+    """
+    def __init__(self, dispatcher, stores, name, action_classes, connect=None, tab_id=None,
+                 heartbeat_interval=_default_heartbeat_interval, timeout_ticks=_default_timeout_ticks,
+                 election_ticks=_default_election_ticks):
+        """
+        :param dispatcher: The dispatcher of this tab
+        :param stores: The list of stores to share, every tab must pass the same stores in the same order
+        :param name: The name of the broadcast channel, unique to the application
+        :param action_classes: The list of action classes that change the shared state, these are forwarded to the
+            leader
+        :param connect: An optional function called with the dispatcher when this tab becomes the leader, that connects
+            to the server and returns a function that disconnects again
+        :param tab_id: The id of this tab, a new id is created if none is provided. Lower ids are preferred as leader
+        :param heartbeat_interval: The time in milliseconds between ticks
+        :param timeout_ticks: The number of ticks without a heartbeat before the leader is presumed gone
+        :param election_ticks: The number of ticks a candidate claims leadership for before becoming the leader
+        """
+        # Confirm the parameters are valid
+        assert dispatcher
+        assert stores
+        assert timeout_ticks > election_ticks > 0
+
+        # Record the parameters
+        self._dispatcher = dispatcher
+        self._stores = stores
+        self._name = name
+        self._codec = ActionCodec(action_classes)
+        self._connect = connect
+        self._id = tab_id if tab_id is not None else _new_tab_id()
+        self._heartbeat_interval = heartbeat_interval
+        self._timeout_ticks = timeout_ticks
+        self._election_ticks = election_ticks
+
+        # This tab starts as a candidate, until it hears from a leader or its claim succeeds
+        self._role = _candidate
+        self._leader_id = None
+        self._ticks = 0
+
+        # The version of the state, incremented by the leader each time it sends changes, and the id of the leader that
+        # numbered it. After two tabs have both led, the same version from each is a different state
+        self._version = 0
+        self._version_leader = None
+
+        # If a follower has asked for the whole state and is waiting for it
+        self._sync_requested = False
+
+        # The indexes of the stores that have changed since the leader last sent changes, and if a send is requested
+        self._dirty = {}
+        self._flush_requested = False
+
+        # Actions waiting for a leader to forward them to
+        self._pending_actions = []
+
+        # The sequence number of the last action forwarded, and the [sequence, action] pairs that the leader hasn't
+        # acknowledged yet
+        self._sequence = 0
+        self._unacknowledged = []
+
+        # While this tab is the leader, the [tab id, sequence] pairs of the last action handled from each follower
+        self._acknowledged = []
+
+        # The function that disconnects from the server, while this tab is the leader
+        self._disconnect = None
+
+        self._channel = None
+        self._interval = None
+
+    @property
+    def tab_id(self):
+        """
+        Returns the id of this tab
+        """
+        return self._id
+
+    @property
+    def is_leader(self):
+        """
+        Returns True if this tab is the leader
+        """
+        return self._role == _leader
+
+    @property
+    def leader_id(self):
+        """
+        Returns the id of the leader, or None if there isn't one yet
+        """
+        return self._id if self._role == _leader else self._leader_id
+
+    @property
+    def version(self):
+        """
+        Returns the version of the state that this tab has
+        """
+        return self._version
+
+    def start(self):
+        """
+        Joins the other tabs, and starts electing a leader
+
+        :return: Nothing
+        """
+        # Forward the actions that change the shared state to the leader
+        self._dispatcher.use(self._forward_action)
+
+        # Watch the stores for changes to send, while this tab is the leader
+        for i in range(len(self._stores)):
+            self._watch_store(i)
+
+        _when_closed(self.close, self.reopen)
+        self.reopen()
+
+    def reopen(self):
+        """
+        Joins the other tabs again after close, as a candidate. This is called when the page is restored from the
+        back/forward cache, start must have been called first
+
+        :return: Nothing
+        """
+        if self._channel is not None:
+            return
+
+        self._become_candidate()
+        self._channel = _open_channel(self._name)
+        self._channel.onmessage = lambda event: self._receive(JSON.parse(event.data))
+        self._interval = setInterval(self.tick, self._heartbeat_interval)
+
+        # Ask any leader for the state
+        self._post({'type': 'hello'})
+
+    def close(self):
+        """
+        Leaves the other tabs, if this tab is the leader the others elect a new one straight away. The page may still
+        be restored from the back/forward cache, which calls reopen
+
+        :return: Nothing
+        """
+        if self._channel is None:
+            return
+
+        if self._role == _leader:
+            self._post({'type': 'resign'})
+            self._step_down(None)
+
+        clearInterval(self._interval)
+        self._channel.close()
+        self._channel = None
+
+    def tick(self):
+        """
+        Called every heartbeat interval, sends the heartbeat or watches for the leader to go
+
+        :return: Nothing
+        """
+        if self._role == _leader:
+            self._post_heartbeat()
+        elif self._role == _follower:
+            # Count the ticks since the last heartbeat
+            self._ticks += 1
+            if self._ticks >= self._timeout_ticks:
+                self._become_candidate()
+        else:
+            # Claim leadership until the election ends
+            self._post({'type': 'claim'})
+            self._ticks += 1
+            if self._ticks > self._election_ticks:
+                self._become_leader()
+
+    def _post(self, message):
+        """
+        Sends a message to every other tab
+
+        :param message: The message, a dict with a type
+        :return: Nothing
+        """
+        message['from'] = self._id
+        self._channel.postMessage(JSON.stringify(message))
+
+    def _post_heartbeat(self):
+        """
+        Sends a heartbeat, as the leader
+
+        :return: Nothing
+        """
+        self._post({'type': 'heartbeat', 'version': self._version, 'acknowledged': self._acknowledged})
+
+    def _receive(self, message):
+        """
+        Handles a message from another tab
+
+        :param message: The message
+        :return: Nothing
+        """
+        kind = message['type']
+        sender = message['from']
+
+        if kind == 'heartbeat' or kind == 'changes' or kind == 'state':
+            # Every message from the leader carries the actions it has handled
+            self._on_acknowledged(message['acknowledged'])
+
+        if kind == 'heartbeat':
+            self._on_heartbeat(sender, message['version'])
+        elif kind == 'claim':
+            # Give way to older candidates, and let a candidate know there is already a leader
+            if self._role == _candidate and sender < self._id:
+                self._follow(None)
+            elif self._role == _leader:
+                self._post_heartbeat()
+        elif kind == 'resign':
+            if self._role != _leader and sender == self._leader_id:
+                self._become_candidate()
+        elif kind == 'hello' or kind == 'sync_request':
+            if self._role == _leader:
+                self._send_state()
+        elif kind == 'action':
+            self._on_forwarded_action(sender, message['sequence'], message['action'])
+        elif kind == 'changes':
+            self._on_changes(sender, message['version'], message['changes'])
+        elif kind == 'state':
+            self._on_state(sender, message['version'], message['snapshots'])
+
+    def _on_heartbeat(self, sender, version):
+        """
+        Handles a heartbeat from a leader
+
+        :param sender: The id of the leader
+        :param version: The version of the state the leader has
+        :return: Nothing
+        """
+        if self._role == _leader:
+            # Two tabs think they are the leader, the older one keeps leading
+            if sender < self._id:
+                self._step_down(sender)
+                self._request_state()
+            return
+
+        self._follow(sender)
+
+        # Catch up if this tab missed some changes, or has the state of another leader
+        if not self._has_version(sender, version):
+            self._request_state()
+
+    def _follow(self, leader_id):
+        """
+        Becomes a follower
+
+        :param leader_id: The id of the leader, or None if it isn't known yet
+        :return: Nothing
+        """
+        self._role = _follower
+        self._ticks = 0
+        if leader_id is not None:
+            # A new leader hasn't seen the actions forwarded to the last one
+            if leader_id != self._leader_id:
+                self._requeue_unacknowledged()
+
+            self._leader_id = leader_id
+            self._forward_pending_actions()
+
+    def _become_candidate(self):
+        """
+        Starts claiming leadership, after the leader has gone
+
+        :return: Nothing
+        """
+        self._role = _candidate
+        self._leader_id = None
+        self._ticks = 0
+
+    def _become_leader(self):
+        """
+        Becomes the leader, sending the state of this tab to the followers and connecting to the server
+
+        :return: Nothing
+        """
+        self._role = _leader
+        self._leader_id = None
+        self._sync_requested = False
+        self._acknowledged = []
+
+        # The state of this tab becomes the authoritative state, the followers take it as a new version
+        for store in self._stores:
+            store.track_changes(True)
+        self._version += 1
+        self._version_leader = self._id
+        self._send_state()
+
+        if self._connect:
+            self._disconnect = self._connect(self._dispatcher)
+
+        # Handle any actions that were waiting for a leader, or that the last leader didn't acknowledge
+        self._requeue_unacknowledged()
+        pending = self._pending_actions
+        self._pending_actions = []
+        for action in pending:
+            self._dispatcher.handle_view_action(action)
+
+    def _step_down(self, leader_id):
+        """
+        Stops being the leader, disconnecting from the server
+
+        :param leader_id: The id of the new leader, or None if it isn't known
+        :return: Nothing
+        """
+        for store in self._stores:
+            store.track_changes(False)
+        self._dirty = {}
+
+        if self._disconnect:
+            self._disconnect()
+            self._disconnect = None
+
+        self._follow(leader_id)
+
+    def _forward_action(self, message, following):
+        """
+        Dispatcher middleware, that forwards actions which change the shared state to the leader
+
+        :param message: The message being dispatched
+        :param following: The rest of the middleware chain
+        :return: Nothing
+        """
+        # The leader handles every action, and other actions are handled by every tab
+        if self._role == _leader or not self._codec.can_encode(message.action):
+            following(message)
+            return
+
+        self._pending_actions.append(message.action)
+        self._forward_pending_actions()
+
+    def _forward_pending_actions(self):
+        """
+        Forwards the actions waiting for a leader, if there is one
+
+        :return: Nothing
+        """
+        if self._leader_id is None or self._channel is None:
+            return
+
+        pending = self._pending_actions
+        self._pending_actions = []
+        for action in pending:
+            self._sequence += 1
+            self._unacknowledged.append([self._sequence, action])
+            self._post({'type': 'action', 'sequence': self._sequence, 'action': self._codec.encode(action)})
+
+    def _requeue_unacknowledged(self):
+        """
+        Puts the actions that the leader didn't acknowledge back in front of the pending actions
+
+        :return: Nothing
+        """
+        if len(self._unacknowledged):
+            requeued = [pair[1] for pair in self._unacknowledged]
+            requeued.extend(self._pending_actions)
+            self._pending_actions = requeued
+            self._unacknowledged = []
+
+    def _on_acknowledged(self, acknowledged):
+        """
+        Forgets the actions forwarded by this tab that the leader has handled
+
+        :param acknowledged: The [tab id, sequence] pairs of the last action the leader handled from each tab
+        :return: Nothing
+        """
+        for pair in acknowledged:
+            if pair[0] == self._id:
+                self._unacknowledged = [p for p in self._unacknowledged if p[0] > pair[1]]
+
+    def _on_forwarded_action(self, sender, sequence, encoded):
+        """
+        Handles an action forwarded by a follower, if this tab is the leader
+
+        :param sender: The id of the follower
+        :param sequence: The sequence number of the action from the follower
+        :param encoded: The encoded action
+        :return: Nothing
+        """
+        if self._role != _leader:
+            return
+
+        self._dispatcher.handle_view_action(self._codec.decode(encoded))
+
+        # Acknowledge the action with the changes it made, or the next heartbeat if it didn't change anything
+        for pair in self._acknowledged:
+            if pair[0] == sender:
+                pair[1] = sequence
+                return
+        self._acknowledged.append([sender, sequence])
+
+    def _watch_store(self, index):
+        """
+        Subscribes to a store, so that the leader sends its changes
+
+        :param index: The index of the store
+        :return: Nothing
+        """
+        def on_change():
+            if self._role != _leader:
+                return
+
+            self._dirty[index] = True
+
+            # Send the changes once the action that made them has been handled
+            if not self._flush_requested:
+                self._flush_requested = True
+                _request_flush(self._send_changes)
+
+        self._stores[index].subscribe(on_change)
+
+    def _send_changes(self):
+        """
+        Sends the changes to every store that changed to the followers
+
+        :return: Nothing
+        """
+        self._flush_requested = False
+        if self._role != _leader or self._channel is None:
+            return
+
+        changes = []
+        for index in range(len(self._stores)):
+            if index in self._dirty:
+                changes.append([index, self._stores[index].changes()])
+        self._dirty = {}
+
+        if len(changes):
+            self._version += 1
+            self._post({
+                'type': 'changes', 'version': self._version, 'changes': changes, 'acknowledged': self._acknowledged
+            })
+
+    def _send_state(self):
+        """
+        Sends the whole state to the followers
+
+        :return: Nothing
+        """
+        self._post({
+            'type': 'state', 'version': self._version, 'snapshots': [s.snapshot() for s in self._stores],
+            'acknowledged': self._acknowledged
+        })
+
+    def _request_state(self):
+        """
+        Asks the leader for the whole state, unless this tab is already waiting for it
+
+        :return: Nothing
+        """
+        if not self._sync_requested:
+            self._sync_requested = True
+            self._post({'type': 'sync_request'})
+
+    def _on_changes(self, sender, version, changes):
+        """
+        Applies changes sent by the leader
+
+        :param sender: The id of the leader
+        :param version: The version of the state after the changes
+        :param changes: The list of [store index, changes]
+        :return: Nothing
+        """
+        if self._role == _leader:
+            return
+
+        self._follow(sender)
+
+        # Changes can only be applied to the version before them from the same leader, otherwise the whole state is
+        # needed
+        if not self._has_version(sender, version - 1):
+            self._request_state()
+            return
+
+        self._version = version
+        for change in changes:
+            self._stores[change[0]].apply_changes(change[1])
+        for change in changes:
+            self._stores[change[0]].on_change()
+
+    def _on_state(self, sender, version, snapshots):
+        """
+        Restores the whole state sent by the leader
+
+        :param sender: The id of the leader
+        :param version: The version of the state
+        :param snapshots: The snapshot of each store
+        :return: Nothing
+        """
+        if self._role == _leader:
+            return
+
+        self._follow(sender)
+        self._sync_requested = False
+
+        # Skip the state if this tab already has it
+        if self._has_version(sender, version):
+            return
+
+        self._version = version
+        self._version_leader = sender
+        for i in range(len(self._stores)):
+            self._stores[i].restore(snapshots[i])
+        for store in self._stores:
+            store.on_change()
+
+    def _has_version(self, leader_id, version):
+        """
+        :param leader_id: The id of a leader
+        :param version: A version of the state numbered by the leader
+        :return: True if this tab has that version of the state
+        """
+        return version == self._version and leader_id == self._version_leader
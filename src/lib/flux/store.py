@@ -1,3 +1,8 @@
+# The key of the next change receiver subscription, unique across every store so that receivers can be moved between
+# stores (see Store.adopt) without their keys colliding
+_next_subscription = 0
+
+
 class Store:
     """
     The store is a basic class that tracks the state of the application or some component
@@ -16,11 +21,17 @@ class Store:
         # Record the dispatcher for user in inherited classes
         self._dispatcher = dispatcher
 
-        # Register our message handler with the dispatcher
-        self._dispatcher.register(self.handle_message)
+        # Register our message handler with the dispatcher, keeping the exact callback so that it can be unregistered
+        self._message_handler = self.handle_message
+        self._dispatcher.register(self._message_handler)
+
+        # Track the callbacks that should be triggered when we have consumed a message, keyed by subscription in the
+        # order they subscribed
+        self._change_receiver = {}
 
-        # Create an empty array to track components that should update when we have consumed a message
-        self._change_receiver = []
+        # While notifications are paused, records if a change happened that the receivers have not been told about
+        self._notifications_paused = False
+        self._change_pending = False
 
     def handle_message(self, message):
         """
@@ -31,25 +42,64 @@ class Store:
         """
         raise Exception("handle_message must be implemented")
 
+    def subscribe(self, cb):
+        """
+        Subscribes a callback to be triggered if we consume a message
+
+        The returned function unsubscribes the callback, it can safely be called more than once. Components should
+        subscribe with Component.subscribe, which unsubscribes automatically when the component unmounts.
+
+        :param cb: The callback to trigger
+        :return: The function that unsubscribes the callback
+        """
+        global _next_subscription
+
+        # Get a key for this subscription
+        key = _next_subscription
+        _next_subscription += 1
+
+        # Add the callback to the receivers. The receivers are captured rather than the store, so that the subscription
+        # can still be disposed of after it has been moved to another store by adopt
+        receivers = self._change_receiver
+        receivers[key] = cb
+
+        def unsubscribe():
+            # Remove the callback, if it hasn't already been removed
+            if key in receivers:
+                del receivers[key]
+
+        return unsubscribe
+
     def register(self, cb):
         """
         This function registers a callback to be triggered if we consume a message
 
         :param cb: The callback to trigger
-        :return: Nothing
+        :return: The function that unsubscribes the callback (see subscribe)
         """
-        # Add the callback to the list of receivers
-        self._change_receiver.append(cb)
+        return self.subscribe(cb)
 
     def unregister(self, cb):
         """
         Called to remove a callback from tthe list of change receivers
 
+        This searches every receiver for the callback, prefer calling the function returned by subscribe
+
         :param cb: The callback to remove
         :return: Nothing
         """
-        # Remove the callback
-        self._change_receiver.remove(cb)
+        # Find the first subscription of the callback and remove it
+        for key in list(self._change_receiver.keys()):
+            if self._change_receiver[key] == cb:
+                del self._change_receiver[key]
+                return
+
+    @property
+    def receiver_count(self):
+        """
+        Returns the number of callbacks currently subscribed to this store
+        """
+        return len(self._change_receiver)
 
     def on_change(self):
         """
@@ -59,10 +109,119 @@ class Store:
 
         :return: Nothing
         """
-        # Iterate over the change receivers and trigger each callback
-        for cb in self._change_receiver:
-            # Trigger the callback
-            cb()
+        # Check if notifications are paused
+        if self._notifications_paused:
+            # Yes, remember to notify the receivers when they are resumed
+            self._change_pending = True
+            return
+
+        # Iterate over the receivers subscribed when the change happened, a callback may subscribe or unsubscribe
+        # receivers (eg, by causing components to mount or unmount) while we are notifying them
+        receivers = self._change_receiver
+        for key in list(receivers.keys()):
+            # Skip receivers that were unsubscribed by an earlier callback
+            if key in receivers:
+                # Trigger the callback
+                receivers[key]()
+
+    def pause_notifications(self):
+        """
+        Stops on_change from triggering the change receivers until resume_notifications is called, so that many
+        messages can be handled with only a single update to the components
+
+        :return: Nothing
+        """
+        self._notifications_paused = True
+
+    def resume_notifications(self):
+        """
+        Resumes notifications after pause_notifications, triggering the change receivers once if any changes happened
+        while paused
+
+        :return: Nothing
+        """
+        self._notifications_paused = False
+
+        # Check if there were any changes while paused
+        if self._change_pending:
+            # Yes, notify the receivers of them now
+            self._change_pending = False
+            self.on_change()
+
+    def snapshot(self):
+        """
+        Returns a copy of the state of this store that can later be passed to restore, used for time travel by
+        lib.flux.journal.ActionJournal
+
+        The snapshot must not share any mutable objects with the store
+
+        :return: The snapshot
+        """
+        raise Exception("snapshot must be implemented")
+
+    def restore(self, snapshot):
+        """
+        Restores the state of this store from a value returned by snapshot
+
+        The snapshot may be restored more than once, so it must not be modified or adopted by the store
+
+        :param snapshot: The snapshot to restore
+        :return: Nothing
+        """
+        raise Exception("restore must be implemented")
+
+    def track_changes(self, enabled):
+        """
+        Starts or stops tracking the changes to the state of this store, used by lib.flux.shared.SharedStores to send
+        followers only what changed
+
+        Stores that can describe their changes more compactly than a snapshot override this along with changes and
+        apply_changes
+
+        :param enabled: True to start tracking from the current state, False to stop
+        :return: Nothing
+        """
+        pass
+
+    def changes(self):
+        """
+        Returns the changes to the state of this store since changes was last called (or tracking started), which can
+        be passed to apply_changes on a store with the state from before them
+
+        By default this is the snapshot of the whole state
+
+        :return: The changes, these must be json serialisable
+        """
+        return self.snapshot()
+
+    def apply_changes(self, changes):
+        """
+        Applies changes returned by changes to this store, the changes may have been through json
+
+        :param changes: The changes to apply
+        :return: Nothing
+        """
+        self.restore(changes)
+
+    def adopt(self, previous):
+        """
+        Takes over from a store that this store replaces, such as the store from a module before it was hot replaced
+
+        The state of the previous store is restored in to this store, its change receivers are moved to this store,
+        and it is unregistered from the dispatcher so that only this store handles messages from now on
+
+        :param previous: The store being replaced
+        :return: Nothing
+        """
+        # Carry over the state
+        self.restore(previous.snapshot())
+
+        # Move the change receivers, so that mounted components are notified by this store
+        self._change_receiver = previous._change_receiver
+        previous._change_receiver = {}
+
+        # Stop the previous store from handling messages
+        previous.dispatcher.unregister(previous._message_handler)
 
     @property
     def dispatcher(self):
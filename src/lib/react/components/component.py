@@ -1,4 +1,12 @@
-from lib.react.components.utils import native_component_wrapper
+from lib.react.components.utils import native_component_wrapper, shallow_equal
+
+# Under CPython the javascript globals are provided by the reference host
+# __pragma__ ('skip')
+from lib.react.reference.host import JSON
+# __pragma__ ('noskip')
+
+# The maximum number of bound action callbacks that a single component will cache
+_max_bound_actions = 64
 
 
 class Component:
@@ -14,9 +22,16 @@ class Component:
     See the React.Component API Reference for a list of methods and properties related to the base React.Component
     class.
     """
-    def __init__(self, props, state=None):
+
+    # The Context (see lib.react.context) that this component reads from Component.context, if any
+    context_type = None
+
+    def __init__(self, props, state=None, children=None):
+        # Record the state class, for get_initial_state
+        self._state_class = state
+
         # Create the actual react element that we'll use as the proxy
-        self.__react_proxy = native_component_wrapper(self, props, state)
+        self.__react_proxy = native_component_wrapper(self, props, children)
 
     def render(self):
         """
@@ -45,6 +60,17 @@ class Component:
         """
         raise Exception("Render must be implemented")
 
+    def get_initial_state(self):
+        """
+        Called when the component is constructed to get its initial state. By default this creates an instance of the
+        state class passed to the constructor, if there was one.
+
+        Override this to derive the initial state from the props or context, which are available here.
+
+        :return: The initial state
+        """
+        return self._state_class() if self._state_class else {}
+
     def component_did_mount(self):
         """
         componentDidMount() is invoked immediately after a component is mounted (inserted into the tree).
@@ -181,6 +207,16 @@ class Component:
         """
         return self.__react_proxy.component_instance.props or {}
 
+    @property
+    def context(self):
+        """
+        The current value of the Context set as the context_type of this component, read from the closest matching
+        Provider above this component in the tree.
+
+        The component is re-rendered whenever the value of that Provider changes.
+        """
+        return self.__react_proxy.component_instance.context
+
     @property
     def children(self):
         """
@@ -277,6 +313,116 @@ class Component:
         """
         self.__react_proxy.component_instance.setState(state, cb)
 
+    def bound_action(self, dispatch, cls, *args):
+        """
+        Returns a callback that dispatches a new instance of the action class created with the provided arguments
+
+        The same callback is returned every time this is called with the same action class and arguments, so it can be
+        passed as a prop from render without defeating the props comparison of a PureComponent child. The callback
+        always dispatches with the most recently provided dispatch function. The arguments must be None, strings,
+        numbers or booleans, so that equal arguments can be recognised from their value.
+
+        self.bound_action(self.props.dispatcher.handle_view_action, ButtonClickedAction, True)
+
+        Callbacks are cached on the react instance being rendered, as this component is shared by every instance of
+        its class. They are released when the instance unmounts, and the oldest callback is dropped if too many are
+        cached.
+
+        :param dispatch: The function to call with the new action, typically AppDispatcher.handle_view_action
+        :param cls: The action class to instantiate
+        :param args: The arguments to instantiate the action class with
+        :return: The callback
+        """
+        # Only primitive arguments can be compared by value, anything else could share its str with a different value
+        for arg in args:
+            if not (arg is None or isinstance(arg, str) or isinstance(arg, bool) or isinstance(arg, int) or
+                    isinstance(arg, float)):
+                raise Exception(
+                    "bound_action arguments must be None, strings, numbers or booleans, not " + repr(arg)
+                )
+
+        # Construct the key for this action class and arguments, json keeps 1 and '1' apart
+        key = cls.__module__ + '.' + cls.__name__ + JSON.stringify(list(args))
+
+        # Get the callbacks of the react instance being rendered, creating them if this is its first
+        instance = self.__react_proxy.component_instance
+        if not instance._bound_actions:
+            instance._bound_actions = {}
+        bound_actions = instance._bound_actions
+
+        # Check if a callback already exists for this key
+        if key in bound_actions:
+            # Yes, make sure it uses the latest dispatch function and reuse it
+            entry = bound_actions[key]
+            entry[0] = dispatch
+            return entry[1]
+
+        # Check if the cache is full
+        if len(bound_actions) >= _max_bound_actions:
+            # Yes, drop the oldest callback
+            del bound_actions[list(bound_actions.keys())[0]]
+
+        # Create the entry that holds the dispatch function and the callback
+        entry = [dispatch, None]
+        entry[1] = lambda *event: entry[0](cls(*args))
+
+        # Record the entry for reuse later
+        bound_actions[key] = entry
+
+        return entry[1]
+
+    def release_bound_actions(self):
+        """
+        Releases any callbacks created by bound_action for the current react instance, this is called automatically
+        when the instance unmounts
+
+        :return: Nothing
+        """
+        self.__react_proxy.component_instance._bound_actions = None
+
+    def subscribe(self, store, cb):
+        """
+        Subscribes a callback to the changes of a store for as long as the current react instance is mounted, the
+        subscription is removed automatically when the instance unmounts. Typically called from component_did_mount:
+
+        self.subscribe(self.context.store, self.on_change)
+
+        This component is shared by every react instance of its class, so the callback is called as the instance that
+        subscribed, and state, props and set_state refer to that instance.
+
+        :param store: The store to subscribe to (lib.flux.store.Store)
+        :param cb: The callback to trigger when the store changes
+        :return: The function that unsubscribes the callback early
+        """
+        # Remember the react instance that is subscribing
+        proxy = self.__react_proxy
+        instance = proxy.component_instance
+
+        def on_change(*args):
+            # Point the component at the instance that subscribed before calling back, as lifecycle methods do
+            proxy.component_instance = instance
+            return cb(*args)
+
+        # Subscribe and remember how to unsubscribe on the instance
+        unsubscribe = store.subscribe(on_change)
+        if not instance._subscriptions:
+            instance._subscriptions = []
+        instance._subscriptions.append(unsubscribe)
+
+        return unsubscribe
+
+    def release_subscriptions(self):
+        """
+        Removes any store subscriptions made by subscribe for the current react instance, this is called automatically
+        when the instance unmounts
+
+        :return: Nothing
+        """
+        instance = self.__react_proxy.component_instance
+        for unsubscribe in instance._subscriptions or []:
+            unsubscribe()
+        instance._subscriptions = None
+
     def force_update(self, cb):
         """
         By default, when your component’s state or props change, your component will re-render. If your render()
@@ -291,3 +437,26 @@ class Component:
         render().
         """
         self.__react_proxy.component_instance.forceUpdate(cb)
+
+
+class PureComponent(Component):
+    """
+    React.PureComponent is similar to React.Component. The difference between them is that React.Component doesn’t
+    implement shouldComponentUpdate(), but React.PureComponent implements it with a shallow prop and state comparison.
+
+    If your React component’s render() function renders the same result given the same props and state, you can use
+    React.PureComponent for a performance boost in some cases.
+
+    Callbacks passed as props should be created with bound_action, otherwise the shallow comparison will always fail.
+    """
+    def should_component_update(self, next_props, next_state):
+        """
+        Only update if a prop or state value is no longer identical
+
+        :return: True if the component should re-render
+        """
+        # Get the name of this component for reporting
+        display_name = type(self).__name__
+
+        return not shallow_equal(self.props, next_props, display_name) or \
+            not shallow_equal(self.state, next_state, display_name)
@@ -0,0 +1,55 @@
+from lib.react.native import _react
+
+# The base class of every react class that proxies a Component. Each react class holds the proxy of its Component class
+# in its static template property, and the lifecycle methods call straight through to it with the react instance as
+# this.
+#
+# React classes are generated per Component subclass at build time by build_react_classes.py, and are only created at
+# runtime (see utils._create_class) for components that the build did not know about.
+# noinspection PyUnresolvedReferences
+ReactComponentProxy = __pragma__(
+    'js',
+    '{}',
+    '''
+    class ReactComponentProxy extends _react.Component {
+        constructor(props, context) {
+            super(props, context);
+
+            // Get the initial state from the parent component, copied in to a plain object as setState would merge it,
+            // so that the state of a component is always a plain object
+            var state = this.constructor.template.constructorStateInitialiser.call(this);
+            if (state) {
+                this.state = Object.assign({}, state);
+            }
+        }
+
+        render() {
+            return this.constructor.template.render.call(this);
+        }
+
+        componentDidMount() {
+            this.constructor.template.componentDidMount.call(this);
+        }
+
+        componentWillUnmount() {
+            this.constructor.template.componentWillUnmount.call(this);
+        }
+
+        shouldComponentUpdate(nextProps, nextState) {
+            return this.constructor.template.shouldComponentUpdate.call(this, nextProps, nextState);
+        }
+
+        componentDidUpdate(prevProps, prevState, snapshot) {
+            this.constructor.template.componentDidUpdate.call(this, prevProps, prevState, snapshot);
+        }
+
+        getSnapshotBeforeUpdate(prevProps, prevState) {
+            return this.constructor.template.getSnapshotBeforeUpdate.call(this, prevProps, prevState);
+        }
+
+        componentDidCatch(error, info) {
+            this.constructor.template.componentDidCatch.call(this, error, info);
+        }
+    }
+    '''
+)
@@ -0,0 +1,57 @@
+from lib.react.components.component import Component
+from lib.react.context import create_context
+
+
+class StoreContextValue:
+    """
+    The value provided by StoreProvider to consuming components
+    """
+    def __init__(self, store, dispatcher):
+        # Record the store and dispatcher
+        self.store = store
+        self.dispatcher = dispatcher
+
+
+# The context that StoreProvider provides, consuming components should set context_type to this
+StoreContext = create_context(None)
+
+
+class StoreProvider(Component):
+    """
+    Provides a store and dispatcher to every component beneath it through StoreContext
+
+    Intermediate components no longer need to accept and forward the store and dispatcher as props, only the
+    components that set context_type to StoreContext read them, and only those need to subscribe to the store:
+
+    class Counter(Component):
+        context_type = StoreContext
+
+        def component_did_mount(self):
+            self.subscribe(self.context.store, self.on_change)
+    """
+
+    class Props:
+        """
+        Define the props for the store provider
+        """
+
+        def __init__(self, value):
+            # The context value, it is created once so consumers are not re-rendered by the provider itself
+            self.value = value
+
+    def __init__(self, store, dispatcher, children):
+        """
+        :param store: The store to provide
+        :param dispatcher: The dispatcher to provide
+        :param children: The children to render inside the provider
+        """
+        # Call the super constructor with the context value and the children
+        super().__init__(StoreProvider.Props(StoreContextValue(store, dispatcher)), None, children)
+
+    def render(self):
+        """
+        Renders the children inside the context provider
+
+        :return: The provider element
+        """
+        return StoreContext.provider(self.props.value, self.children)
@@ -1,10 +1,86 @@
-from lib.react.native import _react
+from lib.react.components.proxy import ReactComponentProxy
+from lib.react.native import _react, _dev_mode
 from lib.react.react import React
 
+# The react classes generated at build time by build_react_classes.py, keyed in the same way as _react_component_classes
+# noinspection PyUnresolvedReferences
+__pragma__('js', '{}', "import {classes as _prebuilt_react_classes} from './react_classes.js';")
+
 _react_component_classes = {}
 
+# The component class that each react class currently proxies, keyed in the same way as _react_component_classes
+_react_component_types = {}
+
+# The mounted react instances of each react class, only tracked in development for hot module replacement
+_mounted_instances = {}
+
+# The number of prop comparisons that failed only because a callback was recreated (only tracked in development)
+_function_identity_misses = 0
+
+
+def shallow_equal(current, following, display_name=None):
+    """
+    Compares the own keys of two props or state objects using identity, in the same way React.PureComponent does
+
+    In development builds, comparisons that fail solely because a function was recreated are counted and reported, as
+    they usually mean that a callback is being created in render rather than bound with Component.bound_action
+
+    :param current: The current props or state
+    :param following: The next props or state
+    :param display_name: The name of the component doing the comparison, used for the development warning
+    :return: True if every key holds the identical value in both objects, otherwise False
+    """
+    global _function_identity_misses
+
+    # The same object (or both empty) is always equal
+    if current is following:
+        return True
+
+    # Only one of the objects is set, they can't be equal
+    if not current or not following:
+        return False
+
+    # Get the keys of both objects. Transcrypt renames keys to py_keys (for dicts), which Object doesn't have
+    __pragma__('noalias', 'keys')
+    current_keys = Object.keys(current)
+    following_keys = Object.keys(following)
+    __pragma__('alias', 'keys', 'py_keys')
+
+    # Differing key counts means the objects differ
+    if len(current_keys) != len(following_keys):
+        return False
+
+    # Track if the only differences found were between functions
+    only_functions = True
+    equal = True
+
+    for key in current_keys:
+        # Skip any values that are identical
+        if current[key] is following[key]:
+            continue
+
+        # This key differs
+        equal = False
 
-def native_component_wrapper(parent, props, cls_state=None, children=None):
+        # Check if the difference is something other than two functions
+        if not callable(current[key]) or not callable(following[key]):
+            # It is, there's nothing more to learn from the remaining keys
+            only_functions = False
+            break
+
+    # Check if the comparison failed only because of new function identities
+    if _dev_mode and not equal and only_functions:
+        # Count and report it
+        _function_identity_misses += 1
+        console.warn(
+            (display_name or 'Component') + ' re-rendered only because of new function props (' +
+            str(_function_identity_misses) + ' so far), consider using Component.bound_action'
+        )
+
+    return equal
+
+
+def native_component_wrapper(parent, props, children=None):
     """
     Creates a new react class for the parent component if one does not exist, then instantiates it. The class wraps a
     proxy Component class that is responsible for calling various functions from the parent component, and also handles
@@ -13,32 +89,46 @@ def native_component_wrapper(parent, props, cls_state=None, children=None):
     # Create a scoped variable to store the component instance
     component_instance = None
 
+    # Construct the type "name" for the parent class
+    type_name = type(parent).__module__ + '.' + type(parent).__name__
+
     # noinspection PyUnresolvedReferences,PyPep8Naming
-    class _Component(object, _react.Component.prototype):
+    class _Component:
         """
-        The proxy Component class
+        The proxy Component class, the react class for the parent calls the lifecycle methods of this class
         """
 
         def __init__(self):
             """
-            Checks to see if a react class exists yet for the specified parent component, if not it creates a new react
-            class that is then reused for all instances of the parent class. It then instantiates the class and returns
-            the instantiated class
+            Checks to see if a react class exists yet for the specified parent component, if not it uses the class
+            generated at build time, or creates a new react class, that is then reused for all instances of the parent
+            class. It then instantiates the class and returns the instantiated class
             """
-            # Get the type of the parent
-            current_type = type(parent)
-            # Construct the type "name" for the class
-            current_type = current_type.__module__ + '.' + current_type.__name__
-
             # Check if the react class for the parent exists yet
-            if current_type in _react_component_classes:
+            if type_name in _react_component_classes:
                 # Yes, get the existing react class and re-use it
-                react_component_class = _react_component_classes[current_type]
+                react_component_class = _react_component_classes[type_name]
+
+                # In development, check if the module of the parent was hot replaced since the class was created
+                if _dev_mode and _react_component_types[type_name] is not type(parent):
+                    # It was, swap the members of the existing class so that mounted instances keep their state
+                    _hot_swap_class(react_component_class, self, type_name)
+                    _react_component_types[type_name] = type(parent)
             else:
-                # No, create the react class for the parent
-                react_component_class = _create_class(self, current_type)
+                # No, use the react class generated at build time, or create one now if the build didn't generate one
+                if type_name in _prebuilt_react_classes:
+                    react_component_class = _prebuilt_react_classes[type_name]
+                else:
+                    react_component_class = _create_class(type_name)
+                # Point the react class at this proxy
+                react_component_class.template = self
+                # Check if the parent reads a context
+                if type(parent).context_type:
+                    # Yes, subscribe the react class to it
+                    react_component_class.contextType = type(parent).context_type.native
                 # Record the class for reuse later
-                _react_component_classes[current_type] = react_component_class
+                _react_component_classes[type_name] = react_component_class
+                _react_component_types[type_name] = type(parent)
 
             # Create the initial arguments to instantiate the react class
             create_elems_args = [react_component_class, props]
@@ -54,9 +144,12 @@ def native_component_wrapper(parent, props, cls_state=None, children=None):
         @staticmethod
         def constructorStateInitialiser():
             """
-            Called whenever the react class is instantiated to get the default state if one was provided
+            Called whenever the react class is instantiated to get the initial state from the parent
             """
-            return cls_state() if cls_state else {}
+            # Remember the component instance
+            component_instance.component_instance = this
+            # Call the original function
+            return parent.get_initial_state()
 
         @staticmethod
         def render():
@@ -75,6 +168,9 @@ def native_component_wrapper(parent, props, cls_state=None, children=None):
             """
             # Remember the component instance
             component_instance.component_instance = this
+            # In development, track the mounted instance so that it can be re-rendered after hot module replacement
+            if _dev_mode:
+                _track_mounted(type_name, this, True)
             # Call the original function
             parent.component_did_mount()
 
@@ -85,8 +181,15 @@ def native_component_wrapper(parent, props, cls_state=None, children=None):
             """
             # Remember the component instance
             component_instance.component_instance = this
+            # In development, stop tracking the instance
+            if _dev_mode:
+                _track_mounted(type_name, this, False)
             # Call the original function
             parent.component_will_unmount()
+            # The component will never be rendered again, so free any callbacks cached for its renders and stop this
+            # instance receiving store changes, the parent is shared by every instance so only its own are removed
+            parent.release_bound_actions()
+            parent.release_subscriptions()
 
         @staticmethod
         def shouldComponentUpdate(next_props, next_state):
@@ -133,81 +236,159 @@ def native_component_wrapper(parent, props, cls_state=None, children=None):
     return component_instance
 
 
+def _track_mounted(type_name, instance, mounted):
+    """
+    Records that a react instance of the named react class was mounted or unmounted
+    """
+    # Get the instances of this class, creating the list if this is the first
+    if type_name not in _mounted_instances:
+        _mounted_instances[type_name] = []
+    instances = _mounted_instances[type_name]
+
+    # Add or remove the instance
+    if mounted:
+        instances.append(instance)
+    elif instance in instances:
+        instances.remove(instance)
+
+
+def _hot_swap_class(react_component_class, proxy, type_name):
+    """
+    Points an existing react class at the proxy of a component class from a hot replaced module, and re-renders the
+    mounted instances of the class with the new members. The react class itself is kept, so React reconciles the
+    mounted instances rather than remounting them, and their state is left intact.
+    """
+    # Point the existing class at the new proxy
+    react_component_class.template = proxy
+
+    # Re-render the mounted instances, force the update so that pure components re-render too
+    for instance in _mounted_instances.get(type_name, []):
+        instance.forceUpdate()
+
+
 # noinspection PyUnresolvedReferences
-def _create_class(proxy, display_name):
+def _create_class(display_name):
     """
-    Utility function for creating a react class for the specified proxy class with the specified name
+    Utility function for creating a react class with the specified name, for components that build_react_classes.py
+    did not generate a class for
     """
-    assert proxy
     assert display_name
 
-    # Magic javascript for generating a class that inherits from both React.Component and the proxy class
-    __pragma__(
-        'js',
-        '''
-        function react_component_class_creator_utils_create_class(template, displayName) {{
-            function getOwnPropertyDescriptors(obj) {{ // IE11 doesn't support Object.getOwnPropertyDescriptors so use this
-                var result = {{}};
-                var arrPropertyNames = Object.getOwnPropertyNames(obj); // IE11 doesn't support "var key of Reflect.ownKeys(obj)" but this approach should suffice for Bridge classes
-                for (var i = 0; i < arrPropertyNames.length; i++) {{
-                    var key = arrPropertyNames[i];
-                    result[key] = Object.getOwnPropertyDescriptor(obj, key);
-                }}
-                return result;
-            }}
-
-            let reactComponentClass = null;
-
-            // Use the displayName to name the component class function (React DevTools will use this)
-            eval("reactComponentClass = function " + displayName + "(props) {{ window.react_component_class_creator_utils_initialise_component_state(this, template, props); }}");
-
-            // Set the React.Component base class
-            reactComponentClass.prototype = Object.create(
-                _react.Component && _react.Component.prototype,
-            );
-            if (Object.setPrototypeOf) {{
-                Object.setPrototypeOf(reactComponentClass, _react.Component);
-            }}
-            else {{
-                reactComponentClass.__proto__ = _react.Component;
-            }}
-            // Attach the members
-            var protoStack = [];
-            var o = template.__proto__;
-            while (o) {{
-                protoStack.push(o);
-                o = o.__proto__;
-            }}
-            for (var i = protoStack.length - 1; i >= 0; i--) {{
-                o = protoStack[i];
-                var descriptors = getOwnPropertyDescriptors(o);
-                for (var name in descriptors) {{
-                    var descriptor = descriptors[name];
-                    if (descriptor instanceof Object)
-                        Object.defineProperty(reactComponentClass.prototype, name, descriptor);
-                }}
-            }}
-
-            return reactComponentClass;
-        }}
-
-        function react_component_class_creator_utils_initialise_component_state(instance, template, props) {{
-            var getInitialState = template.constructorStateInitialiser;
-            if ((typeof(getInitialState) !== "function") || (getInitialState.length !== 0)) {{
-                return;
-            }}
-            instance.props = props;
-
-            var state = getInitialState.call(instance);
-            if (state) {{
-                instance.state = state;
-            }}
-        }}
-
-        window.react_component_class_creator_utils_initialise_component_state = 
-        react_component_class_creator_utils_initialise_component_state;
-        '''
-    )
-
-    # Create the react class and return it
-    return react_component_class_creator_utils_create_class(proxy, display_name.replace('.', '_'))
+    # Create a subclass of the proxy base class, no eval is needed so this is safe under a strict content security policy
+    react_component_class = __pragma__('js', '{}', 'class extends ReactComponentProxy {}')
+
+    # Name the class (React DevTools will use this)
+    react_component_class.displayName = display_name.replace('.', '_')
+
+    return react_component_class
+
+
+# Under CPython there is no javascript prototype chain to build react classes from, so the wrapper is replaced with one
+# that builds plain python classes for the reference implementation of react (see lib.react.reference)
+# __pragma__ ('skip')
+from lib.react.reference.host import JsObject, Object, console
+
+
+def native_component_wrapper(parent, props, children=None):
+    """
+    The CPython counterpart of the native_component_wrapper above. As with the javascript classes, the react class for
+    a component class is created from the first parent instance and reused for every instance after it.
+    """
+    # Construct the type "name" for the parent class
+    type_name = type(parent).__module__ + '.' + type(parent).__name__
+
+    # Create the proxy that the parent reads the component instance from
+    proxy = _ReferenceProxy()
+
+    # Check if the react class for the parent exists yet
+    if type_name in _react_component_classes:
+        # Yes, get the existing react class and re-use it
+        react_component_class = _react_component_classes[type_name]
+    else:
+        # No, create the react class for the parent
+        react_component_class = _create_reference_class(parent, proxy, type_name)
+        # Check if the parent reads a context
+        if type(parent).context_type:
+            # Yes, subscribe the react class to it
+            react_component_class.contextType = type(parent).context_type.native
+        # Record the class for reuse later
+        _react_component_classes[type_name] = react_component_class
+        _react_component_types[type_name] = type(parent)
+
+    # Create the initial arguments to instantiate the react class
+    create_elems_args = [react_component_class, props]
+
+    # Check if there are any children
+    if children:
+        # Convert the children to an element array and add it to the creation parameters
+        create_elems_args.append(React.to_element_array(children))
+
+    # Instantiate the react element
+    proxy._reactElement = _react.createElement(*create_elems_args)
+
+    return proxy
+
+
+class _ReferenceProxy:
+    """
+    Holds the react element and the most recent component instance for a parent component
+    """
+    def __init__(self):
+        self._reactElement = None
+        self.component_instance = None
+
+
+def _create_reference_class(parent, proxy, display_name):
+    """
+    Creates a react class that proxies its lifecycle methods to the parent, in the same way as the javascript proxy
+    """
+    def __init__(this, props, context=None):
+        _react.Component.__init__(this, props, context)
+        # The callbacks and subscriptions of this instance, see Component.bound_action and Component.subscribe
+        this._bound_actions = None
+        this._subscriptions = None
+        # Get the initial state from the parent, copied like react copies it
+        proxy.component_instance = this
+        this.state = JsObject.of(parent.get_initial_state())
+
+    def render(this):
+        proxy.component_instance = this
+        return parent.render()
+
+    def component_did_mount(this):
+        proxy.component_instance = this
+        parent.component_did_mount()
+
+    def component_will_unmount(this):
+        proxy.component_instance = this
+        parent.component_will_unmount()
+        parent.release_bound_actions()
+        parent.release_subscriptions()
+
+    def should_component_update(this, next_props, next_state):
+        proxy.component_instance = this
+        return parent.should_component_update(next_props, next_state)
+
+    def component_did_update(this, previous_props, previous_state, snapshot):
+        proxy.component_instance = this
+        parent.component_did_update(previous_props, previous_state, snapshot)
+
+    def get_snapshot_before_update(this, previous_props, previous_state):
+        proxy.component_instance = this
+        return parent.get_snapshot_before_update(previous_props, previous_state)
+
+    def component_did_catch(this, error, info):
+        proxy.component_instance = this
+        parent.component_did_catch(error, info)
+
+    return type(display_name.replace('.', '_'), (_react.Component,), {
+        '__init__': __init__,
+        'render': render,
+        'componentDidMount': component_did_mount,
+        'componentWillUnmount': component_will_unmount,
+        'shouldComponentUpdate': should_component_update,
+        'componentDidUpdate': component_did_update,
+        'getSnapshotBeforeUpdate': get_snapshot_before_update,
+        'componentDidCatch': component_did_catch,
+    })
+# __pragma__ ('noskip')
@@ -0,0 +1,83 @@
+from lib.react.native import _react
+from lib.react.react import React
+
+
+class Context:
+    """
+    Context provides a way to pass data through the component tree without having to pass props down manually at
+    every level.
+
+    Wraps the object returned by React.createContext(), use create_context to create one.
+    """
+    def __init__(self, default_value=None):
+        """
+        :param default_value: The value consumers receive when there is no matching Provider above them in the tree
+        """
+        # Create the native react context
+        self._native = _react.createContext(default_value)
+
+    @property
+    def native(self):
+        """
+        Returns the native react context object
+        """
+        return self._native
+
+    def provider(self, value, children):
+        """
+        <MyContext.Provider value={/* some value */}>
+
+        Every Context object comes with a Provider React component that allows consuming components to subscribe to
+        context changes.
+
+        All consumers that are descendants of a Provider will re-render whenever the Provider’s value prop changes.
+        Changes are determined by comparing the new and old values using the same algorithm as Object.is, so the value
+        should be created once rather than on every render.
+
+        :param value: The value to provide to consumers
+        :param children: The children to render inside the provider
+        :return: The provider element
+        """
+        return _react.createElement(self._native.Provider, {'value': value}, React.to_element_array(children))
+
+    def consumer(self, render):
+        """
+        <MyContext.Consumer>
+          {value => /* render something based on the context value */}
+        </MyContext.Consumer>
+
+        A React component that subscribes to context changes.
+
+        :param render: A function that receives the current context value and returns a Component or element
+        :return: The consumer element
+        """
+        return _react.createElement(self._native.Consumer, None, lambda value: React.to_element_array(render(value)))
+
+
+def create_context(default_value=None):
+    """
+    const MyContext = React.createContext(defaultValue);
+
+    Creates a Context object. When React renders a component that subscribes to this Context object it will read the
+    current context value from the closest matching Provider above it in the tree.
+
+    Class components subscribe by setting the context_type class attribute to the context, and then read the value
+    from Component.context.
+
+    :param default_value: The value consumers receive when there is no matching Provider above them in the tree
+    :return: The Context
+    """
+    return Context(default_value)
+
+
+def use_context(context):
+    """
+    const value = useContext(MyContext);
+
+    Accepts a context object and returns the current context value for that context. This is the counterpart of
+    Component.context for native function components, and like all hooks can only be called while one is rendering.
+
+    :param context: The Context to read
+    :return: The current context value
+    """
+    return _react.useContext(context.native)
@@ -1,7 +1,8 @@
-# Full list of HTML5 tags
+from lib.react.native import _react
 from lib.react.react import React
 
-_tags = ["a", "abbr", "acronym", "address", "applet", "area", "article", "aside", "audio", "b", "base", "basefont",
+# Full list of HTML5 tags
+tags = ["a", "abbr", "acronym", "address", "applet", "area", "article", "aside", "audio", "b", "base", "basefont",
          "bdi", "bdo", "big", "blockquote", "body", "br", "button", "canvas", "caption", "center", "cite", "code",
          "col", "colgroup", "datalist", "dd", "del", "details", "dfn", "dir", "div", "dl", "dt", "em", "embed",
          "fieldset", "figcaption", "figure", "font", "footer", "form", "frame", "frameset", "h1", "h2", "h3", "h4",
@@ -13,17 +14,32 @@ _tags = ["a", "abbr", "acronym", "address", "applet", "area", "article", "aside"
          "ul", "var", "video", "wbr"]
 
 
+def create_dom_element(tag, props, children=None):
+    """
+    Creates a react element for a dom tag, converting the children to elements once
+
+    build_constant_elements.py rewrites calls to the DOM tag functions in to calls to this function, so that they don't
+    go through the generated functions below
+
+    :param tag: The name of the tag
+    :param props: The props of the element, or None
+    :param children: A child, or list of children
+    :return: The react element
+    """
+    return _react.createElement(tag, props, React.to_element_array(children))
+
+
 # Create a DOM class
 class DOM:
     pass
 
 
 # Iterate over tags and add functions to generate tags
-for tag in _tags:
+for tag in tags:
     # Create a new function scope so that the tag name is not lost
     def fn(_tag):
         # Add the tag to the DOM class
-        setattr(DOM, _tag, lambda props, children: React.create_element(_tag, props, React.to_element_array(children)))
+        setattr(DOM, _tag, lambda props, children=None: create_dom_element(_tag, props, children))
 
 
     # Call the scope breaking function
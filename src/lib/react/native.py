@@ -1,3 +1,17 @@
 # Single point of import of the react and react-dom javascript libraries
+
+# Under CPython there is no javascript engine, so the pure python reference implementation is used instead
+# __pragma__ ('skip')
+from lib.react.reference import react as _react, react_dom as _react_dom
+from lib.react.reference.host import dev_mode as _dev_mode
+# __pragma__ ('noskip')
+
+# __pragma__ ('ecom')
+'''?
 _react = require('react')
-_react_dom = require('react-dom')
\ No newline at end of file
+_react_dom = require('react-dom')
+
+# True for development builds, webpack replaces process.env.NODE_ENV with 'production' in production mode
+_dev_mode = process.env.NODE_ENV != 'production'
+?'''
+# __pragma__ ('noecom')
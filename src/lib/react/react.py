@@ -16,8 +16,9 @@ class React:
 
         This function takes care of the conversion of Component to Element
         """
-        return [c.component if c.component else c for c in elements] if type(elements) is list else \
-            elements.component if elements and elements.component else elements
+        return [c.component if hasattr(c, 'component') and c.component else c for c in elements] \
+            if type(elements) is list else \
+            elements.component if hasattr(elements, 'component') and elements.component else elements
 
     @staticmethod
     def create_element(_type, props, children):
@@ -97,3 +98,14 @@ class React:
         Use hydrate() instead.
         """
         return _react_dom.render(React.to_element_array(element), container)
+
+    @staticmethod
+    def hydrate(element, container):
+        """
+        Same as render(), but is used to hydrate a container whose HTML contents were rendered by ReactDOMServer. React
+        will attempt to attach event listeners to the existing markup.
+
+        React expects that the rendered content is identical between the server and the client. It can patch up
+        differences in text content, but you should treat mismatches as bugs and fix them.
+        """
+        return _react_dom.hydrate(React.to_element_array(element), container)
@@ -0,0 +1,8 @@
+# A pure python reference implementation of the small part of react and react-dom that lib.react uses. It is selected by
+# lib.react.native when running under CPython rather than Transcrypt, so that the framework, stores and components can
+# be unit tested, profiled and rendered headlessly without a Transcrypt build or a javascript engine.
+#
+# It supports element creation, class and function components, setState/forceUpdate, the lifecycle methods in react's
+# order, keyed reconciliation and context. Error boundaries, refs and portals are not supported.
+#
+# Under Transcrypt this package is never imported, the imports of it are skipped with __pragma__ ('skip').
@@ -0,0 +1,322 @@
+# Stand-ins for the parts of the browser host environment that the framework uses, for running under CPython
+import builtins
+import inspect
+import json
+import os
+import sys
+import time
+import urllib.request
+
+# Modules that use Transcrypt pragmas call __pragma__ when they are imported, which only exists under Transcrypt
+if not hasattr(builtins, '__pragma__'):
+    builtins.__pragma__ = lambda *args: None
+
+# The equivalent of a development build, set NODE_ENV=production to run as a production build would
+dev_mode = os.environ.get('NODE_ENV') != 'production'
+
+
+class JsObject:
+    """
+    A plain javascript object. Attributes and items are the same thing, and reading a missing key gives undefined
+    (None) rather than raising.
+    """
+    def __init__(self, values=None):
+        """
+        :param values: An optional dict of initial keys and values
+        """
+        if values:
+            self.__dict__.update(values)
+
+    @staticmethod
+    def of(value):
+        """
+        Returns a new object holding a shallow copy of the own keys of a value, like Object.assign({}, value)
+
+        :param value: A JsObject, dict or python object
+        :return: The new JsObject
+        """
+        return JsObject(dict(own_items(value)))
+
+    def __getattr__(self, name):
+        # Python protocol lookups must still fail, everything else is just undefined
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return None
+
+    def __getitem__(self, key):
+        return self.__dict__.get(key)
+
+    def __setitem__(self, key, value):
+        self.__dict__[key] = value
+
+    def __delitem__(self, key):
+        self.__dict__.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.__dict__
+
+    def __len__(self):
+        return len(self.__dict__)
+
+    def __bool__(self):
+        # Objects are always truthy in javascript, even when they are empty
+        return True
+
+    def __repr__(self):
+        return 'JsObject(' + repr(self.__dict__) + ')'
+
+
+def own_items(value):
+    """
+    Returns the own enumerable keys and values of a value, in the way javascript would see them
+
+    :param value: A JsObject, dict, python object or None
+    :return: A list of (key, value) tuples
+    """
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return list(value.items())
+    if hasattr(value, '__dict__'):
+        return list(vars(value).items())
+    return []
+
+
+class Object:
+    """
+    Stands in for the javascript Object global
+    """
+    @staticmethod
+    def keys(value):
+        """
+        :return: The list of own keys of the value
+        """
+        return [key for key, _ in own_items(value)]
+
+
+class JSON:
+    """
+    Stands in for the javascript JSON global, objects are parsed in to JsObjects so they can be read as attributes
+    """
+    @staticmethod
+    def stringify(value):
+        """
+        :return: The json of a value, python objects are serialised from their own keys
+        """
+        return json.dumps(value, default=lambda o: dict(own_items(o)), separators=(',', ':'))
+
+    @staticmethod
+    def parse(text):
+        """
+        :return: The value of some json
+        """
+        return json.loads(text, object_hook=JsObject)
+
+
+class console:
+    """
+    Stands in for the javascript console global, messages are written to stderr and kept for inspection
+    """
+
+    # Every message logged so far, as (level, message) tuples
+    messages = []
+
+    @staticmethod
+    def _write(level, args):
+        message = ' '.join(str(arg) for arg in args)
+        console.messages.append((level, message))
+        sys.stderr.write(level + ': ' + message + '\n')
+
+    @staticmethod
+    def log(*args):
+        console._write('log', args)
+
+    @staticmethod
+    def warn(*args):
+        console._write('warn', args)
+
+    @staticmethod
+    def error(*args):
+        console._write('error', args)
+
+
+# Callbacks requested with request_callback that are yet to run
+_pending_callbacks = []
+
+
+def now():
+    """
+    Stands in for performance.now(), a high resolution timestamp in milliseconds
+    """
+    return time.perf_counter() * 1000
+
+
+def request_callback(cb):
+    """
+    Stands in for the browser calling back in a later task (requestIdleCallback, MessageChannel, setTimeout), the
+    callback is queued until run_pending is called
+
+    :param cb: The callback to queue
+    :return: Nothing
+    """
+    _pending_callbacks.append(cb)
+
+
+def run_pending(limit=None):
+    """
+    Stands in for the browser event loop, running queued callbacks (including any they queue) in order
+
+    :param limit: The most callbacks to run, or None to run until nothing is queued
+    :return: The number of callbacks that were run
+    """
+    count = 0
+    while _pending_callbacks and (limit is None or count < limit):
+        _pending_callbacks.pop(0)()
+        count += 1
+    return count
+
+
+def fetch_json(url, on_success, on_failure):
+    """
+    Stands in for fetching json with the browser fetch api. The request is made when the queued callback runs (see
+    run_pending), so it is in flight until then
+
+    :param url: The url to request
+    :param on_success: Called with the parsed response
+    :param on_failure: Called with the error if the request fails or the response has an error status
+    :return: Nothing
+    """
+    def perform():
+        try:
+            with urllib.request.urlopen(url) as response:
+                data = json.loads(response.read().decode('utf-8'))
+        except Exception as error:
+            on_failure(error)
+            return
+        on_success(data)
+
+    request_callback(perform)
+
+
+# The open broadcast channels, keyed by name
+_broadcast_channels = {}
+
+
+class BroadcastChannel:
+    """
+    Stands in for a browser BroadcastChannel, connecting every channel opened with the same name in this process. Each
+    channel stands in for a different tab, messages are delivered to every other channel with the name as queued
+    callbacks (see run_pending), as json copies in the way the browser clones them
+    """
+    def __init__(self, name):
+        """
+        :param name: The name of the channel
+        """
+        self.name = name
+        self.onmessage = None
+        _broadcast_channels.setdefault(name, []).append(self)
+
+    def postMessage(self, data):
+        """
+        Sends a message to every other open channel with the same name
+
+        :param data: The message, this must be json serialisable
+        :return: Nothing
+        """
+        for channel in _broadcast_channels.get(self.name, []):
+            if channel is not self:
+                request_callback(lambda channel=channel, text=JSON.stringify(data): channel._deliver(text))
+
+    def _deliver(self, text):
+        # Closed channels don't receive messages that were already queued
+        if self.onmessage and self in _broadcast_channels.get(self.name, []):
+            self.onmessage(JsObject({'data': JSON.parse(text)}))
+
+    def close(self):
+        """
+        Closes the channel, it no longer receives messages
+
+        :return: Nothing
+        """
+        if self in _broadcast_channels.get(self.name, []):
+            _broadcast_channels[self.name].remove(self)
+
+
+def open_broadcast_channel(name):
+    """
+    Stands in for creating a BroadcastChannel
+
+    :param name: The name of the channel
+    :return: The channel
+    """
+    return BroadcastChannel(name)
+
+
+# The callbacks set with set_interval that haven't been cleared, keyed by handle
+_intervals = {}
+_next_interval = 1
+
+
+def set_interval(cb, delay):
+    """
+    Stands in for setInterval, the callback is called each time run_intervals is called rather than after a delay
+
+    :param cb: The callback
+    :param delay: The delay in milliseconds, ignored
+    :return: The handle to pass to clear_interval
+    """
+    global _next_interval
+    handle = _next_interval
+    _next_interval += 1
+    _intervals[handle] = cb
+    return handle
+
+
+def clear_interval(handle):
+    """
+    Stands in for clearInterval
+
+    :param handle: The handle returned by set_interval
+    :return: Nothing
+    """
+    _intervals.pop(handle, None)
+
+
+def run_intervals():
+    """
+    Calls every interval callback once, as if one interval had passed, then runs anything they queued
+
+    :return: Nothing
+    """
+    for handle, cb in list(_intervals.items()):
+        # Skip intervals cleared by an earlier callback
+        if handle in _intervals:
+            cb()
+    run_pending()
+
+
+def call_like_javascript(fn, *args):
+    """
+    Calls a function with the arguments in the way javascript would, dropping any arguments that the function does
+    not declare instead of raising (eg, an event handler lambda that takes no arguments)
+
+    :param fn: The function to call
+    :param args: The arguments to call it with
+    :return: The result of the function
+    """
+    try:
+        parameters = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        # The signature can't be inspected (eg, some builtins), so pass every argument
+        return fn(*args)
+
+    # Functions that accept any number of arguments receive all of them
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        return fn(*args)
+
+    # Otherwise pass as many as the function declares
+    count = len([
+        parameter for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+    ])
+    return fn(*args[:count])
@@ -0,0 +1,164 @@
+# A pure python reference implementation of the parts of the react library used by lib.react, for running under CPython
+from lib.react.reference.host import JsObject, own_items
+
+
+class Element:
+    """
+    A react element, an immutable description of a component or dom node and its props
+    """
+    __slots__ = ('type', 'key', 'ref', 'props')
+
+    def __init__(self, _type, key, ref, props):
+        """
+        :param _type: A tag name string, a Component class, a function, or a context Provider/Consumer
+        :param key: The key that identifies the element amongst its siblings, or None
+        :param ref: The ref of the element, or None
+        :param props: The props of the element (JsObject)
+        """
+        self.type = _type
+        self.key = key
+        self.ref = ref
+        self.props = props
+
+    def __repr__(self):
+        name = self.type if isinstance(self.type, str) else getattr(self.type, '__name__', repr(self.type))
+        return '<' + name + (' key=' + self.key if self.key is not None else '') + '>'
+
+
+def createElement(_type, config=None, *children):
+    """
+    Creates a new element of the given type, the key and ref are taken from the config and everything else becomes a
+    prop. A single child is passed as props.children directly, multiple children as a list.
+    """
+    props = JsObject()
+    key = None
+    ref = None
+
+    # Copy the config in to the props, except for the key and ref
+    for name, value in own_items(config):
+        if name == 'key':
+            key = None if value is None else str(value)
+        elif name == 'ref':
+            ref = value
+        else:
+            props[name] = value
+
+    # Add the children
+    if len(children) == 1:
+        props.children = children[0]
+    elif len(children) > 1:
+        props.children = list(children)
+
+    return Element(_type, key, ref, props)
+
+
+def cloneElement(element, config=None, *children):
+    """
+    Creates a new element using an element as the starting point, the props from the config are merged in shallowly
+    and new children replace the existing children
+    """
+    props = JsObject.of(element.props)
+    key = element.key
+    ref = element.ref
+
+    # Merge the config in to the props
+    for name, value in own_items(config):
+        if name == 'key':
+            key = None if value is None else str(value)
+        elif name == 'ref':
+            ref = value
+        else:
+            props[name] = value
+
+    # Replace the children if any were provided
+    if len(children) == 1:
+        props.children = children[0]
+    elif len(children) > 1:
+        props.children = list(children)
+
+    return Element(element.type, key, ref, props)
+
+
+def isValidElement(o):
+    """
+    :return: True if the object is a react element
+    """
+    return isinstance(o, Element)
+
+
+class Component:
+    """
+    The base class for class components. The renderer sets the updater when the component is mounted, until then state
+    updates are ignored.
+    """
+
+    # The context (from createContext) that the component reads in to this.context
+    contextType = None
+
+    def __init__(self, props=None, context=None):
+        self.props = props
+        self.context = context
+        self.state = None
+        self.updater = None
+
+    def setState(self, partial_state, callback=None):
+        """
+        Enqueues a change to the state, either an object to merge in to the state or a function of (state, props) that
+        returns one
+        """
+        if self.updater:
+            self.updater.enqueue_set_state(self, partial_state, callback)
+
+    def forceUpdate(self, callback=None):
+        """
+        Enqueues a re-render that skips shouldComponentUpdate
+        """
+        if self.updater:
+            self.updater.enqueue_force_update(self, callback)
+
+
+class Provider:
+    """
+    The element type of a context Provider
+    """
+    def __init__(self, context):
+        self._context = context
+
+
+class Consumer:
+    """
+    The element type of a context Consumer, its child is a function of the context value that returns what to render
+    """
+    def __init__(self, context):
+        self._context = context
+
+
+class Context:
+    """
+    A context created by createContext
+    """
+    def __init__(self, default_value):
+        self._defaultValue = default_value
+        self.Provider = Provider(self)
+        self.Consumer = Consumer(self)
+
+
+def createContext(default_value=None):
+    """
+    Creates a context, consumers without a matching Provider above them receive the default value
+    """
+    return Context(default_value)
+
+
+# The renderer that is rendering a function component, set by the renderer so that hooks can find the component
+current_dispatcher = None
+
+
+def useContext(context):
+    """
+    Returns the current value of the context, can only be called while a function component is rendering
+    """
+    if not current_dispatcher:
+        raise Exception("Hooks can only be called inside the body of a function component")
+
+    return current_dispatcher.read_context(context)
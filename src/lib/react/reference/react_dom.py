@@ -0,0 +1,731 @@
+# A pure python reference implementation of react-dom for running under CPython. Rather than a browser dom, elements are
+# rendered in to a tree of nodes that can be inspected, sent events and serialised to html.
+import html
+
+from lib.react.reference import react
+from lib.react.reference.host import JsObject, call_like_javascript, console, own_items
+
+# The kinds of node in the rendered tree
+_text = 'text'
+_host = 'host'
+_class = 'class'
+_function = 'function'
+_provider = 'provider'
+_consumer = 'consumer'
+
+# Tags that have no closing tag in html
+_void_tags = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'meta', 'param', 'source', 'track',
+    'wbr'
+}
+
+# Props that are named differently as html attributes
+_attribute_names = {'className': 'class', 'htmlFor': 'for'}
+
+
+def _kind_of(element):
+    """
+    Returns the kind of node that renders the element
+    """
+    if isinstance(element, react.Element):
+        _type = element.type
+        if isinstance(_type, str):
+            return _host
+        if isinstance(_type, react.Provider):
+            return _provider
+        if isinstance(_type, react.Consumer):
+            return _consumer
+        if isinstance(_type, type) and issubclass(_type, react.Component):
+            return _class
+        if callable(_type):
+            return _function
+        raise Exception("Element type is invalid: " + repr(_type))
+
+    # Strings and numbers render as text
+    if isinstance(element, (str, int, float)) and not isinstance(element, bool):
+        return _text
+
+    raise Exception("Objects are not valid as a React child (found: " + repr(element) + ")")
+
+
+def _text_of(value):
+    """
+    Returns the text that a string or number renders as, formatting numbers in the way javascript does
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _flatten(children, prefix='', result=None):
+    """
+    Flattens rendered children (an element, string, number, None/boolean or nested lists of them) in to a list of
+    (key, child) tuples, with keys built from explicit keys or positions in the same way react builds them
+    """
+    if result is None:
+        result = []
+
+    # A single child is treated as the only item of a list
+    if not isinstance(children, (list, tuple)):
+        children = [children]
+
+    for index, child in enumerate(children):
+        if isinstance(child, (list, tuple)):
+            # Nested lists are flattened, with their position as part of the key
+            _flatten(child, prefix + '.' + str(index) + ':', result)
+        elif child is None or isinstance(child, bool):
+            # Empty children render nothing, but still take up a position
+            continue
+        elif isinstance(child, react.Element) and child.key is not None:
+            result.append((prefix + '$' + child.key, child))
+        else:
+            result.append((prefix + '.' + str(index), child))
+
+    return result
+
+
+class _Effects:
+    """
+    The work collected while rendering that is performed when the result is committed, in the order that react
+    performs it
+    """
+    def __init__(self):
+        # getSnapshotBeforeUpdate calls, run before anything is changed
+        self.snapshots = []
+        # Nodes that were removed, unmounted (parents first) before any new nodes are mounted
+        self.deletions = []
+        # componentDidMount/componentDidUpdate calls and setState callbacks (children first)
+        self.layout = []
+        # If a context provider changed its value while rendering
+        self.context_changed = False
+
+
+class Node:
+    """
+    A node in the rendered tree. Host nodes (dom elements) and text nodes can be inspected, sent events and serialised
+    """
+    def __init__(self, kind, element, parent, key):
+        self.kind = kind
+        self.element = element
+        self.parent = parent
+        self.key = key
+        self.depth = parent.depth + 1 if parent else 0
+
+        # The child nodes that this node rendered
+        self.children = []
+
+        # The component instance of a class node, or the text of a text node
+        self.instance = None
+        self.text = None
+
+        # The values of the contexts read by a function or consumer node, keyed by context
+        self.read_contexts = {}
+
+        # Updates waiting for the next render of a class node
+        self.pending_states = []
+        self.pending_callbacks = []
+        self.force = False
+
+        # False once the node has been unmounted
+        self.mounted = True
+
+    @property
+    def tag(self):
+        """
+        Returns the tag name of a host node
+        """
+        return self.element.type if self.kind == _host else None
+
+    @property
+    def props(self):
+        """
+        Returns the props of the node
+        """
+        return self.element.props if self.kind != _text else None
+
+    def host_children(self):
+        """
+        Returns the host and text nodes directly beneath this node, looking through any component nodes
+        """
+        result = []
+        for child in self.children:
+            if child.kind in (_host, _text):
+                result.append(child)
+            else:
+                result.extend(child.host_children())
+        return result
+
+    def find_all(self, tag=None):
+        """
+        Returns every host node beneath this node with the tag, or every host node if no tag is provided, in document
+        order
+        """
+        result = []
+        for child in self.host_children():
+            if child.kind == _host:
+                if tag is None or child.tag == tag:
+                    result.append(child)
+                result.extend(child.find_all(tag))
+        return result
+
+    @property
+    def text_content(self):
+        """
+        Returns the text beneath this node, like the dom textContent property
+        """
+        if self.kind == _text:
+            return self.text
+        return ''.join(child.text_content for child in self.host_children())
+
+    def dispatch(self, name, event=None):
+        """
+        Triggers an event handler prop (eg, 'onClick') on a host node, batching any state updates that it causes in the
+        way that react batches updates in event handlers
+
+        :param name: The name of the event handler prop
+        :param event: The event to pass to the handler, a simple event object is created if none is provided
+        :return: Nothing
+        """
+        handler = self.props[name]
+        if not handler:
+            return
+
+        if event is None:
+            event = JsObject({'type': name, 'target': self, 'preventDefault': lambda: None})
+
+        renderer.batched_updates(lambda: call_like_javascript(handler, event))
+
+    def to_html(self):
+        """
+        Serialises this node and everything beneath it to html
+        """
+        return _html_of(self, False)
+
+
+def _html_of(node, root):
+    """
+    Serialises a host or text node to html, in the same way ReactDOMServer.renderToString does
+    """
+    if node.kind == _text:
+        return html.escape(node.text)
+
+    # Build the attributes
+    attributes = ''
+    for name, value in own_items(node.props):
+        # Skip anything that isn't rendered as an attribute
+        if name in ('children', 'dangerouslySetInnerHTML') or value is None or value is False or callable(value):
+            continue
+
+        # Convert style objects to css
+        if name == 'style':
+            value = ';'.join(
+                ''.join('-' + c.lower() if c.isupper() else c for c in style_name) + ':' + _text_of(style_value)
+                for style_name, style_value in own_items(value)
+            )
+
+        name = _attribute_names.get(name, name)
+        attributes += ' ' + name + '="' + ('' if value is True else html.escape(_text_of(value))) + '"'
+
+    # The root element is marked so that the client can hydrate it
+    if root:
+        attributes += ' data-reactroot=""'
+
+    if node.tag in _void_tags:
+        return '<' + node.tag + attributes + '/>'
+
+    # Use the raw inner html if it was provided, otherwise serialise the children
+    inner_html = node.props.dangerouslySetInnerHTML
+    inner = inner_html['__html'] if inner_html else _html_of_nodes(node.host_children(), False)
+
+    return '<' + node.tag + attributes + '>' + inner + '</' + node.tag + '>'
+
+
+def _html_of_nodes(nodes, root):
+    """
+    Serialises a list of host and text nodes to html, separating adjacent text nodes so they hydrate separately
+    """
+    result = ''
+    previous = None
+    for node in nodes:
+        if previous is not None and previous.kind == _text and node.kind == _text:
+            result += '<!-- -->'
+        result += _html_of(node, root)
+        previous = node
+    return result
+
+
+class HostContainer:
+    """
+    Stands in for the dom element that the application is rendered in to, such as document.getElementById('container')
+    """
+    def __init__(self, _id=None):
+        """
+        :param _id: The id of the element
+        """
+        self.id = _id
+
+        # The root node rendered in to this container
+        self.root = None
+
+    def host_children(self):
+        """
+        Returns the top level host and text nodes rendered in to the container
+        """
+        if not self.root:
+            return []
+        if self.root.kind in (_host, _text):
+            return [self.root]
+        return self.root.host_children()
+
+    def find_all(self, tag=None):
+        """
+        Returns every host node rendered in to the container with the tag, or every host node if no tag is provided
+        """
+        result = []
+        for child in self.host_children():
+            if child.kind == _host:
+                if tag is None or child.tag == tag:
+                    result.append(child)
+                result.extend(child.find_all(tag))
+        return result
+
+    @property
+    def text_content(self):
+        """
+        Returns the text rendered in to the container
+        """
+        return ''.join(child.text_content for child in self.host_children())
+
+    def to_html(self):
+        """
+        Serialises the content of the container to html, marking the root for hydration
+        """
+        return _html_of_nodes(self.host_children(), True)
+
+
+class _Renderer:
+    """
+    Renders elements in to nodes, and updates them when the state of components change. Updates are synchronous, as
+    they are in react 16 outside of batched event handlers, and the lifecycle methods are called in react's order.
+    """
+    def __init__(self):
+        # Class nodes that have updates waiting
+        self._dirty = []
+
+        # How deeply nested in batched_updates we are
+        self._batch_depth = 0
+
+        # If a render or commit is in progress, updates requested during it are deferred until it completes
+        self._rendering = False
+
+        # The function or consumer node being rendered, for reading contexts with hooks
+        self._current_node = None
+
+    def enqueue_set_state(self, instance, partial_state, callback):
+        """
+        Called by Component.setState
+        """
+        self._enqueue(instance._reactInternalFiber, partial_state, callback, False)
+
+    def enqueue_force_update(self, instance, callback):
+        """
+        Called by Component.forceUpdate
+        """
+        self._enqueue(instance._reactInternalFiber, None, callback, True)
+
+    def _enqueue(self, node, partial_state, callback, force):
+        """
+        Queues an update for a class node, and runs it now unless updates are being batched
+        """
+        if not node.mounted:
+            console.error("Can't perform a React state update on an unmounted component")
+            return
+
+        # Record the update
+        if partial_state is not None:
+            node.pending_states.append(partial_state)
+        if callback:
+            node.pending_callbacks.append(callback)
+        if force:
+            node.force = True
+        if node not in self._dirty:
+            self._dirty.append(node)
+
+        # Run the update now unless it is being batched
+        if not self._batch_depth and not self._rendering:
+            self.flush()
+
+    def batched_updates(self, fn):
+        """
+        Calls the function, running any updates that it requests together once it returns
+
+        :param fn: The function to call
+        :return: The result of the function
+        """
+        self._batch_depth += 1
+        try:
+            return fn()
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and not self._rendering:
+                self.flush()
+
+    def flush(self):
+        """
+        Runs every waiting update, parents first, committing each round of updates before running any updates that
+        were requested by lifecycle methods
+
+        :return: Nothing
+        """
+        while self._dirty:
+            effects = _Effects()
+            self._rendering = True
+            try:
+                while self._dirty:
+                    # Render parents before their children, a child may be updated by its parent's render
+                    self._dirty.sort(key=lambda n: n.depth)
+                    node = self._dirty.pop(0)
+                    if node.mounted and (node.pending_states or node.force):
+                        self._update(node, node.element, effects)
+
+                self._commit(effects)
+            finally:
+                self._rendering = False
+
+    def render(self, element, container):
+        """
+        Renders an element in to a container, updating what was previously rendered there where possible
+
+        :return: The component instance if the element is a class component, otherwise None
+        """
+        effects = _Effects()
+        self._rendering = True
+        try:
+            root = container.root
+
+            # Check if the root can be updated rather than replaced
+            if root is not None and element is not None and self._same_type(root, element):
+                self._update(root, element, effects)
+            else:
+                if root is not None:
+                    effects.deletions.append(root)
+                container.root = self._mount(element, None, '.0', effects) if element is not None else None
+
+            self._commit(effects)
+        finally:
+            self._rendering = False
+
+        # Run any updates requested by the lifecycle methods
+        self.flush()
+
+        return container.root.instance if container.root is not None else None
+
+    def read_context(self, context):
+        """
+        Reads a context for the function or consumer node being rendered (used by useContext)
+        """
+        node = self._current_node
+        value = self._read_context(node.parent, context)
+        node.read_contexts[context] = value
+        return value
+
+    @staticmethod
+    def _read_context(node, context):
+        """
+        Returns the value of the closest Provider of the context at or above the node, or the default value
+        """
+        while node is not None:
+            if node.kind == _provider and node.element.type._context is context:
+                return node.element.props.value
+            node = node.parent
+        return context._defaultValue
+
+    def _context_changed(self, node):
+        """
+        Returns True if any context read by a function or consumer node has changed value
+        """
+        for context, value in node.read_contexts.items():
+            if self._read_context(node.parent, context) is not value:
+                return True
+        return False
+
+    @staticmethod
+    def _same_type(node, element):
+        """
+        Returns True if the node can be updated with the element rather than being replaced
+        """
+        if node.kind == _text:
+            return _kind_of(element) == _text
+        return isinstance(element, react.Element) and node.element.type is element.type
+
+    def _mount(self, element, parent, key, effects):
+        """
+        Creates the node for an element and renders it
+        """
+        node = Node(_kind_of(element), element, parent, key)
+
+        if node.kind == _text:
+            node.text = _text_of(element)
+        elif node.kind in (_host, _provider):
+            self._reconcile_children(node, element.props.children, effects)
+        elif node.kind == _class:
+            self._mount_class(node, effects)
+        else:
+            self._render_function(node, effects)
+
+        return node
+
+    def _mount_class(self, node, effects):
+        """
+        Constructs and renders the component of a class node
+        """
+        cls = node.element.type
+        props = node.element.props
+
+        # Read the context, if the component reads one
+        context = self._read_context(node.parent, cls.contextType) if cls.contextType else None
+
+        # Construct the component
+        instance = cls(props, context)
+        instance.props = props
+        instance.context = context
+        instance.updater = self
+        instance._reactInternalFiber = node
+        node.instance = instance
+
+        # Render the component
+        self._reconcile_children(node, instance.render(), effects)
+
+        # Call componentDidMount once the component and its children are committed
+        if hasattr(instance, 'componentDidMount'):
+            effects.layout.append(instance.componentDidMount)
+
+    def _render_function(self, node, effects):
+        """
+        Renders a function or consumer node
+        """
+        previous_node = self._current_node
+        previous_dispatcher = react.current_dispatcher
+
+        self._current_node = node
+        react.current_dispatcher = self
+        node.read_contexts = {}
+        try:
+            if node.kind == _consumer:
+                # Consumers render their child function with the context value
+                rendered = call_like_javascript(
+                    node.element.props.children, self.read_context(node.element.type._context)
+                )
+            else:
+                rendered = node.element.type(node.element.props)
+        finally:
+            self._current_node = previous_node
+            react.current_dispatcher = previous_dispatcher
+
+        self._reconcile_children(node, rendered, effects)
+
+    def _update(self, node, element, effects):
+        """
+        Updates a node with a new element (which may be the same element when only the state changed)
+        """
+        if node.kind == _text:
+            node.element = element
+            node.text = _text_of(element)
+            return
+
+        if node.kind == _class:
+            self._update_class(node, element, effects)
+            return
+
+        # Nothing needs to be rendered if the element is the same and no context it read has changed
+        if element is node.element and not (node.kind in (_function, _consumer) and self._context_changed(node)):
+            self._propagate_context(node, effects)
+            return
+
+        # Check if a provider is changing its value
+        if node.kind == _provider and element.props.value is not node.element.props.value:
+            effects.context_changed = True
+
+        node.element = element
+
+        if node.kind in (_host, _provider):
+            self._reconcile_children(node, element.props.children, effects)
+        else:
+            self._render_function(node, effects)
+
+    def _update_class(self, node, element, effects):
+        """
+        Updates a class node, applying any waiting state updates
+        """
+        instance = node.instance
+        previous_props = instance.props
+        previous_state = instance.state
+        next_props = element.props
+
+        # Apply the waiting state updates, each one is merged in to a new state object
+        next_state = previous_state
+        for partial_state in node.pending_states:
+            if callable(partial_state):
+                partial_state = partial_state(next_state, next_props)
+            if partial_state is not None:
+                merged = JsObject.of(next_state)
+                for name, value in own_items(partial_state):
+                    merged[name] = value
+                next_state = merged
+        node.pending_states = []
+
+        callbacks = node.pending_callbacks
+        node.pending_callbacks = []
+        force = node.force
+        node.force = False
+
+        # Read the context, if the component reads one
+        context_type = type(instance).contextType
+        next_context = self._read_context(node.parent, context_type) if context_type else None
+        if next_context is not instance.context:
+            # Components are always re-rendered when their context changes
+            force = True
+
+        # Nothing needs to be rendered if nothing has changed
+        if element is node.element and next_state is previous_state and not force:
+            self._propagate_context(node, effects)
+            return
+
+        node.element = element
+
+        # Ask the component if it needs to render
+        should_update = True
+        if not force and hasattr(instance, 'shouldComponentUpdate'):
+            should_update = instance.shouldComponentUpdate(next_props, next_state)
+
+        # The new props, state and context are recorded even if the component doesn't render
+        instance.props = next_props
+        instance.state = next_state
+        instance.context = next_context
+
+        if should_update:
+            # Render the component
+            self._reconcile_children(node, instance.render(), effects)
+
+            # Take the snapshot before anything is committed, and pass it to componentDidUpdate afterwards
+            snapshot = [None]
+            if hasattr(instance, 'getSnapshotBeforeUpdate'):
+                effects.snapshots.append(
+                    lambda: snapshot.__setitem__(0, instance.getSnapshotBeforeUpdate(previous_props, previous_state))
+                )
+            if hasattr(instance, 'componentDidUpdate'):
+                effects.layout.append(lambda: instance.componentDidUpdate(previous_props, previous_state, snapshot[0]))
+        else:
+            # The children aren't rendered, but any of them that read a changed context still need to be
+            self._propagate_context(node, effects)
+
+        # The setState callbacks are called once the update is committed, even if the component didn't render
+        for callback in callbacks:
+            effects.layout.append(callback)
+
+    def _propagate_context(self, node, effects):
+        """
+        Updates any nodes beneath a node that was not rendered which read a context that has changed value
+        """
+        if not effects.context_changed:
+            return
+
+        for child in node.children:
+            if child.kind == _class and type(child.instance).contextType:
+                self._update(child, child.element, effects)
+            elif child.kind in (_function, _consumer) and self._context_changed(child):
+                self._update(child, child.element, effects)
+            else:
+                self._propagate_context(child, effects)
+
+    def _reconcile_children(self, node, rendered, effects):
+        """
+        Updates the children of a node to match what it rendered, reusing existing children with the same key and type
+        """
+        existing = {}
+        for child in node.children:
+            existing[child.key] = child
+
+        children = []
+        for key, child_element in _flatten(rendered):
+            # Check if there is an existing child that can be updated
+            child = existing.pop(key, None)
+            if child is not None and self._same_type(child, child_element):
+                self._update(child, child_element, effects)
+            else:
+                # No, replace it with a new child
+                if child is not None:
+                    effects.deletions.append(child)
+                child = self._mount(child_element, node, key, effects)
+            children.append(child)
+
+        # Any children that weren't reused are removed
+        effects.deletions.extend(existing.values())
+
+        node.children = children
+
+    def _commit(self, effects):
+        """
+        Performs the work collected while rendering
+        """
+        for snapshot in effects.snapshots:
+            snapshot()
+        for node in effects.deletions:
+            self._unmount(node)
+        for layout in effects.layout:
+            layout()
+
+    def _unmount(self, node):
+        """
+        Unmounts a node and everything beneath it, calling componentWillUnmount on parents before their children
+        """
+        node.mounted = False
+        if node in self._dirty:
+            self._dirty.remove(node)
+
+        if node.kind == _class and hasattr(node.instance, 'componentWillUnmount'):
+            node.instance.componentWillUnmount()
+
+        for child in node.children:
+            self._unmount(child)
+
+
+# The renderer shared by every container
+renderer = _Renderer()
+
+
+def render(element, container):
+    """
+    Renders a react element in to the container, or updates what was previously rendered there
+
+    :param element: The element to render
+    :param container: The container to render in to (HostContainer)
+    :return: The component instance if the element is a class component, otherwise None
+    """
+    return renderer.render(element, container)
+
+
+def hydrate(element, container):
+    """
+    Same as render, the reference implementation has no server rendered markup to attach to
+    """
+    return renderer.render(element, container)
+
+
+def unmountComponentAtNode(container):
+    """
+    Removes a mounted react component from the container
+
+    :return: True if a component was unmounted, False if there was nothing to unmount
+    """
+    if container.root is None:
+        return False
+    renderer.render(None, container)
+    return True
+
+
+def unstable_batchedUpdates(fn):
+    """
+    Calls the function, running any updates that it requests together once it returns
+    """
+    return renderer.batched_updates(fn)
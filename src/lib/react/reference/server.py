@@ -0,0 +1,99 @@
+# A local http server that stands in for the application's server under CPython. It serves json responses set by the
+# caller and counts the requests made for each path, so that request deduplication and caching can be checked against
+# real http requests (see lib.flux.loader and lib.react.reference.host.fetch_json).
+import http.server
+import json
+import threading
+
+
+class StandInServer:
+    """
+    Serves json responses on localhost from a background thread, counting the requests for each path
+
+    eg:
+
+        with StandInServer({'/users/1': {'name': 'Ada'}}) as server:
+            loader.load(server.url('/users/1'))
+            run_pending()
+            assert server.requests['/users/1'] == 1
+    """
+    def __init__(self, responses=None):
+        """
+        Starts the server on a free port
+
+        :param responses: An optional dict of paths to the data to respond with
+        """
+        # The responses keyed by path, as (status, data) tuples
+        self._responses = {}
+        for path, data in (responses or {}).items():
+            self.respond(path, data)
+
+        # The number of requests made for each path
+        self.requests = {}
+
+        # Guards the responses and counts, which are used from the server thread
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = server._handle(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep the requests out of the output
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, path):
+        """
+        :param path: The path of a resource, starting with /
+        :return: The url of the resource on this server
+        """
+        return 'http://127.0.0.1:{}{}'.format(self._server.server_address[1], path)
+
+    def respond(self, path, data, status=200):
+        """
+        Sets the response for a path
+
+        :param path: The path, starting with /
+        :param data: The data to respond with as json
+        :param status: The http status to respond with
+        :return: Nothing
+        """
+        self._responses[path] = (status, json.dumps(data).encode('utf-8'))
+
+    def _handle(self, path):
+        """
+        Counts a request and returns the response for it
+
+        :param path: The path requested
+        :return: The status and body of the response, 404 if no response was set for the path
+        """
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            return self._responses.get(path, (404, b'null'))
+
+    def close(self):
+        """
+        Stops the server
+
+        :return: Nothing
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
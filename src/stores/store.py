@@ -56,3 +56,20 @@ class MyStore(Store):
             self.count += 1
         else:
             self.count -= 1
+
+    def snapshot(self):
+        """
+        Returns a copy of the state of this store
+
+        :return: The snapshot
+        """
+        return self.count
+
+    def restore(self, snapshot):
+        """
+        Restores the state of this store from a snapshot
+
+        :param snapshot: The snapshot to restore
+        :return: Nothing
+        """
+        self.count = snapshot
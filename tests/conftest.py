@@ -0,0 +1,6 @@
+# The tests run the framework, stores and components under CPython with the reference implementation of react (see
+# lib.react.reference), importing them from src as the application does
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,111 @@
+import pytest
+
+from actions.actions import ButtonClickedAction, StoreInitialisedAction
+from components.app import App
+from lib.flux.dispatcher import AppDispatcher
+from lib.react.components.component import Component
+from lib.react.components.store_provider import StoreProvider
+from lib.react.react import React
+from lib.react.reference import react_dom
+from lib.react.reference.host import run_pending
+from lib.react.reference.react_dom import HostContainer
+from stores.store import MyStore
+
+
+def _mount(store, dispatcher):
+    container = HostContainer()
+    React.render(StoreProvider(store, dispatcher, App()), container)
+    run_pending()
+    return container
+
+
+def _count(container):
+    return container.find_all('p')[0].text_content
+
+
+def test_unmounting_one_instance_keeps_the_others_subscribed():
+    dispatcher = AppDispatcher()
+    store = MyStore(dispatcher)
+    first = _mount(store, dispatcher)
+    second = _mount(store, dispatcher)
+    dispatcher.handle_view_action(StoreInitialisedAction(store))
+    run_pending()
+    assert store.receiver_count == 2
+
+    react_dom.unmountComponentAtNode(first)
+    assert store.receiver_count == 1
+
+    # The surviving instance still follows the store, and its buttons still dispatch
+    second.find_all('button')[1].dispatch('onClick')
+    run_pending()
+    assert store.count == 101
+    assert _count(second) == '101'
+
+    react_dom.unmountComponentAtNode(second)
+    assert store.receiver_count == 0
+
+
+def test_store_changes_update_the_instance_that_subscribed():
+    dispatcher = AppDispatcher()
+    first_store = MyStore(dispatcher)
+    second_store = MyStore(AppDispatcher())
+    first = _mount(first_store, dispatcher)
+    second = _mount(second_store, second_store._dispatcher)
+
+    dispatcher.handle_view_action(ButtonClickedAction(True))
+    run_pending()
+
+    assert _count(first) == '101'
+    assert _count(second) == '100'
+
+
+class _Bound(Component):
+    """
+    Binds an action for each of the values in its props as it renders, recording the callbacks
+    """
+    rendered = []
+
+    def render(self):
+        _Bound.rendered.append([
+            self.bound_action(self.props.dispatch, ButtonClickedAction, value) for value in self.props.arguments
+        ])
+        return None
+
+
+def _render_bound(container, values, dispatch=print):
+    _Bound.rendered = []
+    React.render(_Bound({'arguments': values, 'dispatch': dispatch}).component, container)
+    run_pending()
+    return _Bound.rendered[0]
+
+
+def test_bound_action_reuses_callbacks_for_equal_arguments():
+    container = HostContainer()
+    dispatched = []
+    callback = _render_bound(container, [True], dispatched.append)[0]
+
+    assert _render_bound(container, [True], dispatched.append)[0] is callback
+    callback(None)
+    assert dispatched[0].increase is True
+
+
+def test_bound_action_keeps_arguments_with_the_same_str_apart():
+    callbacks = _render_bound(HostContainer(), [1, '1', True, 'True', None, 'None'])
+
+    assert len(set(map(id, callbacks))) == len(callbacks)
+
+
+def test_bound_action_caches_per_instance():
+    first = HostContainer()
+    callback = _render_bound(first, [True])[0]
+    second = HostContainer()
+    assert _render_bound(second, [True])[0] is not callback
+
+    # Unmounting another instance leaves the callbacks of the first in place
+    react_dom.unmountComponentAtNode(second)
+    assert _render_bound(first, [True])[0] is callback
+
+
+def test_bound_action_rejects_arguments_that_are_not_primitive():
+    with pytest.raises(Exception, match='bound_action arguments'):
+        _render_bound(HostContainer(), [[1]])
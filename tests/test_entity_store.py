@@ -0,0 +1,90 @@
+from lib.flux.dispatcher import AppDispatcher
+from lib.flux.entity_store import EntityStore
+
+
+class _Todo:
+    def __init__(self, id, owner_id):
+        self.id = id
+        self.owner_id = owner_id
+
+
+class _TodoStore(EntityStore):
+    def __init__(self):
+        super().__init__(AppDispatcher(), {'by_owner': lambda todo: todo.owner_id})
+
+    def handle_message(self, message):
+        pass
+
+
+def _ids(records):
+    return sorted(record.id for record in records)
+
+
+def test_upsert_replaces_records_and_moves_them_between_buckets():
+    store = _TodoStore()
+    store.upsert([_Todo(1, 'ada'), _Todo(2, 'ada'), _Todo(3, 'bob')])
+    store.upsert([_Todo(2, 'bob')])
+
+    assert store.count == 3
+    assert store.get(2).owner_id == 'bob'
+    assert _ids(store.find('by_owner', 'ada')) == [1]
+    assert _ids(store.find('by_owner', 'bob')) == [2, 3]
+    assert store.count_of('by_owner', 'bob') == 2
+
+
+def test_remove_empties_buckets():
+    store = _TodoStore()
+    store.upsert([_Todo(1, 'ada'), _Todo(2, 'bob')])
+    store.remove([1])
+
+    assert not store.has(1)
+    assert store.find('by_owner', 'ada') == []
+    assert store.count_of('by_owner', 'ada') == 0
+
+
+def test_find_returns_the_same_list_until_the_bucket_changes():
+    store = _TodoStore()
+    store.upsert([_Todo(1, 'ada'), _Todo(2, 'bob')])
+    found = store.find('by_owner', 'ada')
+
+    # Changing another bucket leaves the list alone
+    store.upsert([_Todo(2, 'carol')])
+    assert store.find('by_owner', 'ada') is found
+
+    store.upsert([_Todo(3, 'ada')])
+    assert store.find('by_owner', 'ada') is not found
+
+
+def test_find_returns_the_same_empty_list_for_missing_keys():
+    store = _TodoStore()
+
+    assert store.find('by_owner', 'nobody') is store.find('by_owner', 'nobody')
+    assert store.find('by_owner', 'nobody') is store.find('by_owner', 'somebody')
+
+
+def test_changes_are_applied_to_another_store():
+    leader = _TodoStore()
+    follower = _TodoStore()
+    leader.upsert([_Todo(1, 'ada'), _Todo(2, 'bob')])
+    leader.track_changes(True)
+    follower.restore(leader.snapshot())
+    assert leader.changes() == {'reset': False, 'upsert': [], 'remove': []}
+
+    leader.upsert([_Todo(3, 'ada')])
+    leader.remove([1])
+    changes = leader.changes()
+    assert not changes['reset'] and _ids(changes['upsert']) == [3] and changes['remove'] == [1]
+
+    follower.apply_changes(changes)
+    assert _ids(follower.find('by_owner', 'ada')) == [3]
+
+
+def test_restore_rebuilds_the_indexes():
+    store = _TodoStore()
+    store.upsert([_Todo(1, 'ada'), _Todo(2, 'bob')])
+    snapshot = store.snapshot()
+    store.upsert([_Todo(1, 'bob')])
+
+    store.restore(snapshot)
+    assert _ids(store.find('by_owner', 'ada')) == [1]
+    assert _ids(store.find('by_owner', 'bob')) == [2]
@@ -0,0 +1,84 @@
+import pytest
+
+from actions.actions import ButtonClickedAction
+from lib.flux.dispatcher import AppDispatcher
+from lib.flux.journal import ActionJournal
+from lib.react.reference.host import run_pending
+from stores.store import MyStore
+
+
+def _journal(snapshot_interval, retention):
+    dispatcher = AppDispatcher()
+    store = MyStore(dispatcher)
+    return dispatcher, store, ActionJournal(dispatcher, [store], snapshot_interval, retention)
+
+
+def _click(dispatcher, times):
+    for i in range(times):
+        dispatcher.handle_view_action(ButtonClickedAction(True))
+    run_pending()
+
+
+def test_seek_moves_the_stores_through_the_history():
+    dispatcher, store, journal = _journal(2, 4)
+    _click(dispatcher, 3)
+
+    journal.seek(1)
+    assert store.count == 101
+    journal.redo()
+    assert store.count == 102
+    journal.seek(3)
+    assert store.count == 103
+
+
+def test_start_follows_the_furthest_action_recorded_after_truncating():
+    dispatcher, store, journal = _journal(2, 4)
+    _click(dispatcher, 7)
+    journal.seek(4)
+    _click(dispatcher, 1)
+
+    # Position 5 is the end, and the ring no longer holds the actions before 3, so 4 is the earliest snapshot
+    assert journal.start == 4
+    with pytest.raises(Exception, match='outside of the retained history'):
+        journal.seek(2)
+
+    while journal.can_undo():
+        journal.undo()
+    assert journal.position == 4
+    assert store.count == 104
+
+
+def test_seek_on_an_empty_journal():
+    dispatcher, store, journal = _journal(2, 4)
+
+    journal.seek(0)
+    assert store.count == 100
+    with pytest.raises(Exception, match='outside of the retained history'):
+        journal.seek(1)
+
+
+def test_only_the_source_and_action_are_retained():
+    dispatcher, store, journal = _journal(2, 4)
+    action = ButtonClickedAction(True)
+    dispatcher.handle_view_action(action)
+    run_pending()
+
+    assert journal._actions[0][1] is action
+    assert len(journal._actions[0]) == 2
+
+
+def test_a_replaced_store_is_restored_by_later_seeks():
+    dispatcher, store, journal = _journal(2, 10)
+    _click(dispatcher, 3)
+
+    # The store module is hot replaced
+    replacement = MyStore(dispatcher)
+    replacement.adopt(store)
+    journal.replace_store(store, replacement)
+    _click(dispatcher, 1)
+
+    journal.seek(1)
+    assert replacement.count == 101
+    journal.seek(journal.end)
+    assert replacement.count == 104
+    assert store.count == 103
@@ -0,0 +1,118 @@
+import pytest
+
+from lib.flux import loader
+from lib.flux.dispatcher import AppDispatcher
+from lib.flux.loader import ResourceFailedAction, ResourceLoadedAction, ResourceLoader
+from lib.react.reference.host import run_pending
+from lib.react.reference.server import StandInServer
+
+
+class _Clock:
+    """
+    Stands in for the loader's clock, so that responses can be aged without waiting
+    """
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(loader, '_now', clock)
+    return clock
+
+
+@pytest.fixture
+def server():
+    with StandInServer({'/a': 'a', '/b': 'b', '/c': 'c'}) as server:
+        yield server
+
+        # Make any requests still queued, which would otherwise run in later tests
+        run_pending()
+
+
+def _loader(max_entries=10):
+    """
+    Creates a loader, recording the actions it dispatches
+
+    :return: The loader, and the list of the actions it dispatched
+    """
+    dispatcher = AppDispatcher()
+    actions = []
+    dispatcher.register(lambda message: actions.append(message.action))
+    return ResourceLoader(dispatcher, ttl=1000, stale_ttl=5000, max_entries=max_entries), actions
+
+
+def test_loads_of_the_same_url_make_one_request(clock, server):
+    resources, actions = _loader()
+
+    assert [resources.load(server.url('/a')) for i in range(10)] == [None] * 10
+    assert resources.is_loading(server.url('/a'))
+    run_pending()
+
+    assert server.requests == {'/a': 1}
+    assert len(actions) == 1 and isinstance(actions[0], ResourceLoadedAction) and actions[0].data == 'a'
+
+    # A fresh response is returned without a request or an action
+    assert resources.load(server.url('/a')) == 'a'
+    run_pending()
+    assert server.requests == {'/a': 1}
+    assert len(actions) == 1
+
+
+def test_a_stale_response_is_returned_while_it_is_revalidated(clock, server):
+    resources, actions = _loader()
+    resources.load(server.url('/a'))
+    run_pending()
+
+    server.respond('/a', 'changed')
+    clock.time = 2000
+    assert resources.load(server.url('/a')) == 'a'
+    assert resources.load(server.url('/a')) == 'a'
+    run_pending()
+
+    assert server.requests == {'/a': 2}
+    assert actions[-1].data == 'changed'
+    assert resources.load(server.url('/a')) == 'changed'
+
+    # An expired response is not returned
+    clock.time = 10000
+    assert resources.load(server.url('/a')) is None
+    run_pending()
+    assert server.requests == {'/a': 3}
+
+
+def test_the_least_recently_used_response_is_evicted(clock, server):
+    resources, actions = _loader(max_entries=2)
+    resources.load(server.url('/a'))
+    resources.load(server.url('/b'))
+    run_pending()
+
+    # Using a makes b the least recently used
+    resources.load(server.url('/a'))
+    resources.load(server.url('/c'))
+    run_pending()
+
+    assert resources.load(server.url('/a')) == 'a'
+    assert resources.load(server.url('/c')) == 'c'
+    assert resources.load(server.url('/b')) is None
+    run_pending()
+    assert server.requests == {'/a': 1, '/b': 2, '/c': 1}
+
+
+def test_a_failed_request_is_dispatched_and_keeps_the_cached_response(clock, server):
+    resources, actions = _loader()
+    resources.load(server.url('/a'))
+    run_pending()
+
+    server.respond('/a', None, 500)
+    clock.time = 2000
+    resources.load(server.url('/a'))
+    run_pending()
+
+    assert isinstance(actions[-1], ResourceFailedAction) and actions[-1].url == server.url('/a')
+    assert not resources.is_loading(server.url('/a'))
+    assert resources.load(server.url('/a')) == 'a'
@@ -0,0 +1,76 @@
+import json
+
+from actions.actions import ButtonClickedAction
+from lib.flux import recorder
+from lib.flux.dispatcher import AppDispatcher, MessageSourceOptions
+from lib.flux.recorder import ActionRecorder, ActionRecording
+from lib.react.reference.host import run_pending
+from stores.store import MyStore
+
+
+def _clock(monkeypatch, times):
+    # Each call to the clock returns the next of the times
+    times = list(times)
+    monkeypatch.setattr(recorder, '_now', lambda: times.pop(0))
+
+
+def test_actions_with_the_same_class_and_fields_share_a_schema(monkeypatch):
+    _clock(monkeypatch, [0, 1, 2, 3])
+    dispatcher = AppDispatcher()
+    recording = ActionRecorder(dispatcher, [ButtonClickedAction])
+
+    dispatcher.handle_view_action(ButtonClickedAction(True))
+    dispatcher.handle_view_action(ButtonClickedAction(False))
+
+    # An action of the same class with other fields gets a schema of its own
+    action = ButtonClickedAction(True)
+    action.repeat = 2
+    dispatcher.handle_view_action(action)
+
+    data = json.loads(recording.to_json())
+    assert data['schemas'] == [
+        ['ButtonClickedAction', ['increase']], ['ButtonClickedAction', ['increase', 'repeat']]
+    ]
+    assert [recorded[2:] for recorded in data['actions']] == [[0, [True]], [0, [False]], [1, [True, 2]]]
+
+
+def test_delays_are_worked_out_from_rounded_times(monkeypatch):
+    # Rounding each delay would record 0 three times, losing the 1.2ms that passed
+    _clock(monkeypatch, [0, 0.4, 0.8, 1.2])
+    dispatcher = AppDispatcher()
+    recording = ActionRecorder(dispatcher, [ButtonClickedAction])
+
+    for i in range(3):
+        dispatcher.handle_view_action(ButtonClickedAction(True))
+
+    assert [recorded[0] for recorded in json.loads(recording.to_json())['actions']] == [0, 1, 0]
+    assert ActionRecording(recording.to_json(), [ButtonClickedAction]).duration == 1
+
+
+def test_actions_are_replayed_from_their_original_source(monkeypatch):
+    _clock(monkeypatch, [0, 5, 10])
+    dispatcher = AppDispatcher()
+    store = MyStore(dispatcher)
+    recording = ActionRecorder(dispatcher, [ButtonClickedAction], [store])
+
+    dispatcher.handle_server_action(ButtonClickedAction(True))
+    dispatcher.handle_view_action(ButtonClickedAction(False))
+    run_pending()
+
+    replay = ActionRecording(recording.to_json(), [ButtonClickedAction])
+    assert replay.snapshots == [100]
+    assert [action[0] for action in replay.actions] == [5, 10]
+
+    # Replay in to a fresh store, recording the source of each message delivered
+    dispatcher = AppDispatcher()
+    store = MyStore(dispatcher)
+    sources = []
+    dispatcher.register(lambda message: sources.append(message.source))
+
+    replay.dispatch(dispatcher, 0)
+    assert store.count == 101
+    replay.dispatch(dispatcher, 1)
+    assert store.count == 100
+    run_pending()
+
+    assert sources == [MessageSourceOptions.server, MessageSourceOptions.view]
@@ -0,0 +1,195 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from lib.react.reference import host, react, react_dom
+from lib.react.reference.react_dom import HostContainer
+from lib.react.reference.server import StandInServer
+
+h = react.createElement
+
+
+class _Counter(react.Component):
+    """
+    Counts its renders and records its lifecycle calls
+    """
+    log = []
+
+    def __init__(self, props, context=None):
+        super().__init__(props, context)
+        self.state = {'count': props.start or 0}
+        self.renders = 0
+
+    def render(self):
+        self.renders += 1
+        return h('p', None, self.props.label, ':', self.state['count'])
+
+    def componentDidMount(self):
+        _Counter.log.append(('mount', self.props.label))
+
+    def componentDidUpdate(self, previous_props, previous_state, snapshot):
+        _Counter.log.append(('update', self.props.label))
+
+    def componentWillUnmount(self):
+        _Counter.log.append(('unmount', self.props.label))
+
+    def increment(self):
+        self.setState(lambda state, props: {'count': state['count'] + 1})
+
+
+@pytest.fixture(autouse=True)
+def _clear_log():
+    _Counter.log = []
+
+
+def _list(labels):
+    return h('div', None, [h(_Counter, {'key': label, 'label': label}) for label in labels])
+
+
+def _instances(container):
+    return [node.instance for node in container.root.children]
+
+
+def test_mount_renders_markup_and_calls_did_mount():
+    container = HostContainer()
+    instance = react_dom.render(h(_Counter, {'label': 'a', 'start': 2}), container)
+
+    assert container.to_html() == '<p data-reactroot="">a<!-- -->:<!-- -->2</p>'
+    assert container.text_content == 'a:2'
+    assert instance.renders == 1
+    assert _Counter.log == [('mount', 'a')]
+
+
+def test_update_reuses_the_instance_with_new_props():
+    container = HostContainer()
+    instance = react_dom.render(h(_Counter, {'label': 'a'}), container)
+
+    assert react_dom.render(h(_Counter, {'label': 'b'}), container) is instance
+    assert container.text_content == 'b:0'
+    assert _Counter.log == [('mount', 'a'), ('update', 'b')]
+
+
+def test_set_state_renders_immediately_outside_a_batch():
+    container = HostContainer()
+    instance = react_dom.render(h(_Counter, {'label': 'a'}), container)
+
+    instance.increment()
+    instance.increment()
+
+    assert container.text_content == 'a:2'
+    assert instance.renders == 3
+
+
+def test_batched_updates_render_once():
+    container = HostContainer()
+    instance = react_dom.render(h(_Counter, {'label': 'a'}), container)
+
+    def increment_twice():
+        instance.increment()
+        instance.increment()
+        # Nothing is rendered until the batch completes
+        assert container.text_content == 'a:0'
+
+    react_dom.unstable_batchedUpdates(increment_twice)
+
+    assert container.text_content == 'a:2'
+    assert instance.renders == 2
+
+
+def test_event_handlers_are_batched():
+    class Clicker(react.Component):
+        def __init__(self, props, context=None):
+            super().__init__(props, context)
+            self.state = {'clicks': 0}
+            self.renders = 0
+
+        def render(self):
+            self.renders += 1
+            return h('button', {'onClick': self.on_click}, self.state['clicks'])
+
+        def on_click(self, event):
+            self.setState({'clicks': self.state['clicks'] + 1})
+            self.setState(lambda state, props: {'clicks': state['clicks'] + 1})
+
+    container = HostContainer()
+    instance = react_dom.render(h(Clicker), container)
+    container.find_all('button')[0].dispatch('onClick')
+
+    assert container.text_content == '2'
+    assert instance.renders == 2
+
+
+def test_unmount_calls_will_unmount_and_ignores_later_updates():
+    container = HostContainer()
+    instance = react_dom.render(h(_Counter, {'label': 'a'}), container)
+
+    assert react_dom.unmountComponentAtNode(container)
+    assert not react_dom.unmountComponentAtNode(container)
+    assert container.to_html() == ''
+    assert _Counter.log == [('mount', 'a'), ('unmount', 'a')]
+
+    instance.increment()
+    assert instance.renders == 1
+
+
+def test_keyed_children_keep_their_instances_when_reordered():
+    container = HostContainer()
+    react_dom.render(_list(['a', 'b', 'c']), container)
+    a, b, c = _instances(container)
+    b.increment()
+
+    react_dom.render(_list(['c', 'b', 'a']), container)
+    assert _instances(container) == [c, b, a]
+    assert container.text_content == 'c:0b:1a:0'
+
+    # Removing a key unmounts its instance, and a new key mounts a new one
+    react_dom.render(_list(['b', 'd']), container)
+    assert _instances(container)[0] is b
+    assert ('unmount', 'a') in _Counter.log and ('unmount', 'c') in _Counter.log
+    assert _Counter.log[-1] == ('mount', 'd')
+
+
+def test_changing_the_type_replaces_the_child():
+    container = HostContainer()
+    react_dom.render(h('div', None, h(_Counter, {'label': 'a'})), container)
+    react_dom.render(h('div', None, h('span', None, 'text')), container)
+
+    assert container.to_html() == '<div data-reactroot=""><span>text</span></div>'
+    assert _Counter.log == [('mount', 'a'), ('unmount', 'a')]
+
+
+def test_context_reaches_consumers_below_the_provider():
+    context = react.createContext('default')
+
+    def show(props):
+        return h('span', None, react.useContext(context))
+
+    container = HostContainer()
+    react_dom.render(h('div', None, h(show), h(context.Provider, {'value': 'provided'}, h(show))), container)
+
+    assert container.text_content == 'defaultprovided'
+
+
+def test_run_pending_runs_callbacks_in_order_including_those_they_queue():
+    ran = []
+    host.request_callback(lambda: ran.append(1))
+    host.request_callback(lambda: (ran.append(2), host.request_callback(lambda: ran.append(3))))
+
+    assert host.run_pending(limit=1) == 1
+    assert ran == [1]
+    assert host.run_pending() == 2
+    assert ran == [1, 2, 3]
+    assert host.run_pending() == 0
+
+
+def test_stand_in_server_counts_requests_and_responds_with_json():
+    with StandInServer({'/users/1': {'name': 'Ada'}}) as server:
+        with urllib.request.urlopen(server.url('/users/1')) as response:
+            assert response.read() == b'{"name": "Ada"}'
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(server.url('/missing'))
+        assert error.value.code == 404
+
+        assert server.requests == {'/users/1': 1, '/missing': 1}
@@ -0,0 +1,51 @@
+import pytest
+
+from lib.flux.scheduler import Scheduler, SlicedWork
+from lib.react.reference.host import run_pending
+
+
+def _work(generator, name, log):
+    work = SlicedWork(generator)
+    work.on_complete = lambda: log.append(name + '-complete')
+    return work
+
+
+def _bad():
+    yield
+    raise Exception('bad')
+
+
+def _good():
+    yield
+    yield
+
+
+def test_work_runs_in_order_and_completes():
+    log = []
+    scheduler = Scheduler(1000)
+    scheduler.schedule(_work(_good(), 'first', log))
+    scheduler.schedule(_work(_good(), 'urgent', log), True)
+    run_pending()
+
+    assert log == ['urgent-complete', 'first-complete']
+    assert scheduler.pending == 0
+
+
+def test_failed_work_is_removed_without_completing_and_the_queue_keeps_draining():
+    log = []
+    scheduler = Scheduler(1000)
+    bad = _work(_bad(), 'bad', log)
+    good = _work(_good(), 'good', log)
+    scheduler.schedule(bad)
+    scheduler.schedule(good)
+
+    with pytest.raises(Exception, match='bad'):
+        run_pending()
+    assert bad.done and bad.failed
+    assert scheduler.pending == 1
+
+    # Another slice was requested, so the rest of the queue runs without anything else being scheduled
+    run_pending()
+    assert log == ['good-complete']
+    assert not good.failed
+    assert scheduler.pending == 0
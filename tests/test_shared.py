@@ -0,0 +1,111 @@
+import pytest
+
+from actions.actions import ButtonClickedAction
+from lib.flux.dispatcher import AppDispatcher
+from lib.flux.shared import SharedStores
+from lib.react.reference.host import run_intervals, run_pending
+from stores.store import MyStore
+
+
+class _Tab:
+    """
+    A tab with a dispatcher, a counter store and its SharedStores
+    """
+    def __init__(self, name, tab_id):
+        self.dispatcher = AppDispatcher()
+        self.store = MyStore(self.dispatcher)
+        self.shared = SharedStores(self.dispatcher, [self.store], name, [ButtonClickedAction], tab_id=tab_id)
+        self.shared.start()
+
+    def click(self):
+        self.dispatcher.handle_view_action(ButtonClickedAction(True))
+        run_pending()
+
+
+@pytest.fixture
+def tabs(request):
+    opened = []
+
+    def open_tabs(*tab_ids):
+        for tab_id in tab_ids:
+            opened.append(_Tab(request.node.name, tab_id))
+        return opened[-len(tab_ids):]
+
+    yield open_tabs
+
+    # Stop the heartbeats, which would otherwise run in later tests
+    for tab in opened:
+        tab.shared.close()
+
+
+def _elect():
+    for i in range(5):
+        run_intervals()
+
+
+def test_the_oldest_tab_leads_and_the_others_follow_its_state(tabs):
+    first, second, third = tabs(1, 2, 3)
+    _elect()
+
+    assert [tab.shared.is_leader for tab in (first, second, third)] == [True, False, False]
+    assert second.shared.leader_id == 1
+
+    third.click()
+    second.click()
+    assert [tab.store.count for tab in (first, second, third)] == [102, 102, 102]
+
+
+def test_a_new_leader_is_elected_when_the_leader_closes(tabs):
+    first, second, third = tabs(1, 2, 3)
+    _elect()
+
+    first.shared.close()
+    _elect()
+    assert second.shared.is_leader
+
+    third.click()
+    assert [second.store.count, third.store.count] == [101, 101]
+
+
+def test_a_reopened_tab_follows_the_current_leader(tabs):
+    first, second = tabs(1, 2)
+    _elect()
+
+    # The leader's page enters the back/forward cache, and is restored after another tab has taken over
+    first.shared.close()
+    _elect()
+    second.click()
+    first.shared.reopen()
+    _elect()
+
+    assert second.shared.is_leader and not first.shared.is_leader
+    assert first.store.count == 101
+
+    first.click()
+    assert [first.store.count, second.store.count] == [102, 102]
+
+
+def test_reopen_does_not_add_the_middleware_again(tabs):
+    first, second = tabs(1, 2)
+    _elect()
+    second.shared.close()
+    second.shared.reopen()
+    _elect()
+
+    second.click()
+    assert [first.store.count, second.store.count] == [101, 101]
+
+
+def test_the_same_version_from_another_leader_is_restored(tabs):
+    follower, = tabs(5)
+    follower.shared._receive({'type': 'state', 'from': 1, 'version': 3, 'snapshots': [110], 'acknowledged': []})
+    assert follower.store.count == 110
+
+    # After a split brain another leader has numbered a different state with the same version
+    follower.shared._receive({'type': 'state', 'from': 2, 'version': 3, 'snapshots': [120], 'acknowledged': []})
+    assert follower.store.count == 120
+
+    # The same version from the same leader is skipped
+    follower.store.count = 0
+    follower.shared._receive({'type': 'state', 'from': 2, 'version': 3, 'snapshots': [120], 'acknowledged': []})
+    assert follower.store.count == 0
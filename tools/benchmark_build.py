@@ -0,0 +1,329 @@
+# Benchmarks the production build. This is run by CPython and is not part of the application bundle.
+#
+# The build is run with BUILD_TIMINGS set, so webpack.config.js records the duration of each phase (the python
+# transpile, resolving and building the modules, minification, emitting the bundle and prerendering) along with the
+# module stats. The size of the bundle is then attributed back to the modules it was built from, each module is
+# minified on its own with the same minifier webpack uses and gzipped, and the modules are grouped in to the Transcrypt
+# runtime, lib/react, lib/flux, the application and each node package.
+#
+# Every run is appended to a history file, and any measurement that grew by more than the threshold since the previous
+# run is reported as a regression.
+#
+# Usage: python tools/benchmark_build.py [--threshold PERCENT] [--history FILE]
+import argparse
+import datetime
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from build_service_worker import hashed_name
+
+# The root of the repository, where webpack is run from
+_root_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The default history file, one json record per line
+_default_history_file = os.path.join(_root_directory, '.benchmarks', 'build_history.jsonl')
+
+# The default percentage that a measurement may grow by before it is reported as a regression
+_default_threshold = 10
+
+# Durations shorter than this (in milliseconds) are too noisy to report as regressions
+_minimum_duration = 50
+
+# The prefix of the modules that transcrypt emits, as webpack names them
+_target_prefix = './src/__target__/'
+
+# Minifies the files named on stdin with terser (as terser-webpack-plugin does), writing their minified code to stdout
+_minify_script = '''
+const terser = require('terser');
+const fs = require('fs');
+const files = JSON.parse(fs.readFileSync(0, 'utf8'));
+Promise.all(files.map((file) => Promise.resolve(terser.minify(fs.readFileSync(file, 'utf8'))).then((result) => {
+    if (result.error) {
+        throw result.error;
+    }
+    return result.code;
+}))).then((codes) => process.stdout.write(JSON.stringify(codes)));
+'''
+
+
+def _run_build(timings_file):
+    """
+    Runs the production build, recording the timings and module stats
+
+    :param timings_file: The file for webpack.config.js to write the timings and module stats to
+    :return: The total duration of the build in milliseconds
+    """
+    environment = dict(os.environ, BUILD_TIMINGS=timings_file)
+
+    start = time.perf_counter()
+    subprocess.run(
+        [os.path.join('node_modules', '.bin', 'webpack'), '--mode', 'production'],
+        cwd=_root_directory, env=environment, check=True
+    )
+    return round((time.perf_counter() - start) * 1000)
+
+
+def _flatten_modules(modules):
+    """
+    Returns the modules from webpack stats, replacing concatenated modules with the modules they contain
+
+    :param modules: The modules from the stats
+    :return: The list of modules
+    """
+    result = []
+    for module in modules:
+        if module.get('modules'):
+            result.extend(_flatten_modules(module['modules']))
+        elif module.get('name'):
+            result.append(module)
+    return result
+
+
+def _group(name):
+    """
+    Returns the group that a module from the bundle is attributed to
+
+    :param name: The name of the module as webpack names it
+    :return: The name of the group
+    """
+    if name.startswith(_target_prefix):
+        module = name[len(_target_prefix):-len('.js')]
+        if module.startswith('org.transcrypt.') or module == 'copy':
+            return 'transcrypt runtime'
+        if module.startswith('lib.react.'):
+            return 'lib/react'
+        if module.startswith('lib.flux.'):
+            return 'lib/flux'
+        return 'application'
+
+    if '/node_modules/' in name:
+        # Group by package, eg ./node_modules/react-dom/cjs/react-dom.production.min.js is react-dom
+        return 'node_modules/' + name.split('/node_modules/')[-1].split('/')[0]
+
+    return 'webpack'
+
+
+def _source_name(name):
+    """
+    :param name: The name of a module as webpack names it
+    :return: The python source file the module was transpiled from, or the module name if it wasn't transpiled
+    """
+    if name.startswith(_target_prefix):
+        module = name[len(_target_prefix):-len('.js')]
+        path = os.path.join('src', *module.split('.')) + '.py'
+        if os.path.isfile(os.path.join(_root_directory, path)):
+            return path
+        return module
+
+    return name
+
+
+def _measure_modules(stats):
+    """
+    Minifies and gzips each module in the bundle on its own
+
+    :param stats: The webpack stats
+    :return: A dict of the source name of each module to its minified and gzipped bytes
+    """
+    modules = [
+        module for module in _flatten_modules(stats['modules'])
+        if os.path.isfile(os.path.join(_root_directory, module['name']))
+    ]
+
+    # Minify every module with one node process
+    result = subprocess.run(
+        ['node', '-e', _minify_script], cwd=_root_directory, check=True, stdout=subprocess.PIPE,
+        input=json.dumps([os.path.join(_root_directory, module['name']) for module in modules]).encode('utf-8')
+    )
+    codes = json.loads(result.stdout.decode('utf-8'))
+
+    measured = {}
+    for module, code in zip(modules, codes):
+        code = code.encode('utf-8')
+        measured[_source_name(module['name'])] = {
+            'group': _group(module['name']),
+            'minified': len(code),
+            'gzip': len(gzip.compress(code)),
+        }
+
+    return measured
+
+
+def _measure_bundle(stats):
+    """
+    :param stats: The webpack stats
+    :return: The bytes and gzipped bytes of each javascript asset that was emitted, keyed by the name of the asset
+        without the hash of its content so that runs can be compared
+    """
+    output_directory = stats.get('outputPath') or os.path.join(_root_directory, 'dist')
+
+    measured = {}
+    for asset in stats['assets']:
+        if asset['name'].endswith('.js'):
+            with open(os.path.join(output_directory, asset['name']), 'rb') as f:
+                content = f.read()
+            name = hashed_name.sub('.js', asset['name'])
+            measured[name] = {'minified': len(content), 'gzip': len(gzip.compress(content))}
+
+    return measured
+
+
+def benchmark():
+    """
+    Runs and measures the production build
+
+    :return: The record of the run
+    """
+    handle, timings_file = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        total = _run_build(timings_file)
+        with open(timings_file) as f:
+            recorded = json.load(f)
+    finally:
+        os.remove(timings_file)
+
+    modules = _measure_modules(recorded['stats'])
+
+    # Total the modules of each group
+    groups = {}
+    for measured in modules.values():
+        group = groups.setdefault(measured['group'], {'minified': 0, 'gzip': 0})
+        group['minified'] += measured['minified']
+        group['gzip'] += measured['gzip']
+
+    commit = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'], cwd=_root_directory, stdout=subprocess.PIPE, universal_newlines=True
+    ).stdout.strip()
+
+    return {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'timings': dict(recorded['timings'], total=total),
+        'bundle': _measure_bundle(recorded['stats']),
+        'groups': groups,
+        'modules': modules,
+    }
+
+
+def _measurements(record):
+    """
+    Flattens the measurements of a record that are checked for regressions
+
+    :param record: The record of a run
+    :return: A dict of the name of each measurement to its value, and if it is a duration
+    """
+    measurements = {}
+    for phase, duration in record['timings'].items():
+        measurements['time ' + phase + ' (ms)'] = (duration, True)
+    for section in ('bundle', 'groups'):
+        for name, sizes in record[section].items():
+            for kind, size in sizes.items():
+                measurements[name + ' ' + kind + ' (bytes)'] = (size, False)
+    return measurements
+
+
+def find_regressions(previous, current, threshold):
+    """
+    Compares a run with the previous run
+
+    :param previous: The record of the previous run
+    :param current: The record of this run
+    :param threshold: The percentage that a measurement may grow by before it is a regression
+    :return: A list of (measurement, previous value, current value) for each regression
+    """
+    before = _measurements(previous)
+    regressions = []
+    for name, (value, is_duration) in sorted(_measurements(current).items()):
+        if name not in before:
+            continue
+
+        # Ignore durations that are too short to measure reliably
+        previous_value = before[name][0]
+        if is_duration and value < _minimum_duration:
+            continue
+
+        if value > previous_value * (1 + threshold / 100):
+            regressions.append((name, previous_value, value))
+
+    return regressions
+
+
+def _read_last_record(history_file):
+    """
+    :param history_file: The history file
+    :return: The record of the last run in the history, or None if there isn't one
+    """
+    if not os.path.exists(history_file):
+        return None
+
+    last = None
+    with open(history_file) as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last) if last else None
+
+
+def _report(record):
+    """
+    Prints the timings and sizes of a run
+
+    :param record: The record of the run
+    :return: Nothing
+    """
+    print('\nBuild phases (ms):')
+    for phase, duration in record['timings'].items():
+        print('  {:<12} {:>8}'.format(phase, duration))
+
+    print('\nBundle (bytes):')
+    for name, sizes in record['bundle'].items():
+        print('  {:<12} {:>8} minified {:>8} gzip'.format(name, sizes['minified'], sizes['gzip']))
+
+    print('\nAttributed to (bytes, each module minified on its own):')
+    for name, sizes in sorted(record['groups'].items(), key=lambda item: -item[1]['minified']):
+        print('  {:<28} {:>8} minified {:>8} gzip'.format(name, sizes['minified'], sizes['gzip']))
+
+    print('\nLargest python modules (bytes):')
+    python_modules = [(name, sizes) for name, sizes in record['modules'].items() if name.endswith('.py')]
+    for name, sizes in sorted(python_modules, key=lambda item: -item[1]['minified'])[:10]:
+        print('  {:<44} {:>8} minified {:>8} gzip'.format(name, sizes['minified'], sizes['gzip']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the production build')
+    parser.add_argument(
+        '--threshold', type=float, default=_default_threshold,
+        help='the percentage a measurement may grow by before it is reported as a regression'
+    )
+    parser.add_argument('--history', default=_default_history_file, help='the history file to append the run to')
+    arguments = parser.parse_args()
+
+    # Run the build, and compare it with the last run in the history
+    previous = _read_last_record(arguments.history)
+    current = benchmark()
+    _report(current)
+
+    # Append the run to the history
+    os.makedirs(os.path.dirname(os.path.abspath(arguments.history)), exist_ok=True)
+    with open(arguments.history, 'a') as f:
+        f.write(json.dumps(current) + '\n')
+
+    if not previous:
+        print('\nNo previous run to compare with')
+        sys.exit(0)
+
+    regressions = find_regressions(previous, current, arguments.threshold)
+    if not regressions:
+        print('\nNo regressions since ' + previous['commit'])
+        sys.exit(0)
+
+    print('\nRegressions of more than {}% since {}:'.format(arguments.threshold, previous['commit']))
+    for name, before, after in regressions:
+        print('  {}: {} -> {} (+{:.1f}%)'.format(name, before, after, (after - before) * 100 / max(before, 1)))
+    sys.exit(1)
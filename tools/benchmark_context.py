@@ -0,0 +1,204 @@
+# Benchmarks how many components re-render when a store changes, with the store and dispatcher threaded through the
+# props of every component against reading them from StoreContext (see lib.react.components.store_provider). This is
+# run by CPython (see lib.react.reference) and is not part of the application bundle.
+#
+# Both trees are a chain of intermediate components, --depth levels deep, with a counter at the bottom that shows the
+# count of the store and a button that changes it. With props, the root subscribes to the store and passes the store,
+# dispatcher and count down through every level, as App did with App.Props, so every level renders on each change.
+# With context, the intermediate components are PureComponents that take no store props, and only the counter reads
+# the context and subscribes, so it is the only component that renders on each change.
+#
+# The renders of each level are counted over --clicks clicks, and the time each click took is reported.
+#
+# Usage: python tools/benchmark_context.py [--depth N] [--clicks N]
+import argparse
+import time
+
+import source_path  # noqa: F401
+
+from actions.actions import ButtonClickedAction
+from lib.flux.dispatcher import AppDispatcher
+from lib.react.components.component import Component, PureComponent
+from lib.react.components.store_provider import StoreContext, StoreProvider
+from lib.react.dom import DOM as d
+from lib.react.react import React
+from lib.react.reference.host import run_pending
+from lib.react.reference.react_dom import HostContainer
+from stores.store import MyStore
+
+# The default depth of the tree
+_default_depth = 10
+
+# The default number of clicks
+_default_clicks = 1000
+
+# The number of renders of each component, keyed by its name
+_renders = {}
+
+
+def _rendered(name):
+    """
+    Counts a render of a component
+    """
+    _renders[name] = _renders.get(name, 0) + 1
+
+
+class _DrilledProps:
+    """
+    The props threaded through every level of the tree without context
+    """
+    def __init__(self, store, dispatcher, count, depth):
+        self.store = store
+        self.dispatcher = dispatcher
+        self.count = count
+        self.depth = depth
+
+
+class _DrilledRoot(Component):
+    """
+    Subscribes to the store, and passes it down with the dispatcher and the count
+    """
+    class State:
+        def __init__(self, count=0):
+            self.count = count
+
+    def __init__(self, store, dispatcher, depth):
+        super().__init__({'store': store, 'dispatcher': dispatcher, 'depth': depth}, _DrilledRoot.State)
+
+    def get_initial_state(self):
+        return _DrilledRoot.State(self.props.store.count)
+
+    def component_did_mount(self):
+        self.subscribe(self.props.store, self.on_change)
+
+    def on_change(self):
+        self.set_state(_DrilledRoot.State(self.props.store.count))
+
+    def render(self):
+        _rendered('root')
+        return _DrilledLevel(
+            _DrilledProps(self.props.store, self.props.dispatcher, self.state.count, self.props.depth)
+        ).component
+
+
+class _DrilledLevel(Component):
+    """
+    An intermediate component, that has to accept and forward the store props
+    """
+    def render(self):
+        _rendered('level {}'.format(self.props.depth))
+        if self.props.depth > 1:
+            return _DrilledLevel(
+                _DrilledProps(self.props.store, self.props.dispatcher, self.props.count, self.props.depth - 1)
+            ).component
+        return _DrilledCounter(_DrilledProps(self.props.store, self.props.dispatcher, self.props.count, 0)).component
+
+
+class _DrilledCounter(Component):
+    """
+    Shows the count from its props
+    """
+    def render(self):
+        _rendered('counter')
+        return d.div(None, [
+            d.button({'key': 0, 'onClick': self.bound_action(
+                self.props.dispatcher.handle_view_action, ButtonClickedAction, True
+            )}, 'Increase!'),
+            d.p({'key': 1}, self.props.count)
+        ])
+
+
+class _ContextLevel(PureComponent):
+    """
+    An intermediate component, that only knows its depth
+    """
+    def render(self):
+        _rendered('level {}'.format(self.props.depth))
+        if self.props.depth > 1:
+            return _ContextLevel({'depth': self.props.depth - 1}).component
+        return _ContextCounter(None).component
+
+
+class _ContextCounter(Component):
+    """
+    Reads the store and dispatcher from the context, and subscribes to the store
+    """
+    context_type = StoreContext
+
+    class State:
+        def __init__(self, count=0):
+            self.count = count
+
+    def __init__(self, props):
+        super().__init__(props, _ContextCounter.State)
+
+    def get_initial_state(self):
+        return _ContextCounter.State(self.context.store.count)
+
+    def component_did_mount(self):
+        self.subscribe(self.context.store, self.on_change)
+
+    def on_change(self):
+        self.set_state(_ContextCounter.State(self.context.store.count))
+
+    def render(self):
+        _rendered('counter')
+        return d.div(None, [
+            d.button({'key': 0, 'onClick': self.bound_action(
+                self.context.dispatcher.handle_view_action, ButtonClickedAction, True
+            )}, 'Increase!'),
+            d.p({'key': 1}, self.state.count)
+        ])
+
+
+def _benchmark(context, depth, clicks):
+    """
+    Mounts a tree and clicks its button
+
+    :param context: True to use StoreContext, otherwise the store props are threaded through every level
+    :return: The renders of each component during the clicks, and the mean milliseconds per click
+    """
+    dispatcher = AppDispatcher()
+    store = MyStore(dispatcher)
+    container = HostContainer()
+
+    if context:
+        root = StoreProvider(store, dispatcher, _ContextLevel({'depth': depth}))
+    else:
+        root = _DrilledRoot(store, dispatcher, depth)
+    React.render(root, container)
+    run_pending()
+
+    _renders.clear()
+    start = time.perf_counter()
+    for i in range(clicks):
+        container.find_all('button')[0].dispatch('onClick')
+        run_pending()
+    duration = (time.perf_counter() - start) * 1000 / clicks
+
+    # Check that the counter followed the store
+    assert container.find_all('p')[0].text_content == str(store.count)
+
+    return dict(_renders), duration
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks re-renders with store props against StoreContext')
+    parser.add_argument('--depth', type=int, default=_default_depth, help='the number of intermediate levels')
+    parser.add_argument('--clicks', type=int, default=_default_clicks, help='the number of clicks')
+    arguments = parser.parse_args()
+
+    drilled, drilled_duration = _benchmark(False, arguments.depth, arguments.clicks)
+    provided, provided_duration = _benchmark(True, arguments.depth, arguments.clicks)
+
+    print('{} levels, {} clicks (renders per click)\n'.format(arguments.depth, arguments.clicks))
+    print('{:<12} {:>8} {:>8}'.format('', 'props', 'context'))
+    names = ['root'] + ['level {}'.format(depth) for depth in range(arguments.depth, 0, -1)] + ['counter']
+    for name in names:
+        print('{:<12} {:>8.1f} {:>8.1f}'.format(
+            name, drilled.get(name, 0) / arguments.clicks, provided.get(name, 0) / arguments.clicks
+        ))
+    print('{:<12} {:>8.1f} {:>8.1f}'.format(
+        'total', sum(drilled.values()) / arguments.clicks, sum(provided.values()) / arguments.clicks
+    ))
+    print('{:<12} {:>8.3f} {:>8.3f}'.format('ms', drilled_duration, provided_duration))
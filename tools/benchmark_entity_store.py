@@ -0,0 +1,169 @@
+# Benchmarks lib.flux.entity_store.EntityStore against keeping the records in a list and scanning it, as stores did
+# before. This is run by CPython (see lib.react.reference) and is not part of the application bundle.
+#
+# For each size, the store is filled with one batch upsert, then a sample of records are looked up by id, replaced with
+# a record that moves them to another bucket of an index, found by index key (twice) and removed. The list is put
+# through the same operations by scanning. Every operation is timed per record, so the two can be compared at each size.
+#
+# Usage: python tools/benchmark_entity_store.py [--sizes N [N ...]] [--operations N]
+import argparse
+import random
+import time
+
+import source_path  # noqa: F401
+
+from lib.flux.dispatcher import AppDispatcher
+from lib.flux.entity_store import EntityStore
+
+# The default numbers of records to benchmark with
+_default_sizes = [100000, 1000000]
+
+# The default number of records that each operation is timed over
+_default_operations = 1000
+
+# The number of owners and statuses that records are spread over
+_owners = 1000
+_statuses = ['open', 'in progress', 'done']
+
+
+class _Todo:
+    """
+    The record being stored
+    """
+    def __init__(self, id, owner_id, status):
+        self.id = id
+        self.owner_id = owner_id
+        self.status = status
+
+
+class _TodoStore(EntityStore):
+    """
+    A store of todos, indexed by owner and status
+    """
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher, {
+            'by_owner': lambda todo: todo.owner_id,
+            'by_status': lambda todo: todo.status,
+        })
+
+    def handle_message(self, message):
+        pass
+
+
+class _ListStore:
+    """
+    The records kept in a list and scanned, for comparison
+    """
+    def __init__(self):
+        self.todos = []
+
+    def upsert(self, todos):
+        for todo in todos:
+            for i, existing in enumerate(self.todos):
+                if existing.id == todo.id:
+                    self.todos[i] = todo
+                    break
+            else:
+                self.todos.append(todo)
+
+    def insert(self, todos):
+        # Filling the list doesn't need a scan when the ids are known to be new
+        self.todos.extend(todos)
+
+    def get(self, todo_id):
+        for todo in self.todos:
+            if todo.id == todo_id:
+                return todo
+        return None
+
+    def find(self, index, key):
+        attribute = 'owner_id' if index == 'by_owner' else 'status'
+        return [todo for todo in self.todos if getattr(todo, attribute) == key]
+
+    def remove(self, todo_ids):
+        todo_ids = set(todo_ids)
+        self.todos = [todo for todo in self.todos if todo.id not in todo_ids]
+
+
+def _time(fn, count):
+    """
+    Times a function
+
+    :param fn: The function to time
+    :param count: The number of records the function operates on
+    :return: The duration per record in microseconds
+    """
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000000 / count
+
+
+def _benchmark(size, operations):
+    """
+    Benchmarks the entity store and the list with a number of records
+
+    :param size: The number of records
+    :param operations: The number of records that each operation is timed over
+    :return: A list of (operation, entity store microseconds, list microseconds) per record
+    """
+    todos = [_Todo(i, i % _owners, _statuses[i % len(_statuses)]) for i in range(size)]
+    sample = random.Random(size).sample(range(size), operations)
+    moved = [_Todo(i, (i + 1) % _owners, _statuses[(i + 1) % len(_statuses)]) for i in sample]
+
+    # Scanning the list is far slower, so it is timed over fewer records
+    scanned = sample[:max(1, operations // 100)]
+    scanned_moved = moved[:len(scanned)]
+
+    store = _TodoStore(AppDispatcher())
+    listed = _ListStore()
+
+    results = [
+        ('fill', _time(lambda: store.upsert(todos), size), _time(lambda: listed.insert(todos), size)),
+        (
+            'get by id',
+            _time(lambda: [store.get(i) for i in sample], operations),
+            _time(lambda: [listed.get(i) for i in scanned], len(scanned)),
+        ),
+        (
+            'update',
+            _time(lambda: store.upsert(moved), operations),
+            _time(lambda: listed.upsert(scanned_moved), len(scanned)),
+        ),
+        (
+            'find by owner',
+            _time(lambda: [store.find('by_owner', i % _owners) for i in sample], operations),
+            _time(lambda: [listed.find('by_owner', i % _owners) for i in scanned], len(scanned)),
+        ),
+        (
+            # The same keys again, the store returns the lists it memoized while the list is scanned again
+            'find again',
+            _time(lambda: [store.find('by_owner', i % _owners) for i in sample], operations),
+            _time(lambda: [listed.find('by_owner', i % _owners) for i in scanned], len(scanned)),
+        ),
+        (
+            'remove',
+            _time(lambda: store.remove(sample), operations),
+            _time(lambda: listed.remove(scanned), len(scanned)),
+        ),
+    ]
+
+    # Check the store is consistent after the operations
+    assert store.count == size - operations
+    assert sum(store.count_of('by_owner', i) for i in range(_owners)) == store.count
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks EntityStore against scanning a list')
+    parser.add_argument('--sizes', type=int, nargs='+', default=_default_sizes, help='the numbers of records')
+    parser.add_argument(
+        '--operations', type=int, default=_default_operations, help='the number of records each operation is timed over'
+    )
+    arguments = parser.parse_args()
+
+    for size in arguments.sizes:
+        print('\n{} records (microseconds per record):'.format(size))
+        print('  {:<16} {:>12} {:>12}'.format('', 'EntityStore', 'list'))
+        for operation, indexed, listed in _benchmark(size, arguments.operations):
+            print('  {:<16} {:>12.2f} {:>12.2f}'.format(operation, indexed, listed))
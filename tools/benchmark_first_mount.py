@@ -0,0 +1,283 @@
+# Benchmarks the first mount of an application with many component types, with the react classes generated at build
+# time by build_react_classes.py against creating them at runtime (see lib.react.components.utils._create_class), and
+# against creating them at runtime as was done before build_react_classes.py, with eval and a copy of the prototype
+# members. This is run by CPython and is not part of the application bundle.
+#
+# The source is copied to a temporary directory along with a generated module of --components Component subclasses,
+# each rendering a span, and a root component that renders one of each. The react classes of the copy are generated
+# and the copy is transpiled as the build does, then the transpiled modules are copied with react_classes.js emptied,
+# so that every class falls back to being created at runtime. For the eval variant the copy is transpiled again with
+# _create_class replaced by the eval version, and react_classes.js emptied.
+#
+# Each run is a new node process in production mode, which renders the root to a string with react-dom/server. The
+# first render includes creating or looking up the react class of every component type, the second renders the same
+# tree with the classes in place. React is loaded from node_modules, so npm install has to have been run.
+#
+# Usage: python tools/benchmark_first_mount.py [--components N] [--runs N] [--modules DIRECTORY]
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from build_react_classes import build as build_react_classes
+from source_path import source_directory
+
+# The root of the repository, where node_modules is installed
+_root_directory = os.path.dirname(source_directory)
+
+# The default number of component types
+_default_components = 200
+
+# The default number of node processes run for each variant
+_default_runs = 10
+
+# The generated module of components, and the entry point that transcrypt is run on
+_components_module = 'benchmark_components'
+_entry_file = 'benchmark_entry.py'
+
+# react_classes.js without any classes, so every react class is created at runtime
+_empty_react_classes = 'export var classes = {};\n'
+
+# The _create_class of lib.react.components.utils before build_react_classes.py, which evals a function named after the
+# component and copies the members of the prototypes it inherits on to its prototype. It is adapted to the proxy base
+# class, which reads the template from the react class rather than having its members copied from the template
+_eval_create_class = '''
+# noinspection PyUnresolvedReferences
+def _create_class(display_name):
+    assert display_name
+
+    function_name = display_name.replace('.', '_')
+
+    react_component_class = __pragma__(
+        'js',
+        '{}',
+        \'\'\'
+        (function () {
+            let reactComponentClass = null;
+
+            // Use the displayName to name the component class function (React DevTools will use this)
+            eval("reactComponentClass = function " + function_name + "(props, context) { this.props = props; this.context = context; var state = this.constructor.template.constructorStateInitialiser.call(this); if (state) { this.state = Object.assign({}, state); } }");
+
+            // Set the React.Component base class, the proxy members read the template through the constructor
+            reactComponentClass.prototype = Object.create(_react.Component.prototype, {
+                constructor: {value: reactComponentClass, writable: true, configurable: true}
+            });
+            Object.setPrototypeOf(reactComponentClass, _react.Component);
+
+            // Attach the members, from the furthest prototype to the nearest
+            var protoStack = [];
+            var o = ReactComponentProxy.prototype;
+            while (o && o !== Object.prototype) {
+                protoStack.push(o);
+                o = Object.getPrototypeOf(o);
+            }
+            for (var i = protoStack.length - 1; i >= 0; i--) {
+                var descriptors = Object.getOwnPropertyDescriptors(protoStack[i]);
+                for (var key in descriptors) {
+                    if (key !== 'constructor') {
+                        Object.defineProperty(reactComponentClass.prototype, key, descriptors[key]);
+                    }
+                }
+            }
+
+            return reactComponentClass;
+        })()
+        \'\'\'
+    )
+
+    return react_component_class
+
+
+'''
+
+# The marker that _eval_create_class replaces lib.react.components.utils from, up to _cpython_marker
+_create_class_marker = '# noinspection PyUnresolvedReferences\ndef _create_class('
+_cpython_marker = '# Under CPython'
+
+# Renders the root component twice with react-dom/server, writing the timings in milliseconds to stdout as json
+_render_script = '''
+import {createRequire} from 'module';
+import {performance} from 'perf_hooks';
+import {pathToFileURL} from 'url';
+
+const [target, modules] = process.argv.slice(2);
+
+// The transpiled modules load react with require, as webpack provides it
+globalThis.require = createRequire(modules + '/package.json');
+const server = require('react-dom/server');
+
+const {classes} = await import(pathToFileURL(target + '/react_classes.js'));
+const {create_root} = await import(pathToFileURL(target + '/{module}.js'));
+
+let start = performance.now();
+const markup = server.renderToString(create_root());
+const first = performance.now() - start;
+
+start = performance.now();
+server.renderToString(create_root());
+const second = performance.now() - start;
+
+process.stdout.write(JSON.stringify({first, second, prebuilt: Object.keys(classes).length, length: markup.length}));
+'''.replace('{module}', _components_module)
+
+
+def _generate_components(count):
+    """
+    :param count: The number of component types
+    :return: The source of the module of components
+    """
+    lines = [
+        '# Generated by benchmark_first_mount.py',
+        'from lib.react.components.component import Component',
+        'from lib.react.dom import DOM as d',
+    ]
+
+    for i in range(count):
+        lines.extend([
+            '',
+            '',
+            'class Component{}(Component):'.format(i),
+            '    def render(self):',
+            "        return d.span(None, 'Component {}')".format(i),
+        ])
+
+    lines.extend([
+        '',
+        '',
+        'class Root(Component):',
+        '    def render(self):',
+        '        return d.div(None, [',
+    ])
+    lines.extend("            Component{0}({{'key': {0}}}),".format(i) for i in range(count))
+    lines.extend([
+        '        ])',
+        '',
+        '',
+        'def create_root():',
+        '    return Root(None).component',
+        '',
+    ])
+
+    return '\n'.join(lines)
+
+
+def _build(directory, components):
+    """
+    Copies the source with the generated components and transpiles it, with and without the prebuilt react classes
+
+    :param directory: The temporary directory to build in
+    :param components: The number of component types
+    :return: The directories of the transpiled modules with the prebuilt classes, without, and with the eval classes
+    """
+    source = os.path.join(directory, 'src')
+    shutil.copytree(
+        source_directory, source, ignore=shutil.ignore_patterns('__target__', '__optimised__', '__pycache__')
+    )
+
+    with open(os.path.join(source, _components_module + '.py'), 'w') as f:
+        f.write(_generate_components(components))
+    with open(os.path.join(source, _entry_file), 'w') as f:
+        f.write('import ' + _components_module + '\n')
+
+    # Generate the react classes and transpile, as webpack.config.js does
+    prebuilt = os.path.join(directory, 'prebuilt')
+    build_react_classes(source)
+    _transpile(source, prebuilt)
+
+    # Copy the modules, without any prebuilt classes
+    runtime = os.path.join(directory, 'runtime')
+    shutil.copytree(prebuilt, runtime)
+    with open(os.path.join(runtime, 'react_classes.js'), 'w') as f:
+        f.write(_empty_react_classes)
+
+    # Copy the source with the eval _create_class, and transpile it without any prebuilt classes
+    eval_source = os.path.join(directory, 'eval_src')
+    shutil.copytree(source, eval_source)
+    utils = os.path.join(eval_source, 'lib', 'react', 'components', 'utils.py')
+    with open(utils) as f:
+        module_source = f.read()
+    start = module_source.index(_create_class_marker)
+    module_source = module_source[:start] + _eval_create_class + module_source[module_source.index(_cpython_marker):]
+    with open(utils, 'w') as f:
+        f.write(module_source)
+
+    evaluated = os.path.join(directory, 'eval')
+    _transpile(eval_source, evaluated)
+    with open(os.path.join(evaluated, 'react_classes.js'), 'w') as f:
+        f.write(_empty_react_classes)
+
+    return prebuilt, runtime, evaluated
+
+
+def _transpile(source, target):
+    """
+    Transpiles the entry point of a copy of the source
+
+    :param source: The directory of the copy
+    :param target: The directory to write the transpiled modules to
+    :return: Nothing
+    """
+    subprocess.run(
+        [sys.executable, '-m', 'transcrypt', '-b', '-n', '-e', '6', '-od', target, _entry_file],
+        cwd=source, check=True, stdout=subprocess.DEVNULL
+    )
+
+    # The transpiled modules are es modules
+    with open(os.path.join(target, 'package.json'), 'w') as f:
+        f.write('{"type": "module"}\n')
+
+
+def _render(script, target, modules):
+    """
+    Renders the root component in a new node process
+
+    :return: The timings of the run
+    """
+    result = subprocess.run(
+        ['node', script, target, modules], env=dict(os.environ, NODE_ENV='production'),
+        check=True, stdout=subprocess.PIPE
+    )
+    return json.loads(result.stdout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the first mount with prebuilt react classes, runtime classes and eval classes'
+    )
+    parser.add_argument('--components', type=int, default=_default_components, help='the number of component types')
+    parser.add_argument('--runs', type=int, default=_default_runs, help='the node processes run for each variant')
+    parser.add_argument('--modules', default=_root_directory, help='the directory that node_modules is installed in')
+    arguments = parser.parse_args()
+
+    # Confirm that react is installed
+    for package in ('react', 'react-dom'):
+        if not os.path.isdir(os.path.join(arguments.modules, 'node_modules', package)):
+            raise Exception(package + ' is not installed in ' + arguments.modules + ', run npm install first')
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        targets = _build(temporary_directory, arguments.components)
+
+        render_script = os.path.join(temporary_directory, 'render.mjs')
+        with open(render_script, 'w') as f:
+            f.write(_render_script)
+
+        # Alternate the variants, so that they see the same conditions
+        runs = ([], [], [])
+        for i in range(arguments.runs):
+            for target, timings in zip(targets, runs):
+                timings.append(_render(render_script, target, os.path.abspath(arguments.modules)))
+
+    # Check that every variant rendered the same markup
+    assert runs[0][0]['length'] == runs[1][0]['length'] == runs[2][0]['length']
+
+    print('{} component types, median of {} runs (ms)\n'.format(arguments.components, arguments.runs))
+    print('{:<10} {:>16} {:>14} {:>14}'.format('', 'prebuilt classes', 'first mount', 'second render'))
+    for name, timings in zip(('prebuilt', 'runtime', 'eval'), runs):
+        print('{:<10} {:>16} {:>14.2f} {:>14.2f}'.format(
+            name, timings[0]['prebuilt'],
+            statistics.median(run['first'] for run in timings), statistics.median(run['second'] for run in timings)
+        ))
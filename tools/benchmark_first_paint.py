@@ -0,0 +1,215 @@
+# Benchmarks the first contentful paint and the mount of the production build in a headless browser, with the initial
+# view prerendered in to index.html (see prerender.py) against the same build without it. This is run by CPython and is
+# not part of the application bundle.
+#
+# The build in dist is copied twice, as it was built and with index.html stripped of the prerendered markup and the
+# inlined state, so that index.py renders the application from scratch. The markup is rendered again to find it, so
+# dist must have been built from the current source. Both are served by the stand-in server of benchmark_startup.py,
+# with the same latency and bandwidth, and a small script is added to each index.html that sends the timings of the page
+# to a local collector once it has loaded:
+#
+# * first paint: the first-contentful-paint of the page
+# * mount: the 'hydrate' or 'render' measure that index.py records around mounting the application
+#
+# Each run is a new browser process with an empty profile, so every run is a first visit. The browser is Chrome or
+# Chromium, found on the path or passed with --browser.
+#
+# Usage: python tools/benchmark_first_paint.py [--dist DIRECTORY] [--runs N] [--browser PATH] [--latency MS]
+#                                              [--bandwidth KBPS]
+import argparse
+import http.server
+import json
+import os
+import queue
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+
+from benchmark_startup import _StaticServer
+from prerender import _container, prerender
+
+# The root of the repository
+_root_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The default number of browser processes run for each variant
+_default_runs = 10
+
+# The default latency added to each request, in milliseconds
+_default_latency = 50
+
+# The default bandwidth, in kilobits per second
+_default_bandwidth = 5000
+
+# The seconds to wait for a page to send its timings before giving up
+_timeout = 30
+
+# The names of the browser executables looked for on the path
+_browsers = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser')
+
+# The inlined state, which is removed along with the prerendered markup for the page that isn't prerendered
+_initial_state = re.compile(r'<script>window\.__INITIAL_STATE__ = .*?;</script>\n')
+
+# Sends the timings to the collector once the page has painted and mounted the application
+_report_script = '''
+<script>
+addEventListener('load', function report() {
+    var paint = performance.getEntriesByName('first-contentful-paint')[0];
+    var mount = performance.getEntriesByName('hydrate')[0] || performance.getEntriesByName('render')[0];
+    if (!paint || !mount) {
+        setTimeout(report, 50);
+        return;
+    }
+    var timings = {paint: paint.startTime, mount: mount.duration, name: mount.name};
+    navigator.sendBeacon('{collector}', JSON.stringify(timings));
+});
+</script>
+'''
+
+
+class _Collector:
+    """
+    Receives the timings sent by the pages from a background thread
+    """
+    def __init__(self):
+        self.timings = queue.Queue()
+
+        collector = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                collector.timings.put(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                self.send_response(204)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                # Keep the requests out of the output
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        """
+        Returns the url that the timings are sent to
+        """
+        return 'http://127.0.0.1:{}/timings'.format(self._server.server_address[1])
+
+    def close(self):
+        """
+        Stops the collector
+
+        :return: Nothing
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def _copy(dist, directory, collector, prerendered):
+    """
+    Copies the build with the report script added to index.html, and without the prerendered view if requested
+
+    :param dist: The directory of the build
+    :param directory: The directory to copy it to
+    :param collector: The url that the timings are sent to
+    :param prerendered: False to strip the prerendered markup and state from index.html
+    :return: Nothing
+    """
+    shutil.copytree(dist, directory)
+
+    path = os.path.join(directory, 'index.html')
+    with open(path) as f:
+        page = f.read()
+
+    if not prerendered:
+        # Replace the prerendered container with the empty one from the template
+        prerendered_container = '<div id="container">' + prerender()[0] + '</div>'
+        if prerendered_container not in page:
+            raise Exception("The markup in " + path + " is not the current initial view, rebuild with npm run build")
+        page = _initial_state.sub('', page.replace(prerendered_container, _container))
+
+    with open(path, 'w') as f:
+        f.write(page.replace('</body>', _report_script.replace('{collector}', collector) + '</body>'))
+
+
+def _visit(browser, server, collector):
+    """
+    Opens the application in a new browser process with an empty profile
+
+    :return: The timings sent by the page
+    """
+    with tempfile.TemporaryDirectory() as profile:
+        process = subprocess.Popen(
+            [
+                browser, '--headless=new', '--no-first-run', '--no-default-browser-check', '--disable-extensions',
+                '--user-data-dir=' + profile, server.url
+            ],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            return collector.timings.get(timeout=_timeout)
+        except queue.Empty:
+            raise Exception("The page at " + server.url + " didn't send its timings within " + str(_timeout) + 's')
+        finally:
+            process.kill()
+            process.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the first paint and mount with and without prerendering')
+    parser.add_argument('--dist', default=os.path.join(_root_directory, 'dist'), help='the directory of the build')
+    parser.add_argument('--runs', type=int, default=_default_runs, help='the browser processes run for each variant')
+    parser.add_argument('--browser', help='the path of chrome or chromium')
+    parser.add_argument('--latency', type=float, default=_default_latency, help='the latency of each request in ms')
+    parser.add_argument('--bandwidth', type=float, default=_default_bandwidth, help='the bandwidth in kbit/s')
+    arguments = parser.parse_args()
+
+    # Find the browser
+    browser = arguments.browser or next(filter(None, (shutil.which(name) for name in _browsers)), None)
+    if not browser:
+        parser.error('chrome or chromium was not found on the path, pass its path with --browser')
+
+    # Confirm that the build was prerendered
+    index_path = os.path.join(arguments.dist, 'index.html')
+    if not os.path.isfile(index_path):
+        parser.error(arguments.dist + ' does not contain a production build, run npm run build')
+    with open(index_path) as f:
+        if not _initial_state.search(f.read()):
+            parser.error(index_path + ' was not prerendered, run npm run build')
+
+    collector = _Collector()
+    servers = []
+    try:
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            try:
+                for name in ('prerendered', 'rendered'):
+                    directory = os.path.join(temporary_directory, name)
+                    _copy(arguments.dist, directory, collector.url, name == 'prerendered')
+                    servers.append(_StaticServer(directory, True, arguments.latency, arguments.bandwidth))
+
+                # Alternate the variants, so that they see the same conditions
+                runs = ([], [])
+                for i in range(arguments.runs):
+                    for server, timings in zip(servers, runs):
+                        timings.append(_visit(browser, server, collector))
+            finally:
+                for server in servers:
+                    server.close()
+    finally:
+        collector.close()
+
+    print('{}ms latency, {}kbit/s, median of {} runs (ms)\n'.format(
+        arguments.latency, arguments.bandwidth, arguments.runs
+    ))
+    print('{:<12} {:>12} {:>10} {:>10}'.format('', 'first paint', 'mount', 'measure'))
+    for name, timings in zip(('prerendered', 'rendered'), runs):
+        print('{:<12} {:>12.1f} {:>10.1f} {:>10}'.format(
+            name, statistics.median(run['paint'] for run in timings),
+            statistics.median(run['mount'] for run in timings), timings[0]['name']
+        ))
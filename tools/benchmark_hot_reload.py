@@ -0,0 +1,325 @@
+# Benchmarks how long a change to a component module and to a store module takes to show in the running application
+# under the dev server, with hot module replacement (see index.py) against reloading the whole page as the dev server
+# did before it. This is run by CPython and is not part of the application bundle.
+#
+# The dev server is started as npm start starts it, with FULL_RELOAD set for the full reload (see webpack.config.js),
+# and the application is opened in headless Chrome or Chromium, which is driven over the DevTools protocol on a pipe.
+# Each run saves components/app.py or stores/store.py with a line appended that sets a value on window, and measures
+# from the save until the application has rendered after the changed module ran, as marked by the 'rendered' mark that
+# index.py records on each render. The page's clock is compared with the clock of this script, they are the same wall
+# clock on the same machine. The modules are restored once the runs are done.
+#
+# The dev server and the browser need npm install and the python requirements in .venv, as npm start does.
+#
+# Usage: python tools/benchmark_hot_reload.py [--runs N] [--browser PATH]
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from source_path import source_directory
+
+# The root of the repository, where the dev server is run from
+_root_directory = os.path.dirname(source_directory)
+
+# The default number of saves of each module in each mode
+_default_runs = 10
+
+# The seconds to wait for the dev server to build the application, and for a change to show
+_startup_timeout = 300
+_change_timeout = 60
+
+# The seconds to wait after a change has shown before the next save, so that the watchers are idle
+_settle = 1
+
+# The seconds between checks of the page for the change
+_poll_interval = 0.005
+
+# The names of the browser executables looked for on the path
+_browsers = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser')
+
+# The modules that are changed, relative to src
+_modules = (('component', os.path.join('components', 'app.py')), ('store', os.path.join('stores', 'store.py')))
+
+# The line appended to a module to change it, it sets a value on window so that the page shows when the module has run
+_change = '\nwindow.hot_reload_benchmark = {}\n'
+
+# Returns the wall clock time of the last render after the change with the value has run, or 0 until there is one
+_rendered_expression = '''
+(function () {
+    var rendered = performance.getEntriesByName('rendered');
+    if (window.hot_reload_benchmark !== {} || !rendered.length) {
+        return 0;
+    }
+    return performance.timeOrigin + rendered[rendered.length - 1].startTime;
+})()
+'''
+
+
+class _Browser:
+    """
+    A headless browser with a single page, driven over the DevTools protocol on the pipe that --remote-debugging-pipe
+    opens (messages are json terminated by a null byte, written to fd 3 and read from fd 4 of the browser)
+    """
+    def __init__(self, browser, url):
+        """
+        :param browser: The path of chrome or chromium
+        :param url: The url to open
+        """
+        self._profile = tempfile.TemporaryDirectory()
+
+        # The pipes that the browser reads commands from and writes responses to
+        browser_read, commands = os.pipe()
+        responses, browser_write = os.pipe()
+
+        def pipes():
+            # Move the pipes above 4 first, as either may already be on 3 or 4
+            read, write = fcntl.fcntl(browser_read, fcntl.F_DUPFD, 5), fcntl.fcntl(browser_write, fcntl.F_DUPFD, 5)
+            os.dup2(read, 3)
+            os.dup2(write, 4)
+
+        self._process = subprocess.Popen(
+            [
+                browser, '--headless=new', '--remote-debugging-pipe', '--no-first-run', '--no-default-browser-check',
+                '--disable-extensions', '--user-data-dir=' + self._profile.name
+            ],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, close_fds=False, preexec_fn=pipes
+        )
+        os.close(browser_read)
+        os.close(browser_write)
+
+        self._commands = os.fdopen(commands, 'wb')
+        self._responses = os.fdopen(responses, 'rb')
+
+        # The id of the last command, and the responses that have arrived keyed by the id of their command
+        self._id = 0
+        self._received = {}
+        self._condition = threading.Condition()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+        # Open the page, and attach to it to evaluate in it
+        target = self._send('Target.createTarget', {'url': url})['targetId']
+        self._session = self._send('Target.attachToTarget', {'targetId': target, 'flatten': True})['sessionId']
+
+    def _read(self):
+        """
+        Reads the messages from the browser, keeping the responses to commands and dropping events
+        """
+        buffer = b''
+        while True:
+            data = self._responses.read1(65536)
+            if not data:
+                break
+            buffer += data
+            while b'\0' in buffer:
+                message, buffer = buffer.split(b'\0', 1)
+                message = json.loads(message)
+                if 'id' in message:
+                    with self._condition:
+                        self._received[message['id']] = message
+                        self._condition.notify_all()
+
+    def _send(self, method, params, session=None):
+        """
+        Sends a command and waits for its response
+
+        :param method: The method of the command
+        :param params: The parameters of the command
+        :param session: The session of the page to send the command to, or None for the browser
+        :return: The result of the command
+        """
+        self._id += 1
+        message = {'id': self._id, 'method': method, 'params': params}
+        if session:
+            message['sessionId'] = session
+        self._commands.write(json.dumps(message).encode('utf-8') + b'\0')
+        self._commands.flush()
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._id in self._received, _change_timeout):
+                raise Exception("The browser didn't respond to " + method)
+            response = self._received.pop(self._id)
+
+        if 'error' in response:
+            raise Exception(method + ' failed, ' + response['error']['message'])
+        return response['result']
+
+    def evaluate(self, expression):
+        """
+        Evaluates an expression in the page
+
+        :param expression: The javascript expression
+        :return: The value, or None if the page was between documents or the expression threw
+        """
+        try:
+            result = self._send('Runtime.evaluate', {'expression': expression, 'returnByValue': True}, self._session)
+        except Exception:
+            # The page is reloading
+            return None
+        if 'exceptionDetails' in result:
+            return None
+        return result['result'].get('value')
+
+    def close(self):
+        """
+        Closes the browser
+
+        :return: Nothing
+        """
+        self._process.kill()
+        self._process.wait()
+        self._commands.close()
+        self._reader.join()
+        self._responses.close()
+        self._profile.cleanup()
+
+
+class _DevServer:
+    """
+    The dev server, as npm start runs it, in a process group of its own so that the watchers it starts are stopped
+    with it
+    """
+    def __init__(self, full_reload):
+        """
+        :param full_reload: True to reload the whole page on every change rather than replacing modules
+        """
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        self.url = 'http://localhost:{}/'.format(port)
+
+        environment = dict(os.environ)
+        if full_reload:
+            environment['FULL_RELOAD'] = '1'
+
+        self._process = subprocess.Popen(
+            [os.path.join('node_modules', '.bin', 'webpack-dev-server'), '--mode', 'development', '--port', str(port)],
+            cwd=_root_directory, env=environment, stdout=subprocess.DEVNULL, start_new_session=True
+        )
+
+        # Wait for the first build, the dev server holds requests for the bundle until it is built
+        deadline = time.time() + _startup_timeout
+        while True:
+            try:
+                with urllib.request.urlopen(self.url + 'app.js'):
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                if time.time() > deadline or self._process.poll() is not None:
+                    self.close()
+                    raise Exception("The dev server didn't start, run npm start to see why")
+                time.sleep(0.5)
+
+    def close(self):
+        """
+        Stops the dev server
+
+        :return: Nothing
+        """
+        if self._process.poll() is None:
+            os.killpg(self._process.pid, signal.SIGTERM)
+        self._process.wait()
+
+
+def _wait_for_render(browser, value, since):
+    """
+    Waits for the application to render after the change with the value has run
+
+    :param browser: The browser (_Browser)
+    :param value: The value that the change sets on window, or None for the unchanged application
+    :param since: The wall clock time in milliseconds that the render must be after
+    :return: The wall clock time in milliseconds of the render
+    """
+    expression = _rendered_expression.replace('{}', 'undefined' if value is None else str(value))
+    deadline = time.time() + _change_timeout
+    while time.time() < deadline:
+        rendered = browser.evaluate(expression)
+        if rendered and rendered > since:
+            return rendered
+        time.sleep(_poll_interval)
+    raise Exception("The application didn't render the change within " + str(_change_timeout) + 's')
+
+
+def _measure(browser_path, full_reload, runs, originals, counter):
+    """
+    Saves each module runs times under a dev server, measuring how long each save takes to show
+
+    :param browser_path: The path of chrome or chromium
+    :param full_reload: True to reload the whole page on every change rather than replacing modules
+    :param runs: The number of saves of each module
+    :param originals: The original source of each module, keyed by its path in src
+    :param counter: The iterator of the values that changes set
+    :return: The list of milliseconds for each module
+    """
+    server = _DevServer(full_reload)
+    try:
+        browser = _Browser(browser_path, server.url)
+        try:
+            _wait_for_render(browser, None, 0)
+
+            timings = tuple([] for module in _modules)
+            for i in range(runs):
+                # Alternate the modules, so that they see the same conditions
+                for (name, path), measured in zip(_modules, timings):
+                    value = next(counter)
+                    saved = time.time() * 1000
+                    with open(os.path.join(source_directory, path), 'w') as f:
+                        f.write(originals[path] + _change.format(value))
+                    measured.append(_wait_for_render(browser, value, saved) - saved)
+                    time.sleep(_settle)
+            return timings
+        finally:
+            browser.close()
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks hot module replacement against reloading the whole page')
+    parser.add_argument('--runs', type=int, default=_default_runs, help='the saves of each module in each mode')
+    parser.add_argument('--browser', help='the path of chrome or chromium')
+    arguments = parser.parse_args()
+
+    # Find the browser
+    browser_path = arguments.browser or next(filter(None, (shutil.which(name) for name in _browsers)), None)
+    if not browser_path:
+        parser.error('chrome or chromium was not found on the path, pass its path with --browser')
+
+    # Confirm that the dev server can run
+    if not os.path.isfile(os.path.join(_root_directory, 'node_modules', '.bin', 'webpack-dev-server')):
+        parser.error('webpack-dev-server is not installed, run npm install first')
+
+    # Keep the original modules, to restore them afterwards
+    originals = {}
+    for name, path in _modules:
+        with open(os.path.join(source_directory, path)) as f:
+            originals[path] = f.read()
+
+    counter = iter(range(1, 2 ** 31))
+    results = []
+    try:
+        for mode, full_reload in (('hot', False), ('full reload', True)):
+            results.append((mode, _measure(browser_path, full_reload, arguments.runs, originals, counter)))
+    finally:
+        for path, source in originals.items():
+            with open(os.path.join(source_directory, path), 'w') as f:
+                f.write(source)
+
+    print('Milliseconds from saving a module until the application rendered it, median (max) of {} saves\n'.format(
+        arguments.runs
+    ))
+    print('{:<12} {:>20} {:>20}'.format('', *(name + ' module' for name, path in _modules)))
+    for mode, timings in results:
+        print('{:<12} {:>20} {:>20}'.format(mode, *(
+            '{:.0f} ({:.0f})'.format(statistics.median(measured), max(measured)) for measured in timings
+        )))
@@ -0,0 +1,121 @@
+# Benchmarks how long lib.flux.journal.ActionJournal takes to seek, for several snapshot intervals. This is run by
+# CPython (see lib.react.reference) and is not part of the application bundle.
+#
+# A store of records is filled, then a history of actions that each update one record is recorded. The journal then
+# seeks to random positions in the history, as time travel and undo/redo do, and each seek is timed. With a snapshot
+# interval as long as the history, every seek replays from the start, which is how the cost grows without snapshots.
+# Shorter intervals replay fewer actions but take more snapshots as actions are recorded, so the time spent recording
+# each action is reported too.
+#
+# Usage: python tools/benchmark_journal.py [--actions N] [--records N] [--intervals N [N ...]] [--seeks N]
+import argparse
+import random
+import time
+
+import source_path  # noqa: F401
+
+from lib.flux.dispatcher import Action, AppDispatcher
+from lib.flux.entity_store import EntityStore
+from lib.flux.journal import ActionJournal
+
+# The default number of actions in the history
+_default_actions = 10000
+
+# The default number of records in the store
+_default_records = 1000
+
+# The default snapshot intervals, besides one as long as the history
+_default_intervals = [1000, 100, 10]
+
+# The default number of seeks timed
+_default_seeks = 200
+
+
+class _Record:
+    """
+    The record being stored
+    """
+    def __init__(self, id, value):
+        self.id = id
+        self.value = value
+
+
+class _RecordChangedAction(Action):
+    """
+    Changes the value of a record
+    """
+    def __init__(self, record_id, value):
+        self.record_id = record_id
+        self.value = value
+
+
+class _RecordStore(EntityStore):
+    """
+    A store of records, that handles the changes to them
+    """
+    def handle_message(self, message):
+        message.first(_RecordChangedAction, self._handle_change).if_any_matched(self.on_change)
+
+    def _handle_change(self, action):
+        self.upsert([_Record(action.record_id, action.value)])
+
+
+def _percentile(ordered, percentile):
+    """
+    :param ordered: A sorted list of values
+    :param percentile: The percentile, between 0 and 100
+    :return: The value at the percentile, by the nearest rank
+    """
+    return ordered[max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))]
+
+
+def _benchmark(actions, records, interval, seeks):
+    """
+    Records a history with a snapshot interval, then times seeks to random positions in it
+
+    :return: The microseconds to record each action, and the sorted milliseconds of each seek
+    """
+    generator = random.Random(1)
+    dispatcher = AppDispatcher()
+    store = _RecordStore(dispatcher)
+    store.upsert([_Record(i, 0) for i in range(records)])
+
+    # The journal retains the whole history, rounded up to a multiple of the interval
+    journal = ActionJournal(dispatcher, [store], interval, (actions + interval - 1) // interval * interval)
+
+    start = time.perf_counter()
+    for i in range(actions):
+        dispatcher.handle_view_action(_RecordChangedAction(generator.randrange(records), i))
+    recording = (time.perf_counter() - start) * 1000000 / actions
+
+    timings = []
+    for i in range(seeks):
+        position = generator.randint(journal.start, journal.end)
+        start = time.perf_counter()
+        journal.seek(position)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return recording, sorted(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks ActionJournal seeks for several snapshot intervals')
+    parser.add_argument('--actions', type=int, default=_default_actions, help='the number of actions in the history')
+    parser.add_argument('--records', type=int, default=_default_records, help='the number of records in the store')
+    parser.add_argument(
+        '--intervals', type=int, nargs='+', default=_default_intervals, help='the snapshot intervals to compare'
+    )
+    parser.add_argument('--seeks', type=int, default=_default_seeks, help='the number of seeks timed')
+    arguments = parser.parse_args()
+
+    print('{} actions, {} records, {} seeks\n'.format(arguments.actions, arguments.records, arguments.seeks))
+    print('{:<20} {:>14} {:>10} {:>10} {:>10} {:>10}'.format(
+        'snapshot interval', 'record (us)', 'mean (ms)', 'p50 (ms)', 'p99 (ms)', 'max (ms)'
+    ))
+    for interval in [arguments.actions] + arguments.intervals:
+        recording, timings = _benchmark(arguments.actions, arguments.records, interval, arguments.seeks)
+        name = '{} (from start)'.format(interval) if interval == arguments.actions else str(interval)
+        print('{:<20} {:>14.2f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}'.format(
+            name, recording, sum(timings) / len(timings), _percentile(timings, 50), _percentile(timings, 99),
+            timings[-1]
+        ))
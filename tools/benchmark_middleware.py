@@ -0,0 +1,108 @@
+# Benchmarks the cost of dispatching an action through the middleware of lib.flux.dispatcher.AppDispatcher. This is run
+# by CPython (see lib.react.reference) and is not part of the application bundle.
+#
+# A view action is dispatched to the counter store by the dispatcher as it was before middleware (the baseline), with
+# no middleware, and with chains of middleware that pass every message on unchanged. The same chains are then restricted to an action class that is never dispatched, so every
+# middleware is skipped by its class check. Each dispatch is timed, and the cost of each middleware is the difference
+# from dispatching without middleware divided by the length of the chain. The fastest of --repeats runs is reported,
+# as the differences are small enough to be lost in the noise of a single run.
+#
+# Usage: python tools/benchmark_middleware.py [--counts N [N ...]] [--dispatches N] [--repeats N]
+import argparse
+import time
+
+import source_path  # noqa: F401
+
+from actions.actions import ButtonClickedAction, StoreInitialisedAction
+from lib.flux.dispatcher import AppDispatcher, DispatcherMessage, MessageSourceOptions
+from stores.store import MyStore
+
+# The default lengths of the middleware chains
+_default_counts = [0, 1, 2, 4, 8]
+
+# The default number of dispatches that are timed
+_default_dispatches = 100000
+
+# The default number of times that each chain is timed
+_default_repeats = 5
+
+
+class _BaselineDispatcher(AppDispatcher):
+    """
+    Dispatches view actions as AppDispatcher did before it had middleware, delivering to the dispatchers directly
+    """
+    def handle_view_action(self, action):
+        assert action
+
+        message = DispatcherMessage(MessageSourceOptions.view, action)
+        for dispatcher in self._dispatchers:
+            dispatcher(message)
+        for work in message.work[::-1]:
+            self._scheduler.schedule(work, True)
+
+
+def _pass_through(message, following):
+    """
+    Middleware that passes every message on unchanged
+    """
+    following(message)
+
+
+def _benchmark(count, action_classes, dispatches, repeats, dispatcher_class=AppDispatcher):
+    """
+    Dispatches through a chain of middleware
+
+    :param count: The number of middleware in the chain
+    :param action_classes: The action classes that the middleware is restricted to, or None for every action
+    :param dispatcher_class: The class of the dispatcher
+    :return: The mean nanoseconds per dispatch of the fastest run
+    """
+    return min(_run(count, action_classes, dispatches, dispatcher_class) for i in range(repeats))
+
+
+def _run(count, action_classes, dispatches, dispatcher_class):
+    """
+    Times one run of dispatches through a chain of middleware
+
+    :return: The mean nanoseconds per dispatch
+    """
+    dispatcher = dispatcher_class()
+    store = MyStore(dispatcher)
+    for i in range(count):
+        dispatcher.use(_pass_through, action_classes)
+
+    action = ButtonClickedAction(True)
+    start = time.perf_counter()
+    for i in range(dispatches):
+        dispatcher.handle_view_action(action)
+    duration = (time.perf_counter() - start) * 1000000000 / dispatches
+
+    # Check that every dispatch reached the store
+    assert store.count == 100 + dispatches
+
+    return duration
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the cost of dispatching through middleware')
+    parser.add_argument('--counts', type=int, nargs='+', default=_default_counts, help='the lengths of the chains')
+    parser.add_argument('--dispatches', type=int, default=_default_dispatches, help='the number of dispatches')
+    parser.add_argument('--repeats', type=int, default=_default_repeats, help='the runs of each chain')
+    arguments = parser.parse_args()
+
+    print('{} dispatches (ns per dispatch, and per middleware)\n'.format(arguments.dispatches))
+    print('{:<12} {:>10} {:>14} {:>10} {:>14}'.format(
+        'middleware', 'called', 'per middleware', 'skipped', 'per middleware'
+    ))
+    print('{:<12} {:>10.0f}'.format(
+        'baseline', _benchmark(0, None, arguments.dispatches, arguments.repeats, _BaselineDispatcher)
+    ))
+    baseline = _benchmark(0, None, arguments.dispatches, arguments.repeats)
+    for count in arguments.counts:
+        called = _benchmark(count, None, arguments.dispatches, arguments.repeats)
+        skipped = _benchmark(count, [StoreInitialisedAction], arguments.dispatches, arguments.repeats)
+        print('{:<12} {:>10.0f} {:>14.0f} {:>10.0f} {:>14.0f}'.format(
+            count,
+            called, (called - baseline) / count if count else 0,
+            skipped, (skipped - baseline) / count if count else 0
+        ))
@@ -0,0 +1,155 @@
+# Benchmarks the longest main thread task while a store loads a large batch of records, handling the whole action at
+# once against handling it in slices (see lib.flux.scheduler). This is run by CPython (see lib.react.reference) and is
+# not part of the application bundle.
+#
+# The records arrive from the server as one action, in a task of its own, and the user clicks as they start loading.
+# Each callback queued on the reference host stands in for a task of the browser's event loop, and is timed. A click
+# is handled in the first task after it is queued, so its delay is how long the user waits for the page to respond,
+# and another click is queued as soon as it has been handled until the records have loaded.
+#
+# CPython's cyclic garbage collector pauses for tens of milliseconds once this many records are alive, where a browser
+# collects incrementally, so it is paused while the tasks are timed.
+#
+# Usage: python tools/benchmark_scheduler.py [--records N] [--chunk N] [--budget MS]
+import argparse
+import gc
+import json
+
+import source_path  # noqa: F401
+
+from actions.actions import ButtonClickedAction
+from lib.flux.dispatcher import Action, AppDispatcher
+from lib.flux.entity_store import EntityStore
+from lib.flux.scheduler import Scheduler
+from lib.react.reference.host import now, request_callback, run_pending
+from stores.store import MyStore
+
+# The default number of records loaded
+_default_records = 100000
+
+# The default number of records parsed between each yield of the sliced load
+_default_chunk = 500
+
+# The default budget of each slice in milliseconds
+_default_budget = 5
+
+
+class _RecordsLoadedAction(Action):
+    """
+    Dispatched as a server action with the rows of every record, as json
+    """
+    def __init__(self, rows):
+        self.rows = rows
+
+
+class _Record:
+    """
+    A record parsed from a row
+    """
+    def __init__(self, id, owner_id, title):
+        self.id = id
+        self.owner_id = owner_id
+        self.title = title
+
+
+class _RecordStore(EntityStore):
+    """
+    Parses the rows in to records, all at once or in chunks
+    """
+    def __init__(self, dispatcher, sliced, chunk):
+        super().__init__(dispatcher, {'by_owner': lambda record: record.owner_id})
+        self._sliced = sliced
+        self._chunk = chunk
+        self.loaded = False
+
+    def handle_message(self, message):
+        if self._sliced:
+            message.first_sliced(_RecordsLoadedAction, self._load_in_chunks).if_any_matched(self._on_loaded)
+        else:
+            message.first(_RecordsLoadedAction, self._load).if_any_matched(self._on_loaded)
+
+    def _parse(self, rows):
+        records = []
+        for row in rows:
+            data = json.loads(row)
+            records.append(_Record(data['id'], data['owner'], data['title']))
+        self.upsert(records)
+
+    def _load(self, action):
+        self._parse(action.rows)
+
+    def _load_in_chunks(self, action):
+        for i in range(0, len(action.rows), self._chunk):
+            self._parse(action.rows[i:i + self._chunk])
+            yield
+
+    def _on_loaded(self):
+        self.loaded = True
+        self.on_change()
+
+
+def _benchmark(sliced, rows, chunk, budget):
+    """
+    Loads the rows while clicking, timing every task
+
+    :return: The number of tasks, the longest task, the longest click delay and the number of clicks handled while
+        loading, in milliseconds, and the longest slice the scheduler recorded
+    """
+    dispatcher = AppDispatcher(Scheduler(budget))
+    records = _RecordStore(dispatcher, sliced, chunk)
+    counter = MyStore(dispatcher)
+    delays = []
+
+    def click():
+        queued = now()
+
+        def handle():
+            dispatcher.handle_view_action(ButtonClickedAction(True))
+            delays.append(now() - queued)
+            if not records.loaded:
+                click()
+
+        request_callback(handle)
+
+    request_callback(lambda: dispatcher.handle_server_action(_RecordsLoadedAction(rows)))
+    click()
+
+    tasks = []
+    gc.disable()
+    try:
+        while True:
+            start = now()
+            if not run_pending(1):
+                break
+            tasks.append(now() - start)
+    finally:
+        gc.enable()
+
+    # Check that every record loaded and every click counted
+    assert records.count == len(rows)
+    assert counter.count == 100 + len(delays)
+
+    return len(tasks), max(tasks), max(delays), len(delays), dispatcher.scheduler.longest_slice
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the longest task while loading records, with slicing')
+    parser.add_argument('--records', type=int, default=_default_records, help='the number of records loaded')
+    parser.add_argument('--chunk', type=int, default=_default_chunk, help='the records parsed between yields')
+    parser.add_argument('--budget', type=float, default=_default_budget, help='the budget of each slice in ms')
+    arguments = parser.parse_args()
+
+    loaded_rows = [
+        json.dumps({'id': i, 'owner': i % 100, 'title': 'Record {}'.format(i)}) for i in range(arguments.records)
+    ]
+
+    print('{} records, slices of {}ms parsing {} records per chunk\n'.format(
+        arguments.records, arguments.budget, arguments.chunk
+    ))
+    print('{:<10} {:>8} {:>18} {:>18} {:>8} {:>18}'.format(
+        '', 'tasks', 'longest task (ms)', 'worst delay (ms)', 'clicks', 'longest slice (ms)'
+    ))
+    for name, sliced in (('at once', False), ('sliced', True)):
+        print('{:<10} {:>8} {:>18.1f} {:>18.1f} {:>8} {:>18.1f}'.format(
+            name, *_benchmark(sliced, loaded_rows, arguments.chunk, arguments.budget)
+        ))
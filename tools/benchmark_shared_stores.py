@@ -0,0 +1,253 @@
+# Benchmarks lib.flux.shared.SharedStores against every tab keeping its own server connection and stores. This is run
+# by CPython (see lib.react.reference) and is not part of the application bundle.
+#
+# Several tabs are run in this process, each with its own dispatcher and stores, connected by the broadcast channel
+# and interval stand-ins of the reference host. A stand-in server feed sends batches of rows that a store parses in to
+# records, and clicks are made in random tabs. Without sharing, every tab connects to the feed and parses every batch.
+# With sharing, only the leader connects and the followers apply the records it sends them. Half way through, the
+# leader's tab is closed, and the feed resumes from where it was for the next leader.
+#
+# The number of server connections and the cpu time spent by each tab are reported, and the state of every tab is
+# checked against the state without sharing.
+#
+# Usage: python tools/benchmark_shared_stores.py [--tabs N] [--batches N] [--rows N]
+import argparse
+import json
+import random
+import time
+
+import source_path  # noqa: F401
+
+from actions.actions import ButtonClickedAction
+from lib.flux.dispatcher import Action, AppDispatcher
+from lib.flux.entity_store import EntityStore
+from lib.flux.shared import SharedStores
+from lib.react.reference.host import run_intervals, run_pending
+from stores.store import MyStore
+
+# The default number of tabs
+_default_tabs = 8
+
+# The default number of batches the feed sends
+_default_batches = 200
+
+# The default number of rows in each batch
+_default_rows = 50
+
+# The number of distinct records that the rows update
+_records = 2000
+
+# The number of values in each row, that the store derives a score from
+_values = 50
+
+
+class _RowsReceivedAction(Action):
+    """
+    Dispatched as a server action when the feed sends a batch of rows
+    """
+    def __init__(self, rows):
+        """
+        :param rows: The list of rows, each as json
+        """
+        self.rows = rows
+
+
+class _Record:
+    """
+    A record parsed from a row
+    """
+    def __init__(self, id, owner_id, score):
+        self.id = id
+        self.owner_id = owner_id
+        self.score = score
+
+
+class _RecordStore(EntityStore):
+    """
+    Parses the rows from the feed in to records, indexed by owner
+    """
+    def __init__(self, dispatcher):
+        super().__init__(dispatcher, {'by_owner': lambda record: record.owner_id})
+
+    def handle_message(self, message):
+        message.first(_RowsReceivedAction, self._handle_rows).if_any_matched(self.on_change)
+
+    def _handle_rows(self, action):
+        records = []
+        for row in action.rows:
+            data = json.loads(row)
+            records.append(_Record(data['id'], data['owner'], sum(value * value for value in data['values'])))
+        self.upsert(records)
+
+
+class _Feed:
+    """
+    Stands in for the server feed, delivering batches to every connected dispatcher. Batches sent while nobody is
+    connected are delivered to the next connection, as a feed that resumes from a cursor would
+    """
+    def __init__(self):
+        self.connected = []
+        self.connections = 0
+        self.most_connected = 0
+        self._backlog = []
+
+    def connect(self, dispatcher):
+        self.connected.append(dispatcher)
+        self.connections += 1
+        self.most_connected = max(self.most_connected, len(self.connected))
+
+        for rows in self._backlog:
+            dispatcher.handle_server_action(_RowsReceivedAction(rows))
+        self._backlog = []
+
+        return lambda: self.connected.remove(dispatcher)
+
+    def send(self, rows):
+        if not self.connected:
+            self._backlog.append(rows)
+        for dispatcher in list(self.connected):
+            dispatcher.handle_server_action(_RowsReceivedAction(rows))
+
+
+class _Tab:
+    """
+    A tab of the application, with its own dispatcher and stores, and the cpu time spent in it
+    """
+    def __init__(self, index, feed, shared):
+        self.cpu = 0
+        self.dispatcher = AppDispatcher()
+        self.records = _RecordStore(self.dispatcher)
+        self.counter = MyStore(self.dispatcher)
+        self.shared = None
+
+        if shared:
+            self.shared = SharedStores(
+                self.dispatcher, [self.records, self.counter], 'benchmark', [ButtonClickedAction],
+                self._timed(feed.connect), index
+            )
+
+            # Count the time the tab spends handling messages from the other tabs, ticking and sending changes
+            for name in ('_receive', 'tick', '_send_changes'):
+                setattr(self.shared, name, self._timed(getattr(self.shared, name)))
+            self.shared.start()
+        else:
+            self._timed(feed.connect)(self.dispatcher)
+
+        # Count the time the tab spends handling actions, including those from the feed
+        self.dispatcher.use(lambda message, following: self._timed(following)(message))
+
+    def _timed(self, fn):
+        """
+        Wraps a function so that the cpu time spent in it is added to the tab, calls within it are only counted once
+        """
+        def timed(*args):
+            if getattr(self, '_timing', False):
+                return fn(*args)
+
+            self._timing = True
+            start = time.process_time()
+            try:
+                return fn(*args)
+            finally:
+                self.cpu += time.process_time() - start
+                self._timing = False
+
+        return timed
+
+    def click(self, increase):
+        self.dispatcher.handle_view_action(ButtonClickedAction(increase))
+
+    def records_state(self):
+        return sorted((record.id, record.owner_id, record.score) for record in self.records.all())
+
+    def state(self):
+        return self.counter.count, self.records_state()
+
+
+def _run(shared, tabs, batches, rows):
+    """
+    Runs the tabs, with or without sharing
+
+    :return: The feed, the tabs and the tabs that were closed
+    """
+    generator = random.Random(1)
+    feed = _Feed()
+    opened = [_Tab(i, feed, shared) for i in range(tabs)]
+    closed = []
+
+    def live():
+        return [tab for tab in opened if tab not in closed]
+
+    # Let the tabs elect a leader
+    for i in range(5):
+        run_intervals()
+
+    for batch in range(batches):
+        # Close the leader's tab half way through, then give the others time to elect a new leader
+        if shared and batch == batches // 2:
+            leader = [tab for tab in live() if tab.shared.is_leader][0]
+            leader.shared.close()
+            closed.append(leader)
+            for i in range(5):
+                run_intervals()
+
+        feed.send([
+            json.dumps({
+                'id': generator.randrange(_records),
+                'owner': generator.randrange(100),
+                'values': [generator.random() for i in range(_values)],
+            }) for i in range(rows)
+        ])
+
+        # Draw the tab from every tab opened, so that the same rows and clicks are made with and without sharing
+        tab = generator.randrange(tabs)
+        live()[tab % len(live())].click(generator.random() < 0.5)
+        run_pending()
+
+        if batch % 10 == 0:
+            run_intervals()
+
+    run_intervals()
+    return feed, opened, closed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks SharedStores against every tab keeping its own stores')
+    parser.add_argument('--tabs', type=int, default=_default_tabs, help='the number of tabs')
+    parser.add_argument('--batches', type=int, default=_default_batches, help='the number of batches the feed sends')
+    parser.add_argument('--rows', type=int, default=_default_rows, help='the number of rows in each batch')
+    arguments = parser.parse_args()
+
+    # The leader's tab is closed half way through, so there must be another tab to take over
+    if arguments.tabs < 2:
+        parser.error('--tabs must be at least 2')
+
+    independent_feed, independent_tabs, _ = _run(False, arguments.tabs, arguments.batches, arguments.rows)
+    shared_feed, shared_tabs, closed = _run(True, arguments.tabs, arguments.batches, arguments.rows)
+
+    print('{} tabs, {} batches of {} rows\n'.format(arguments.tabs, arguments.batches, arguments.rows))
+    print('{:<12} {:>12} {:>16} {:>16} {:>16}'.format(
+        '', 'connections', 'most at once', 'cpu per tab (ms)', 'cpu total (ms)'
+    ))
+    for name, feed, tabs in (('independent', independent_feed, independent_tabs), ('shared', shared_feed, shared_tabs)):
+        total = sum(tab.cpu for tab in tabs) * 1000
+        print('{:<12} {:>12} {:>16} {:>16.1f} {:>16.1f}'.format(
+            name, feed.connections, feed.most_connected, total / len(tabs), total
+        ))
+
+    print('\nShared cpu by tab (ms):')
+    for tab in shared_tabs:
+        role = 'closed leader' if tab in closed else 'leader' if tab.shared.is_leader else 'follower'
+        print('  tab {:<3} {:<14} {:>8.1f}'.format(tab.shared.tab_id, role, tab.cpu * 1000))
+
+    # Every open tab must end up with the records of the tabs that didn't share, and with the counter changed by the
+    # clicks in every tab, where without sharing each tab only counts its own clicks
+    initial = MyStore(AppDispatcher()).count
+    expected = (
+        initial + sum(tab.counter.count - initial for tab in independent_tabs), independent_tabs[0].records_state()
+    )
+    mismatched = [tab.shared.tab_id for tab in shared_tabs if tab not in closed and tab.state() != expected]
+    if mismatched:
+        print('\nState differs in tabs: ' + ', '.join(str(tab_id) for tab_id in mismatched))
+        raise SystemExit(1)
+    print('\nEvery open tab has the same state')
@@ -0,0 +1,276 @@
+# Benchmarks how long the production build takes to load on a first visit and on repeat visits. This is run by CPython
+# and is not part of the application bundle.
+#
+# The build in dist is served by a local server that stands in for the real one, adding latency to each request and
+# limiting the bandwidth. A stand-in browser loads index.html and then the scripts it loads (a few at a time, as a
+# browser does), keeping an http cache and, when the page registers one, a service worker with the files that the
+# service worker precaches (see build_service_worker.py). Startup is measured until the last script has loaded, script
+# evaluation isn't included as it is the same whatever the caching. Work done after startup, such as the service worker
+# checking for an update and precaching, is reported separately.
+#
+# Each configuration is measured for a first visit and for a repeat visit:
+#
+# * revalidated: every file is served with no-cache, so each visit asks the server about every file, as it did for
+#   the fixed name app.js
+# * hashed: the chunks are served as immutable, so only index.html is asked about
+# * service worker: as hashed, and the service worker answers every request for the page and its chunks
+#
+# If --previous is passed an earlier build, a deploy from it to dist is measured as well. The first visit after the
+# deploy still starts the previous version from the service worker while the new version installs, fetching only the
+# chunks that changed, which the next visit starts.
+#
+# Usage: python tools/benchmark_startup.py [--dist DIRECTORY] [--previous DIRECTORY] [--latency MS] [--bandwidth KBPS]
+#                                        [--connections N]
+import argparse
+import concurrent.futures
+import hashlib
+import http.server
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from build_service_worker import hashed_name, precache_urls, scripts, service_worker_name
+
+# The root of the repository
+_root_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The default latency added to each request, in milliseconds
+_default_latency = 50
+
+# The default bandwidth, in kilobits per second
+_default_bandwidth = 5000
+
+# The default number of requests a browser makes at once to the same server
+_default_connections = 6
+
+
+class _StaticServer:
+    """
+    Serves the files of a build from a background thread, adding latency and limiting bandwidth, and counts the
+    requests made and bytes sent
+    """
+    def __init__(self, directory, immutable, latency, bandwidth):
+        """
+        :param directory: The directory of the build
+        :param immutable: True to serve chunks named by their content as immutable, otherwise every file is no-cache
+        :param latency: The latency added to each request, in milliseconds
+        :param bandwidth: The bandwidth of each response, in kilobits per second
+        """
+        self.directory = directory
+        self.requests = 0
+        self.sent = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.lstrip('/') or 'index.html'
+                path = os.path.join(server.directory, name)
+                if not os.path.isfile(path):
+                    self.send_error(404)
+                    return
+
+                with open(path, 'rb') as f:
+                    body = f.read()
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                not_modified = self.headers.get('If-None-Match') == etag
+
+                # Wait for the round trip, and for the body to arrive
+                time.sleep(latency / 1000 + (0 if not_modified else len(body) * 8 / (bandwidth * 1000)))
+
+                with server._lock:
+                    server.requests += 1
+                    server.sent += 0 if not_modified else len(body)
+
+                self.send_response(304 if not_modified else 200)
+                self.send_header('ETag', etag)
+                if immutable and hashed_name.search(name):
+                    self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+                else:
+                    self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Content-Length', '0' if not_modified else str(len(body)))
+                self.end_headers()
+                if not not_modified:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep the requests out of the output
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        """
+        Returns the url of the root of the application
+        """
+        return 'http://127.0.0.1:{}/'.format(self._server.server_address[1])
+
+    def counts(self):
+        """
+        :return: The number of requests made and bytes sent so far
+        """
+        with self._lock:
+            return self.requests, self.sent
+
+    def close(self):
+        """
+        Stops the server
+
+        :return: Nothing
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class _Browser:
+    """
+    Stands in for a browser visiting the application, with an http cache and a service worker that persist between
+    visits
+    """
+    def __init__(self, server, connections, service_workers):
+        """
+        :param server: The server (_StaticServer)
+        :param connections: The number of requests made at once
+        :param service_workers: True to install the service worker when a page registers it
+        """
+        self._server = server
+        self._connections = connections
+        self._service_workers = service_workers
+
+        # The http cache, the (etag, body, immutable) of each url
+        self._http_cache = {}
+
+        # The installed service worker, and the bodies that it precached keyed by url
+        self._service_worker = None
+        self._precached = {}
+
+    def _fetch(self, url):
+        """
+        Fetches a url through the http cache
+
+        :param url: The url, relative to the root of the application
+        :return: The body
+        """
+        cached = self._http_cache.get(url)
+        if cached and cached[2]:
+            return cached[1]
+
+        request = urllib.request.Request(urllib.parse.urljoin(self._server.url, url))
+        if cached:
+            request.add_header('If-None-Match', cached[0])
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                body = response.read()
+                immutable = 'immutable' in response.headers.get('Cache-Control', '')
+                self._http_cache[url] = (response.headers['ETag'], body, immutable)
+                return body
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            return cached[1]
+
+    def _load(self, url):
+        """
+        Loads a url for the page, from the service worker if it has precached it
+        """
+        if url in self._precached:
+            return self._precached[url]
+        return self._fetch(url)
+
+    def visit(self):
+        """
+        Visits the application, loading the page and its scripts, then leaves it
+
+        :return: The milliseconds, requests and bytes until the last script loaded, and the requests and bytes after
+        """
+        requests, sent = self._server.counts()
+        start = time.perf_counter()
+
+        page = self._load('./').decode('utf-8')
+        with concurrent.futures.ThreadPoolExecutor(self._connections) as executor:
+            list(executor.map(self._load, scripts(page)))
+
+        startup = (time.perf_counter() - start) * 1000
+        startup_requests, startup_sent = self._server.counts()
+
+        # Once the page has loaded it registers the service worker, and the browser asks the server for a new version
+        # of it on every visit
+        if self._service_workers and service_worker_name in page:
+            service_worker = self._fetch(service_worker_name)
+
+            # Install a new version, which takes over once the page has been left
+            if service_worker != self._service_worker:
+                latest = self._fetch('./')
+                self._precached = {'./': latest}
+                for url in precache_urls(latest.decode('utf-8'))[1:]:
+                    self._precached[url] = self._fetch(url)
+                self._service_worker = service_worker
+
+        after_requests, after_sent = self._server.counts()
+        return (
+            startup, startup_requests - requests, startup_sent - sent,
+            after_requests - startup_requests, after_sent - startup_sent
+        )
+
+
+def _measure(directory, immutable, service_workers, arguments, previous=None):
+    """
+    Measures a first visit and a repeat visit, or a deploy from a previous build
+
+    :return: The list of (name, measurements) of each visit
+    """
+    server = _StaticServer(previous or directory, immutable, arguments.latency, arguments.bandwidth)
+    try:
+        browser = _Browser(server, arguments.connections, service_workers)
+        visits = [('first visit', browser.visit()), ('repeat visit', browser.visit())]
+
+        if previous:
+            # Deploy the build, after the browser has visited the previous one
+            server.directory = directory
+            visits = [('visit after deploy', browser.visit()), ('next visit', browser.visit())]
+        return visits
+    finally:
+        server.close()
+
+
+def _print_visits(name, visits):
+    for visit, measured in visits:
+        print('{:<16} {:<20} {:>12.1f} {:>10} {:>12} {:>10} {:>12}'.format(name, visit, *measured))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the startup of the production build on repeat visits')
+    parser.add_argument('--dist', default=os.path.join(_root_directory, 'dist'), help='the directory of the build')
+    parser.add_argument('--previous', help='the directory of an earlier build, to measure a deploy from')
+    parser.add_argument('--latency', type=float, default=_default_latency, help='the latency of each request in ms')
+    parser.add_argument('--bandwidth', type=float, default=_default_bandwidth, help='the bandwidth in kbit/s')
+    parser.add_argument('--connections', type=int, default=_default_connections, help='the requests made at once')
+    arguments = parser.parse_args()
+
+    for directory in (arguments.dist, arguments.previous):
+        if directory and not os.path.isfile(os.path.join(directory, service_worker_name)):
+            parser.error(directory + ' does not contain a production build, run npm run build')
+
+    print('{}ms latency, {}kbit/s, {} connections\n'.format(
+        arguments.latency, arguments.bandwidth, arguments.connections
+    ))
+    print('{:<16} {:<20} {:>12} {:>10} {:>12} {:>10} {:>12}'.format(
+        '', '', 'startup (ms)', 'requests', 'bytes', 'after', 'bytes after'
+    ))
+    _print_visits('revalidated', _measure(arguments.dist, False, False, arguments))
+    _print_visits('hashed', _measure(arguments.dist, True, False, arguments))
+    _print_visits('service worker', _measure(arguments.dist, True, True, arguments))
+
+    if arguments.previous:
+        print()
+        _print_visits('hashed', _measure(arguments.dist, True, False, arguments, arguments.previous))
+        _print_visits('service worker', _measure(arguments.dist, True, True, arguments, arguments.previous))
@@ -0,0 +1,425 @@
+# Optimises the dom elements that components create before transcrypt transpiles them. This is run by CPython before
+# transcrypt (see webpack.config.js and build_parallel.py) and is not part of the application bundle.
+#
+# Transcrypt has no hook for transforming the python it transpiles, so the source is mirrored in to __optimised__ with
+# the calls to the lib.react.dom DOM tag functions rewritten, and transcrypt transpiles the mirror in to __target__:
+#
+# * A call that is entirely constant (literal props without a ref, and literal children or other constant calls), eg
+#   d.hr({'key': 2}), is hoisted to a module level element created once when the module is loaded. Every render then
+#   reuses the same element instead of creating the element, its props and its children again, and react skips
+#   reconciling it since it is the same element as the last render.
+# * Any other call, eg d.p({'key': 3}, self.state.count), calls lib.react.dom.create_dom_element directly rather than
+#   through the function generated for the tag.
+#
+# The rewrite keeps every statement on the line it started on, so source maps and errors still point at the right line
+# of the original source. The hoisted elements are defined on the line that imports DOM. Modules that don't import
+# DOM, or that rebind the name they import it as, are mirrored unchanged. Only files whose content changed are written,
+# so transcrypt still only retranspiles the modules that changed.
+#
+# Usage: python tools/build_constant_elements.py [--measure]
+#
+#   --measure   Also measures the elements created and the memory allocated by each update of the example application,
+#               running it under CPython from the original source and from the optimised mirror
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+from source_path import source_directory
+
+from lib.react.dom import tags
+
+# The directory that the optimised source is mirrored in to
+optimised_directory = os.path.join(source_directory, '__optimised__')
+
+# Directories that are not mirrored
+_skipped_directories = {'__target__', '__optimised__', '__pycache__'}
+
+# The file extensions that transcrypt transpiles or copies
+_mirrored_extensions = {'.py', '.js'}
+
+# The module that defines DOM
+_dom_module = 'lib.react.dom'
+
+# The names the rewritten modules use, a module that already uses these is mirrored unchanged
+_create_name = '_hoisted_create_dom_element'
+_element_prefix = '_hoisted_element_'
+
+
+def _is_constant_value(node):
+    """
+    :param node: An expression
+    :return: True if the expression is a literal that is the same every time it is evaluated
+    """
+    if isinstance(node, ast.Constant):
+        return True
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return all(_is_constant_value(element) for element in node.elts)
+    if isinstance(node, ast.Dict):
+        return all(
+            isinstance(key, ast.Constant) and _is_constant_value(value) for key, value in zip(node.keys, node.values)
+        )
+    return False
+
+
+class _Rewriter:
+    """
+    Finds the DOM tag calls in a module and works out how each should be rewritten
+    """
+    def __init__(self, source, dom_name):
+        """
+        :param source: The source of the module
+        :param dom_name: The name that the module imports DOM as
+        """
+        self._source = source
+        self._dom_name = dom_name
+
+        # The offsets in the source of the start of each line
+        self._line_offsets = [0]
+        for line in source.splitlines(True):
+            self._line_offsets.append(self._line_offsets[-1] + len(line))
+
+        # The replacements to make, as (start offset, end offset, text)
+        self.replacements = []
+
+        # The source of each hoisted element, in the order they were found
+        self.hoisted = []
+
+    def offset(self, line, column):
+        """
+        :return: The offset in the source of a line and column from the syntax tree
+        """
+        # Columns from the syntax tree are utf-8 byte offsets
+        text = self._source[self._line_offsets[line - 1]:self._line_offsets[line]]
+        return self._line_offsets[line - 1] + len(text.encode('utf-8')[:column].decode('utf-8'))
+
+    def _tag_of(self, node):
+        """
+        :param node: An expression
+        :return: The tag if the expression is a call of a DOM tag function that can be rewritten, otherwise None
+        """
+        if not (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and
+            isinstance(node.func.value, ast.Name) and node.func.value.id == self._dom_name and
+            node.func.attr in tags
+        ):
+            return None
+
+        # Only calls with the props, and optionally the children, passed positionally can be rewritten
+        if node.keywords or not 1 <= len(node.args) <= 2 or any(isinstance(a, ast.Starred) for a in node.args):
+            return None
+
+        return node.func.attr
+
+    def _is_constant_child(self, node):
+        """
+        :param node: An expression passed as children
+        :return: True if the children are the same every time they are evaluated
+        """
+        if self._tag_of(node):
+            return self._is_constant_element(node)
+        if isinstance(node, ast.Constant):
+            return True
+        if isinstance(node, ast.List):
+            return all(self._is_constant_child(element) for element in node.elts)
+        return False
+
+    def _is_constant_element(self, node):
+        """
+        :param node: A DOM tag call
+        :return: True if the call creates the same element every time it is evaluated
+        """
+        props = node.args[0]
+
+        # A string ref belongs to the component that rendered it, so an element with a ref can't be shared
+        if isinstance(props, ast.Dict) and any(isinstance(k, ast.Constant) and k.value == 'ref' for k in props.keys):
+            return False
+
+        constant_props = (isinstance(props, ast.Constant) and props.value is None) or (
+            isinstance(props, ast.Dict) and _is_constant_value(props)
+        )
+        return constant_props and all(self._is_constant_child(child) for child in node.args[1:])
+
+    def _direct_call(self, node, tag):
+        """
+        Returns the source of a DOM tag call rewritten as a direct call, with any nested calls also rewritten
+
+        :param node: The DOM tag call
+        :param tag: The tag
+        :return: The source
+        """
+        call = ast.Call(
+            func=ast.Name(id=_create_name, ctx=ast.Load()),
+            args=[ast.Constant(value=tag)] + [_DirectCalls(self).visit(arg) for arg in node.args],
+            keywords=[],
+        )
+        return ast.unparse(call)
+
+    def _replace(self, node, text):
+        """
+        Replaces the source of an expression, padding the replacement so that the following lines don't move
+
+        :param node: The expression to replace
+        :param text: The replacement
+        :return: Nothing
+        """
+        newlines = node.end_lineno - node.lineno
+        if newlines:
+            text = '(' + text + '\n' * newlines + ')'
+
+        self.replacements.append((
+            self.offset(node.lineno, node.col_offset), self.offset(node.end_lineno, node.end_col_offset), text
+        ))
+
+    def visit(self, node):
+        """
+        Finds the calls to rewrite in a syntax tree, hoisting the largest constant calls and rewriting the calls around
+        them as direct calls
+
+        :param node: The syntax tree
+        :return: Nothing
+        """
+        tag = self._tag_of(node)
+        if tag and self._is_constant_element(node):
+            # Hoist the whole call, including any calls in its children
+            self._replace(node, _element_prefix + str(len(self.hoisted)))
+            self.hoisted.append(self._direct_call(node, tag))
+            return
+
+        if tag:
+            # Call create_dom_element in place of the tag function, passing the tag before the existing arguments
+            self._replace(node.func, _create_name)
+            open_paren = self._source.index('(', self.offset(node.func.end_lineno, node.func.end_col_offset))
+            self.replacements.append((open_paren + 1, open_paren + 1, repr(tag) + ', '))
+
+        for child in ast.iter_child_nodes(node):
+            self.visit(child)
+
+
+class _DirectCalls(ast.NodeTransformer):
+    """
+    Rewrites the DOM tag calls in a constant element as direct calls, for the source of a hoisted element
+    """
+    def __init__(self, rewriter):
+        self._rewriter = rewriter
+
+    def visit_Call(self, node):
+        tag = self._rewriter._tag_of(node)
+        if not tag:
+            return self.generic_visit(node)
+
+        return ast.Call(
+            func=ast.Name(id=_create_name, ctx=ast.Load()),
+            args=[ast.Constant(value=tag)] + [self.visit(arg) for arg in node.args],
+            keywords=[],
+        )
+
+
+def _dom_import(tree):
+    """
+    Finds the top level import of DOM in a module
+
+    :param tree: The syntax tree of the module
+    :return: The import statement and the name DOM is imported as, or (None, None) if the module doesn't import DOM
+    """
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == _dom_module and not node.level:
+            for alias in node.names:
+                if alias.name == 'DOM':
+                    return node, alias.asname or alias.name
+    return None, None
+
+
+def _is_rebound(tree, name):
+    """
+    :param tree: The syntax tree of a module
+    :param name: A name imported at the top level of the module
+    :return: True if the module binds the name anywhere else, so calls through it might not be DOM tag calls
+    """
+    bindings = 0
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)) and node.id == name:
+            bindings += 1
+        elif isinstance(node, ast.arg) and node.arg == name:
+            bindings += 1
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == name:
+            bindings += 1
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            bindings += len([a for a in node.names if (a.asname or a.name.split('.')[0]) == name])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)) and name in node.names:
+            bindings += 1
+
+    # The import of DOM itself is the only binding allowed
+    return bindings > 1
+
+
+def optimise_source(source, path='<module>'):
+    """
+    Rewrites the DOM tag calls in the source of a module
+
+    :param source: The source of the module
+    :param path: The path of the module, for syntax errors
+    :return: The rewritten source, or the source unchanged if there is nothing to rewrite
+    """
+    tree = ast.parse(source, path)
+
+    dom_import, dom_name = _dom_import(tree)
+    if not dom_import or _is_rebound(tree, dom_name) or _create_name in source or _element_prefix in source:
+        return source
+
+    rewriter = _Rewriter(source, dom_name)
+    rewriter.visit(tree)
+    if not rewriter.replacements:
+        return source
+
+    # Define the direct call and the hoisted elements at the end of the line that imports DOM
+    definitions = ['from {} import create_dom_element as {}'.format(_dom_module, _create_name)] + [
+        '{}{} = {}'.format(_element_prefix, i, element) for i, element in enumerate(rewriter.hoisted)
+    ]
+    end = rewriter.offset(dom_import.end_lineno, dom_import.end_col_offset)
+    rewriter.replacements.append((end, end, '; ' + '; '.join(definitions)))
+
+    # Make the replacements from the end of the source, so that the offsets of the earlier ones don't change
+    for start, finish, text in sorted(rewriter.replacements, key=lambda r: (r[0], r[1]), reverse=True):
+        source = source[:start] + text + source[finish:]
+
+    return source
+
+
+def _write_if_changed(path, content):
+    """
+    Writes a file, unless it already has the content
+
+    :return: Nothing
+    """
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def optimise():
+    """
+    Mirrors the source in to __optimised__, rewriting the DOM tag calls of every python module
+
+    :return: Nothing
+    """
+    mirrored = set()
+    for directory, directories, files in os.walk(source_directory):
+        relative_directory = os.path.relpath(directory, source_directory)
+        directories[:] = sorted(
+            d for d in directories if os.path.normpath(os.path.join(relative_directory, d)) not in _skipped_directories
+        )
+
+        for name in sorted(files):
+            extension = os.path.splitext(name)[1]
+            if extension not in _mirrored_extensions:
+                continue
+
+            relative_path = os.path.normpath(os.path.join(relative_directory, name))
+            with open(os.path.join(source_directory, relative_path), 'rb') as f:
+                content = f.read()
+
+            if extension == '.py':
+                content = optimise_source(content.decode('utf-8'), relative_path).encode('utf-8')
+
+            _write_if_changed(os.path.join(optimised_directory, relative_path), content)
+            mirrored.add(relative_path)
+
+    # Remove anything that is no longer in the source
+    for directory, directories, files in os.walk(optimised_directory):
+        for name in files:
+            path = os.path.join(directory, name)
+            if os.path.relpath(path, optimised_directory) not in mirrored:
+                os.remove(path)
+
+
+# Runs the example application under CPython from a source directory, and prints the elements created and memory
+# allocated by each update
+_measure_script = '''
+import sys
+import tracemalloc
+
+from actions.actions import StoreInitialisedAction
+from components.app import App
+from lib.flux.dispatcher import AppDispatcher
+from lib.react.components.store_provider import StoreProvider
+from lib.react.react import React
+from lib.react.reference import react
+from lib.react.reference.host import run_pending
+from lib.react.reference.react_dom import HostContainer
+from stores.store import MyStore
+
+updates = int(sys.argv[1])
+
+# Count the elements created
+created = [0]
+create_element = react.createElement
+def counting_create_element(*args):
+    created[0] += 1
+    return create_element(*args)
+react.createElement = counting_create_element
+
+dispatcher = AppDispatcher()
+store = MyStore(dispatcher)
+container = HostContainer('container')
+React.render(StoreProvider(store, dispatcher, App()), container)
+dispatcher.handle_view_action(StoreInitialisedAction(store))
+run_pending()
+buttons = container.find_all('button')
+
+# Warm up, then measure the memory allocated during each update
+for i in range(100):
+    buttons[i % 2].dispatch('onClick')
+    run_pending()
+
+created[0] = 0
+allocated = 0
+tracemalloc.start()
+for i in range(updates):
+    start = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    buttons[i % 2].dispatch('onClick')
+    run_pending()
+    allocated += tracemalloc.get_traced_memory()[1] - start
+tracemalloc.stop()
+
+print(created[0] / updates, allocated / updates)
+'''
+
+
+def measure(updates=1000):
+    """
+    Measures the elements created and the memory allocated by each update of the example application, from the
+    original source and from the optimised mirror
+
+    :param updates: The number of updates to measure
+    :return: Nothing
+    """
+    results = []
+    for name, directory in (('original', source_directory), ('optimised', optimised_directory)):
+        result = subprocess.run(
+            [sys.executable, '-c', _measure_script, str(updates)],
+            cwd=directory, check=True, stdout=subprocess.PIPE, universal_newlines=True
+        )
+        results.append((name, ) + tuple(float(value) for value in result.stdout.split()))
+
+    print('Per update of the example application ({} updates):'.format(updates))
+    for name, elements, allocated in results:
+        print('  {:<10} {:>6.1f} elements created {:>10.0f} bytes allocated at peak'.format(name, elements, allocated))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Optimises the dom elements that components create')
+    parser.add_argument('--measure', action='store_true', help='measure the effect on the example application')
+    arguments = parser.parse_args()
+
+    optimise()
+
+    if arguments.measure:
+        measure()
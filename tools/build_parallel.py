@@ -0,0 +1,319 @@
+# Transpiles the application with several transcrypt processes at once, producing the same __target__ as a full serial
+# build (transcrypt -b). This is run by CPython (see webpack.config.js) and is not part of the application bundle.
+#
+# The source is optimised by build_constant_elements.py first, and the optimised mirror of the source is transpiled.
+#
+# Transcrypt always transpiles a main module together with every module it imports, so modules are transpiled in
+# levels of the import graph. Every module in a level only imports modules from earlier levels. The modules of a level
+# are split between the workers, and each worker runs transcrypt on a generated entry module that imports its share of
+# the level. The worker's output directory is seeded with everything transpiled so far, so transcrypt only loads the
+# modules that were already transpiled instead of transpiling them again. The output of each worker is then linked in
+# to __target__, and index.py is transpiled last on top of the complete set of modules.
+#
+# Transcrypt stamps the time of transpilation on the first line of every module, and records the options it was run
+# with in index.project, so a parallel build matches a serial build apart from those.
+#
+# Usage: python tools/build_parallel.py [--jobs N] [--check]
+#
+#   --jobs N   The number of transcrypt processes to run at once, defaults to the number of cpus
+#   --check    Also runs a serial build, then compares the output and the wall clock time of the two builds
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from source_path import source_directory
+
+from build_constant_elements import optimise, optimised_directory
+
+# The directory containing the python source that is transpiled
+_source_directory = optimised_directory
+
+# The root python file, transcrypt names the module of the entry point __main__
+_index_file = os.path.join(_source_directory, 'index.py')
+
+# The transcrypt output directory that webpack bundles from
+_target_directory = os.path.join(source_directory, '__target__')
+
+# The transcrypt options, these must match the options of the serial build in webpack.config.js
+_transcrypt_options = ['-n', '-m', '-e', '6']
+
+# The name of the entry module generated for each worker
+_entry_module = '__parallel_build_entry__'
+
+# Transcrypt re-reads a javascript only module that is already in the output directory as if it were minified, which
+# needs java, so these are left for each transcrypt run to copy again
+_unseeded_files = {'copy.js'}
+
+# The comment lines that start and end a block of code that transcrypt skips (eg, imports that only CPython uses)
+_skip_start = "# __pragma__ ('skip')"
+_skip_end = "# __pragma__ ('noskip')"
+
+
+def _module_path(name):
+    """
+    :param name: The dotted name of a module
+    :return: The path of the python file of the module in the source directory, or None if it isn't application source
+    """
+    path = os.path.join(_source_directory, *name.split('.'))
+    if os.path.isfile(path + '.py'):
+        return path + '.py'
+    if os.path.isfile(os.path.join(path, '__init__.py')):
+        return os.path.join(path, '__init__.py')
+    return None
+
+
+def _parse(path):
+    """
+    Parses a python file as transcrypt sees it, blanking out any blocks that transcrypt skips
+
+    :param path: The path of the python file
+    :return: The syntax tree
+    """
+    lines = []
+    skipping = False
+    with open(path) as f:
+        for line in f:
+            if line.strip() == _skip_start:
+                skipping = True
+            elif line.strip() == _skip_end:
+                skipping = False
+
+            # Keep the line numbering intact so that syntax errors are still reported against the right line
+            lines.append('\n' if skipping else line)
+
+    return ast.parse(''.join(lines), path)
+
+
+def _imports(path):
+    """
+    Returns the application modules imported by a python file, anywhere in the file
+
+    :param path: The path of the python file
+    :return: The set of the dotted names of the imported modules
+    """
+    imported = set()
+    for node in ast.walk(_parse(path)):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names if _module_path(alias.name))
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                # "from a import b" imports the module a.b if there is one, otherwise the module a
+                if _module_path(node.module + '.' + alias.name):
+                    imported.add(node.module + '.' + alias.name)
+                elif _module_path(node.module):
+                    imported.add(node.module)
+
+    return imported
+
+
+def import_levels():
+    """
+    Splits the modules imported by index.py in to levels, where every module only imports modules from earlier levels
+
+    Modules that are part of an import cycle are placed after the module that completes the cycle. The import graph
+    only decides what can be transpiled at the same time, if it misses an import the module is still transpiled, just
+    not in parallel.
+
+    :return: The list of levels, each a sorted list of dotted module names
+    """
+    # Find every module reachable from index.py
+    graph = {}
+    pending = sorted(_imports(_index_file))
+    while pending:
+        name = pending.pop()
+        if name not in graph:
+            graph[name] = _imports(_module_path(name))
+            pending.extend(sorted(graph[name] - set(graph)))
+
+    # Work out the level of each module, one more than the highest level of the modules it imports
+    levels = {}
+
+    def level_of(name, visiting):
+        if name not in levels:
+            # Ignore imports that lead back to a module that is already being visited (an import cycle)
+            visiting.add(name)
+            levels[name] = 1 + max([-1] + [level_of(i, visiting) for i in graph[name] if i not in visiting])
+            visiting.remove(name)
+        return levels[name]
+
+    for name in sorted(graph):
+        level_of(name, set())
+
+    # Group the modules by level
+    result = [[] for i in range(max(levels.values()) + 1)] if levels else []
+    for name in sorted(levels):
+        result[levels[name]].append(name)
+
+    return result
+
+
+def _transpile(source, target_directory, search_directory=None, build=False):
+    """
+    Runs transcrypt in a new process
+
+    :param source: The path of the main module
+    :param target_directory: The directory to write the javascript to
+    :param search_directory: An additional directory to search for modules, if the main module isn't in the source
+    :param build: If True, the target directory is cleared and every module is transpiled (-b)
+    :return: Nothing
+    """
+    command = [sys.executable, '-m', 'transcrypt'] + _transcrypt_options + ['-od', target_directory]
+    if build:
+        command.append('-b')
+    if search_directory:
+        command.extend(['-xp', search_directory])
+    command.append(source)
+
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    if result.returncode:
+        raise Exception("Transpiling " + source + " failed:\n" + result.stdout)
+
+
+def _transpile_modules(modules):
+    """
+    Transpiles a group of modules in a new working directory, seeded with everything in __target__
+
+    :param modules: The dotted names of the modules to transpile
+    :return: The working directory, and the output directory that holds the transpiled modules
+    """
+    working_directory = tempfile.mkdtemp(prefix='transcrypt-')
+
+    # Seed the output directory, keeping the modification times so that transcrypt sees the modules are up to date
+    output_directory = os.path.join(working_directory, '__target__')
+    shutil.copytree(
+        _target_directory, output_directory, ignore=lambda directory, names: _unseeded_files.intersection(names)
+    )
+
+    # Create the entry module that imports the modules
+    entry = os.path.join(working_directory, _entry_module + '.py')
+    with open(entry, 'w') as f:
+        f.writelines('import ' + name + '\n' for name in modules)
+
+    _transpile(entry, output_directory, _source_directory)
+
+    return working_directory, output_directory
+
+
+def _link(output_directory):
+    """
+    Copies the modules that a worker transpiled in to __target__
+
+    :param output_directory: The output directory of the worker
+    :return: Nothing
+    """
+    for name in os.listdir(output_directory):
+        # Skip the entry module, and modules that are already linked (several workers may transpile the same module)
+        if name.startswith(_entry_module + '.') or os.path.exists(os.path.join(_target_directory, name)):
+            continue
+        shutil.copy2(os.path.join(output_directory, name), os.path.join(_target_directory, name))
+
+
+def build(jobs=None):
+    """
+    Transpiles index.py and every module it imports in to __target__, using several transcrypt processes at once
+
+    :param jobs: The number of transcrypt processes to run at once, defaults to the number of cpus
+    :return: Nothing
+    """
+    jobs = jobs or os.cpu_count() or 1
+
+    # Bring the optimised mirror of the source up to date
+    optimise()
+
+    # Start from an empty target, in the same way as a full build
+    shutil.rmtree(_target_directory, ignore_errors=True)
+    os.makedirs(_target_directory)
+
+    # The transcrypt processes are separate processes already, so threads are enough to run several at once
+    with ThreadPoolExecutor(jobs) as executor:
+        for level in import_levels():
+            # Share the level between the workers
+            groups = [level[i::jobs] for i in range(min(jobs, len(level)))]
+
+            # Transpile the groups, then link the output of each in to the target
+            for working_directory, output_directory in executor.map(_transpile_modules, groups):
+                _link(output_directory)
+                shutil.rmtree(working_directory, ignore_errors=True)
+
+    # Transpile index.py on top of the linked modules, transcrypt copies the unseeded files again itself
+    for name in _unseeded_files:
+        if os.path.exists(os.path.join(_target_directory, name)):
+            os.remove(os.path.join(_target_directory, name))
+
+    _transpile(_index_file, _target_directory)
+
+
+def _read_without_stamp(path):
+    """
+    :param path: The path of a file in the output directory
+    :return: The content of the file, without the transpilation time that transcrypt stamps on modules
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    if content.startswith(b"// Transcrypt'ed from Python"):
+        content = content[content.find(b'\n') + 1:]
+
+    return content
+
+
+def check(jobs=None):
+    """
+    Runs a serial build and a parallel build, then compares their output and wall clock time
+
+    :param jobs: The number of transcrypt processes to run at once, defaults to the number of cpus
+    :return: True if the output of the builds matched
+    """
+    # Bring the optimised mirror of the source up to date for the serial build, the parallel build does this itself
+    optimise()
+
+    serial_directory = tempfile.mkdtemp(prefix='transcrypt-serial-')
+    try:
+        # Time the serial build
+        start = time.perf_counter()
+        _transpile(_index_file, serial_directory, build=True)
+        serial_time = time.perf_counter() - start
+
+        # Time the parallel build
+        start = time.perf_counter()
+        build(jobs)
+        parallel_time = time.perf_counter() - start
+
+        # Compare the output, index.project only records the options transcrypt was run with
+        serial_files = set(os.listdir(serial_directory)) - {'index.project'}
+        parallel_files = set(os.listdir(_target_directory)) - {'index.project'}
+
+        different = sorted(serial_files ^ parallel_files) + sorted(
+            name for name in serial_files & parallel_files
+            if _read_without_stamp(os.path.join(serial_directory, name)) !=
+            _read_without_stamp(os.path.join(_target_directory, name))
+        )
+    finally:
+        shutil.rmtree(serial_directory, ignore_errors=True)
+
+    print('Serial build:   {:.2f}s'.format(serial_time))
+    print('Parallel build: {:.2f}s ({} jobs)'.format(parallel_time, jobs or os.cpu_count() or 1))
+    if different:
+        print('Output differs: ' + ', '.join(different))
+    else:
+        print('Output is identical ({} files)'.format(len(serial_files)))
+
+    return not different
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Transpiles the application with several transcrypt processes at once')
+    parser.add_argument('--jobs', type=int, help='the number of transcrypt processes to run at once')
+    parser.add_argument('--check', action='store_true', help='compare the output and time with a serial build')
+    arguments = parser.parse_args()
+
+    if arguments.check:
+        sys.exit(0 if check(arguments.jobs) else 1)
+
+    build(arguments.jobs)
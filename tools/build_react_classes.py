@@ -0,0 +1,152 @@
+# Generates a react class for every Component subclass in the application at build time, so that the classes do not
+# have to be created at runtime. This is run by CPython before transcrypt (see webpack.config.js) and is not part of the
+# application bundle.
+#
+# The source is parsed rather than imported, so modules that only run in the browser can be scanned. Each top level
+# class that derives from Component (directly, or through other components) gets a named class extending
+# ReactComponentProxy (see lib.react.components.proxy), which lib.react.components.utils picks up in place of creating
+# one. Components that can't be found this way (eg, classes created in a function) are still created at runtime.
+#
+# The classes are written to react_classes.js in the source directory, transcrypt then copies it in to __target__ along
+# with the modules that import it.
+#
+# Usage: python tools/build_react_classes.py
+import ast
+import os
+
+from source_path import source_directory
+
+# The name of the generated javascript module, in the source directory
+_output_name = 'react_classes.js'
+
+# Directories that do not contain application source
+_skipped_directories = {'__target__', '__optimised__', '__pycache__', os.path.join('lib', 'react', 'reference')}
+
+# The root python file, transcrypt names the module of the entry point __main__
+_index_file = 'index.py'
+
+# The framework base classes, these are only ever subclassed so they do not get a react class of their own
+_base_classes = {
+    'lib.react.components.component.Component',
+    'lib.react.components.component.PureComponent',
+}
+
+
+def _module_name(path):
+    """
+    :param path: The path of the python file relative to the source directory
+    :return: The name of the module as transcrypt names it
+    """
+    if path == _index_file:
+        return '__main__'
+
+    name = os.path.splitext(path)[0].replace(os.sep, '.')
+    if name.endswith('.__init__'):
+        name = name[:-len('.__init__')]
+    return name
+
+
+def _scan_module(directory, path):
+    """
+    Parses a python file and returns the top level classes it defines
+
+    :param directory: The source directory
+    :param path: The path of the python file relative to the source directory
+    :return: A dict of the full name of each class to the full names of its base classes
+    """
+    with open(os.path.join(directory, path)) as f:
+        tree = ast.parse(f.read(), path)
+
+    module = _module_name(path)
+
+    # Map the names visible at the top level of the module to the full names they refer to
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                names[alias.asname or alias.name] = node.module + '.' + alias.name
+        elif isinstance(node, ast.ClassDef):
+            names[node.name] = module + '.' + node.name
+
+    # Resolve the bases of each class, bases that aren't plain names can't be resolved so are ignored
+    classes = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            classes[module + '.' + node.name] = [
+                names[base.id] for base in node.bases if isinstance(base, ast.Name) and base.id in names
+            ]
+
+    return classes
+
+
+def find_components(source=source_directory):
+    """
+    Finds every Component subclass in the application source
+
+    :param source: The source directory, a copy of the source can be passed
+    :return: The sorted list of the full names of the component classes
+    """
+    # Scan every python file for classes
+    classes = {}
+    for directory, subdirectories, files in os.walk(source):
+        relative_directory = os.path.relpath(directory, source)
+
+        # Don't descend in to directories that aren't application source
+        subdirectories[:] = sorted(
+            subdirectory for subdirectory in subdirectories
+            if os.path.normpath(os.path.join(relative_directory, subdirectory)) not in _skipped_directories
+            and subdirectory not in _skipped_directories
+        )
+
+        for file in sorted(files):
+            if file.endswith('.py'):
+                classes.update(_scan_module(source, os.path.normpath(os.path.join(relative_directory, file))))
+
+    # Repeatedly add the classes derived from known components, until no more are found
+    components = set(_base_classes)
+    found = True
+    while found:
+        found = False
+        for name, bases in classes.items():
+            if name not in components and any(base in components for base in bases):
+                components.add(name)
+                found = True
+
+    return sorted(components - _base_classes)
+
+
+def build(source=source_directory):
+    """
+    Writes the react class for every component in to the generated javascript module
+
+    :param source: The source directory, a copy of the source can be passed
+    :return: Nothing
+    """
+    # Create the class definitions, the class name is what React DevTools shows for the component
+    definitions = [
+        "    '" + name + "': class " + name.replace('.', '_') + ' extends ReactComponentProxy {}'
+        for name in find_components(source)
+    ]
+
+    module_source = (
+        '// Generated by build_react_classes.py, do not edit\n'
+        "import {ReactComponentProxy} from './lib.react.components.proxy.js';\n"
+        '\n'
+        'export var classes = {\n' +
+        ',\n'.join(definitions) + '\n'
+        '};\n'
+    )
+
+    # Only write the file when it changes, so that transcrypt doesn't copy it again and trigger a rebuild for nothing
+    output_file = os.path.join(source, _output_name)
+    if os.path.exists(output_file):
+        with open(output_file) as f:
+            if f.read() == module_source:
+                return
+
+    with open(output_file, 'w') as f:
+        f.write(module_source)
+
+
+if __name__ == '__main__':
+    build()
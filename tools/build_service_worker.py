@@ -0,0 +1,134 @@
+# Generates the service worker for the production build, once index.html has been prerendered (see prerender.py). This
+# is run by CPython and is not part of the application bundle.
+#
+# The production build names its chunks by a hash of their content, so they can be cached indefinitely. The service
+# worker precaches index.html (as the page every navigation is answered with) and the chunks it loads, so that a repeat
+# visit starts without waiting for the network at all. Its cache is named by a hash of the page and the chunks, so a
+# deploy changes the service worker, which the browser notices on the next visit and installs in the background. The
+# new version takes over once every page of the old version has been closed, and deletes the old version's cache. The
+# registration of the service worker is added to index.html.
+#
+# The server must serve the hashed chunks as immutable with a long max-age, and index.html and service-worker.js with
+# no-cache so that deploys are noticed (see benchmark_startup.py).
+#
+# Usage: python tools/build_service_worker.py <output directory>
+import hashlib
+import json
+import os
+import re
+import sys
+
+# The name of the service worker, it must be served from the root of the application so that its scope covers it
+service_worker_name = 'service-worker.js'
+
+# Matches the name of a chunk that is named by its content, as webpack.config.js names them ([name].[contenthash:8].js)
+hashed_name = re.compile(r'\.[0-9a-f]{8}\.js$')
+
+# The prefix of the name of the service worker's cache, followed by the hash of the version
+_cache_prefix = 'transcrypt-react-'
+
+# Matches the source of each script tag in index.html
+_script = re.compile(r'<script src="([^"]+)"></script>')
+
+# Registers the service worker once the page has loaded, so that precaching doesn't compete with starting up
+_registration = '''<script>
+    if ('serviceWorker' in navigator) {
+        window.addEventListener('load', function () { navigator.serviceWorker.register('%s'); });
+    }
+</script>
+''' % service_worker_name
+
+# The service worker, formatted with the name of its cache and the urls to precache
+_service_worker = '''// Generated by build_service_worker.py, precaches the page and the chunks it loads
+const cachePrefix = %(cache_prefix)s;
+const cacheName = %(cache_name)s;
+const precache = %(precache)s;
+
+// The absolute urls of the precached files, and of the page that every navigation is answered with
+const precached = new Set(precache.map((url) => new URL(url, self.registration.scope).href));
+const page = new URL('./', self.registration.scope).href;
+
+self.addEventListener('install', (event) => {
+    // Fetch everything before this version can take over, unchanged chunks are usually in the http cache already
+    event.waitUntil(caches.open(cacheName).then((cache) => cache.addAll(precache)));
+});
+
+self.addEventListener('activate', (event) => {
+    // Delete the caches of earlier versions, none of their pages are open any more
+    event.waitUntil(caches.keys().then((names) => Promise.all(
+        names.filter((name) => name.startsWith(cachePrefix) && name !== cacheName).map((name) => caches.delete(name))
+    )));
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = request.mode === 'navigate' ? page : request.url;
+
+    // Anything that isn't precached, such as requests to the server's api, goes to the network as usual
+    if (request.method !== 'GET' || !precached.has(url)) {
+        return;
+    }
+
+    event.respondWith(caches.open(cacheName)
+        .then((cache) => cache.match(url))
+        .then((response) => response || fetch(request)));
+});
+'''
+
+
+def scripts(page):
+    """
+    :param page: The html of index.html
+    :return: The list of the scripts that the page loads, in order
+    """
+    return _script.findall(page)
+
+
+def precache_urls(page):
+    """
+    :param page: The html of index.html
+    :return: The list of urls that the service worker precaches, relative to the root of the application
+    """
+    return ['./'] + scripts(page)
+
+
+def build(output_directory):
+    """
+    Adds the registration of the service worker to index.html, and writes the service worker
+
+    :param output_directory: The directory that the production build was emitted in to
+    :return: The name of the service worker's cache
+    """
+    index_path = os.path.join(output_directory, 'index.html')
+    with open(index_path) as f:
+        page = f.read()
+
+    # Register the service worker, unless it has been already
+    if _registration not in page:
+        if '</html>' not in page:
+            raise Exception("index.html does not contain </html>")
+        page = page.replace('</html>', _registration + '</html>')
+        with open(index_path, 'w') as f:
+            f.write(page)
+
+    # Confirm that the page only loads chunks that can be cached indefinitely
+    for script in scripts(page):
+        if not hashed_name.search(script):
+            raise Exception("index.html loads " + script + ", which isn't named by its content")
+
+    # Name the cache by everything it holds, the chunk names already change with their content
+    precache = precache_urls(page)
+    cache_name = _cache_prefix + hashlib.sha256((page + '\n'.join(precache)).encode('utf-8')).hexdigest()[:8]
+
+    with open(os.path.join(output_directory, service_worker_name), 'w') as f:
+        f.write(_service_worker % {
+            'cache_prefix': json.dumps(_cache_prefix),
+            'cache_name': json.dumps(cache_name),
+            'precache': json.dumps(precache),
+        })
+
+    return cache_name
+
+
+if __name__ == '__main__':
+    print('Generated the service worker for cache ' + build(sys.argv[1]))
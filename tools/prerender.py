@@ -0,0 +1,79 @@
+# Prerenders the initial view of the application in to index.html for the production build. This is run by CPython (see
+# lib.react.reference) rather than transpiled, and is not part of the application bundle.
+#
+# The application is created as index.py creates it and rendered after the StoreInitialisedAction, the markup is
+# written in to the container, and the state of the store is inlined so that index.py can restore the store and hydrate
+# the markup rather than rendering from scratch. The production build names its chunks by their content, so the script
+# tag for app.js is replaced by a tag for each of the scripts passed, in order.
+#
+# Usage: python tools/prerender.py <template index.html> <output index.html> [script ...]
+import json
+import sys
+
+import source_path  # noqa: F401
+
+from actions.actions import StoreInitialisedAction
+from components.app import App
+from lib.flux.dispatcher import AppDispatcher
+from lib.react.components.store_provider import StoreProvider
+from lib.react.react import React
+from lib.react.reference.react_dom import HostContainer
+from stores.store import MyStore
+
+# The empty container in the template that the markup is rendered in to
+_container = '<div id="container"></div>'
+
+# The script tag that loads the application, the initial state is inlined before it
+_app_script = '<script src="app.js"></script>'
+
+
+def prerender():
+    """
+    Renders the initial view of the application
+
+    :return: The markup, and the state of the store as json
+    """
+    # Create the dispatcher and store, as index.py does
+    dispatcher = AppDispatcher()
+    store = MyStore(dispatcher)
+
+    # Render the application and initialise the store
+    container = HostContainer('container')
+    React.render(StoreProvider(store, dispatcher, App()), container)
+    dispatcher.handle_view_action(StoreInitialisedAction(store))
+
+    # Serialise the state, making sure that it can't close the script tag it is inlined in to
+    state = json.dumps({'store': store.snapshot()}).replace('</', '<\\/')
+
+    return container.to_html(), state
+
+
+def main(template_path, output_path, scripts=None):
+    """
+    Writes the prerendered template to the output path
+
+    :param template_path: The path of the template index.html
+    :param output_path: The path to write the prerendered index.html to
+    :param scripts: An optional list of the scripts to load in place of app.js
+    :return: Nothing
+    """
+    with open(template_path) as f:
+        template = f.read()
+
+    # Confirm that the template has the expected container and script
+    if _container not in template or _app_script not in template:
+        raise Exception("The template does not contain " + _container + " and " + _app_script)
+
+    markup, state = prerender()
+
+    # Insert the markup and the state
+    output = template.replace(_container, '<div id="container">' + markup + '</div>')
+    app_scripts = '\n'.join('<script src="' + script + '"></script>' for script in scripts) if scripts else _app_script
+    output = output.replace(_app_script, '<script>window.__INITIAL_STATE__ = ' + state + ';</script>\n' + app_scripts)
+
+    with open(output_path, 'w') as f:
+        f.write(output)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], sys.argv[2], sys.argv[3:])
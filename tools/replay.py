@@ -0,0 +1,248 @@
+# Replays a recorded session (see lib.flux.recorder) through the real dispatcher, stores and components, and reports
+# how long each action took to dispatch and to render. This is run by CPython (see lib.react.reference) rather than
+# transpiled, and is not part of the application bundle.
+#
+# A session is recorded in the browser by opening the application with ?record and calling save_recording() from the
+# console, or here with --record, which clicks the buttons at random. The application is created as index.py creates
+# it and started from the state the session was recorded from. Each action is dispatched inside a batch of updates, as
+# react batches the updates made in an event handler, so the time taken to dispatch (the stores handling the action)
+# and to render (the components updating, and anything they queued) are measured separately.
+#
+# Actions are replayed as fast as possible, or with --realtime at the times they were recorded (scaled by --speed).
+# Passing --repeat replays the session several times, each time in a fresh application, and --output writes the report
+# as json so that it can be compared between runs.
+#
+# Usage: python tools/replay.py <recording> [--realtime] [--speed N] [--repeat N] [--output PATH]
+#        python tools/replay.py <recording> --record [--actions N]
+import argparse
+import json
+import random
+import time
+
+import source_path  # noqa: F401
+
+from actions import actions as action_module
+from actions.actions import StoreInitialisedAction
+from components.app import App
+from lib.flux.dispatcher import Action, AppDispatcher
+from lib.flux.recorder import ActionRecorder, ActionRecording
+from lib.react.components.store_provider import StoreProvider
+from lib.react.react import React
+from lib.react.reference import react_dom
+from lib.react.reference.host import run_pending
+from lib.react.reference.react_dom import HostContainer
+from stores.store import MyStore
+
+# The default number of actions to record
+_default_actions = 10000
+
+# The percentiles reported for each kind of action
+_percentiles = (50, 95, 99)
+
+# Every action class of the application, which may be in a recording
+_action_classes = [
+    cls for cls in vars(action_module).values()
+    if isinstance(cls, type) and issubclass(cls, Action) and cls is not Action
+]
+
+
+class _Application:
+    """
+    The application, created in the same way as index.py creates it
+    """
+    def __init__(self, snapshots=None):
+        """
+        :param snapshots: The state of the stores to start from, in the order the recorder was passed them
+        """
+        self.dispatcher = AppDispatcher()
+        self.store = MyStore(self.dispatcher)
+        self.stores = [self.store]
+        self.container = HostContainer('container')
+
+        if snapshots:
+            for store, snapshot in zip(self.stores, snapshots):
+                store.restore(snapshot)
+
+    def mount(self):
+        """
+        Renders the application and initialises the store
+
+        :return: Nothing
+        """
+        React.render(StoreProvider(self.store, self.dispatcher, App()), self.container)
+        self.dispatcher.handle_view_action(StoreInitialisedAction(self.store))
+        run_pending()
+
+
+def _action_classes_to_record():
+    """
+    :return: The action classes that can be recorded, those that the application dispatches itself as it starts can't
+    """
+    return [cls for cls in _action_classes if cls is not StoreInitialisedAction]
+
+
+def record(path, actions):
+    """
+    Records a session of clicking the buttons at random
+
+    :param path: The path to write the recording to
+    :param actions: The number of actions to record
+    :return: Nothing
+    """
+    application = _Application()
+    recorder = ActionRecorder(application.dispatcher, _action_classes_to_record(), application.stores)
+    application.mount()
+
+    generator = random.Random(1)
+    for i in range(actions):
+        buttons = application.container.find_all('button')
+        generator.choice(buttons).dispatch('onClick')
+        run_pending()
+
+    recorder.save(path)
+    print('Recorded {} actions to {}'.format(recorder.count, path))
+
+
+def replay(recording, realtime=False, speed=1):
+    """
+    Replays a recording in a fresh application
+
+    :param recording: The recording (ActionRecording)
+    :param realtime: True to dispatch each action at the time it was recorded, otherwise as fast as possible
+    :param speed: How many times faster than it was recorded to replay in real time
+    :return: The (class name, dispatch milliseconds, render milliseconds) of each action, and the most milliseconds
+        that an action was dispatched late by in real time
+    """
+    application = _Application(recording.snapshots)
+    application.mount()
+
+    timings = []
+    late = 0
+    start = time.perf_counter()
+
+    for i in range(len(recording.actions)):
+        # Wait until the action is due
+        if realtime:
+            delay = start + recording.actions[i][0] / 1000 / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                late = max(late, -delay * 1000)
+
+        dispatched = []
+
+        def dispatch():
+            recording.dispatch(application.dispatcher, i)
+            dispatched.append(time.perf_counter())
+
+        # Updates are batched until the dispatch returns, then the components render
+        before = time.perf_counter()
+        react_dom.unstable_batchedUpdates(dispatch)
+        run_pending()
+        after = time.perf_counter()
+
+        timings.append((
+            type(recording.actions[i][2]).__name__, (dispatched[0] - before) * 1000, (after - dispatched[0]) * 1000
+        ))
+
+    return timings, late
+
+
+def _percentile(ordered, percentile):
+    """
+    :param ordered: A sorted list of values
+    :param percentile: The percentile, between 0 and 100
+    :return: The value at the percentile, by the nearest rank
+    """
+    return ordered[max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))]
+
+
+def _summarise(values):
+    """
+    :param values: A list of milliseconds
+    :return: The mean, percentiles and max of the values
+    """
+    ordered = sorted(values)
+    summary = {'mean': sum(ordered) / len(ordered), 'max': ordered[-1]}
+    for percentile in _percentiles:
+        summary['p{}'.format(percentile)] = _percentile(ordered, percentile)
+    return summary
+
+
+def report(timings):
+    """
+    Summarises the timings for each kind of action and for all actions
+
+    :param timings: The (class name, dispatch milliseconds, render milliseconds) of each action
+    :return: The summaries of the dispatch and render times, and the count of actions, keyed by class name or 'all'
+    """
+    groups = {'all': timings}
+    for timing in timings:
+        groups.setdefault(timing[0], []).append(timing)
+
+    return {
+        name: {
+            'count': len(group),
+            'dispatch': _summarise([timing[1] for timing in group]),
+            'render': _summarise([timing[2] for timing in group]),
+        } for name, group in groups.items()
+    }
+
+
+def _print_report(summaries):
+    """
+    Prints the summaries as a table
+
+    :return: Nothing
+    """
+    columns = ['mean'] + ['p{}'.format(percentile) for percentile in _percentiles] + ['max']
+    print('{:<24} {:<9} {:>8} '.format('action', 'phase', 'count') + ' '.join('{:>9}'.format(c) for c in columns))
+    for name in sorted(summaries, key=lambda name: (name != 'all', name)):
+        for phase in ('dispatch', 'render'):
+            print('{:<24} {:<9} {:>8} '.format(name, phase, summaries[name]['count']) + ' '.join(
+                '{:>9.3f}'.format(summaries[name][phase][column]) for column in columns
+            ))
+    print('(milliseconds)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replays a recorded session and reports the latency of each action')
+    parser.add_argument('recording', help='the path of the recording')
+    parser.add_argument('--record', action='store_true', help='record a session of random clicks to the path instead')
+    parser.add_argument('--actions', type=int, default=_default_actions, help='the number of actions to record')
+    parser.add_argument('--realtime', action='store_true', help='replay at the times the actions were recorded')
+    parser.add_argument('--speed', type=float, default=1, help='how many times faster to replay in real time')
+    parser.add_argument('--repeat', type=int, default=1, help='the number of times to replay the session')
+    parser.add_argument('--output', help='write the report to this path as json')
+    arguments = parser.parse_args()
+
+    if arguments.record:
+        record(arguments.recording, arguments.actions)
+        raise SystemExit(0)
+
+    with open(arguments.recording) as f:
+        session = ActionRecording(f.read(), _action_classes)
+
+    if not session.actions:
+        print('The recording has no actions to replay')
+        raise SystemExit(1)
+
+    print('Replaying {} actions recorded over {:.1f}s, {} time(s){}\n'.format(
+        len(session.actions), session.duration / 1000, arguments.repeat,
+        ' in real time at {}x'.format(arguments.speed) if arguments.realtime else ''
+    ))
+
+    all_timings = []
+    for i in range(arguments.repeat):
+        timings, late = replay(session, arguments.realtime, arguments.speed)
+        all_timings.extend(timings)
+        if arguments.realtime:
+            print('Replay {} dispatched an action up to {:.1f}ms late'.format(i + 1, late))
+
+    summaries = report(all_timings)
+    _print_report(summaries)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as f:
+            json.dump(summaries, f, indent=2)
+        print('Wrote the report to ' + arguments.output)
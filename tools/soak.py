@@ -0,0 +1,347 @@
+# Soak tests the framework for memory growth. This is run by CPython (see lib.react.reference) rather than transpiled,
+# and is not part of the application bundle.
+#
+# The application is created as index.py creates it, then the buttons are clicked (alternating between them so that the
+# count stays bounded) through the real dispatcher, store and components, and the whole tree is unmounted and mounted
+# again every so often. After a warm up, the heap size (tracemalloc) and the number of live objects of each type are
+# sampled at intervals. The soak fails if the heap, or the count of any type of object, grows by more than the limit
+# per million actions, worked out from the trend over all of the samples rather than from any one of them. On failure,
+# the allocations that grew the most since the warm up are written out with their tracebacks.
+#
+# The trends are accumulated as the samples are taken rather than keeping the samples, so that the soak doesn't measure
+# its own growth. Tracing allocations slows the framework down considerably, so only the frame that made each
+# allocation is recorded unless more are asked for.
+#
+# Only the CPython side of lib.react.components.utils is soaked, the components are proxied by _ReferenceProxy rather
+# than by the javascript classes of native_component_wrapper. Leaks in the javascript side, such as instances left in
+# _mounted_instances (which is only filled in development builds), aren't covered and need the transpiled bundle to be
+# profiled in a browser.
+#
+# Usage: python tools/soak.py [--actions N] [--remount-every N] [--samples N] [--max-growth BYTES]
+#                           [--max-objects N] [--frames N] [--diff-file PATH]
+import argparse
+import collections
+import gc
+import sys
+import time
+import tracemalloc
+
+import source_path  # noqa: F401
+
+from actions.actions import StoreInitialisedAction
+from components.app import App
+from lib.flux.dispatcher import AppDispatcher
+from lib.react.components.store_provider import StoreProvider
+from lib.react.react import React
+from lib.react.reference import react_dom
+from lib.react.reference.host import run_pending
+from lib.react.reference.react_dom import HostContainer
+from stores.store import MyStore
+
+# The default number of actions to dispatch
+_default_actions = 1000000
+
+# The default number of actions between unmounting and mounting the application again
+_default_remount_every = 1000
+
+# The default number of samples to take, not including the warm up
+_default_samples = 20
+
+# The default limit on heap growth, in bytes per million actions
+_default_max_growth = 1024 * 1024
+
+# The default limit on the growth of the number of objects of any one type, per million actions
+_default_max_objects = 1000
+
+# The default number of frames recorded for each allocation, for the tracebacks in the heap diff
+_default_frames = 1
+
+# The number of allocation sites written to the heap diff
+_diff_entries = 25
+
+
+class _Application:
+    """
+    The application under test, created in the same way as index.py creates it
+    """
+    def __init__(self):
+        self.dispatcher = AppDispatcher()
+        self.store = MyStore(self.dispatcher)
+        self.container = HostContainer('container')
+        self.mounts = 0
+
+        # The host nodes of the buttons, these are kept by every update while the application is mounted
+        self._buttons = []
+
+    def mount(self):
+        """
+        Renders the application and initialises the store
+
+        :return: Nothing
+        """
+        React.render(StoreProvider(self.store, self.dispatcher, App()), self.container)
+        self.dispatcher.handle_view_action(StoreInitialisedAction(self.store))
+        run_pending()
+        self.mounts += 1
+        self._buttons = self.container.find_all('button')
+
+    def unmount(self):
+        """
+        Unmounts the application
+
+        :return: Nothing
+        """
+        react_dom.unmountComponentAtNode(self.container)
+        self._buttons = []
+
+    def click(self, index):
+        """
+        Clicks one of the buttons and waits for everything that it caused to run
+
+        :param index: The index of the button to click
+        :return: Nothing
+        """
+        self._buttons[index].dispatch('onClick')
+        run_pending()
+
+
+def _count_objects():
+    """
+    :return: The number of live objects of each type tracked by the garbage collector, keyed by the type
+    """
+    return collections.Counter(type(o) for o in gc.get_objects())
+
+
+class _Trend:
+    """
+    Accumulates the least squares slope of a series of (x, y) points, without keeping the points
+    """
+    def __init__(self):
+        # The sums are floats so that they stay the same size however large they get
+        self._count = 0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+
+    def add(self, x, y):
+        """
+        Adds a point to the series
+
+        :return: Nothing
+        """
+        self._count += 1
+        self._sum_x += float(x)
+        self._sum_y += float(y)
+        self._sum_xx += float(x) * x
+        self._sum_xy += float(x) * y
+
+    @property
+    def slope(self):
+        """
+        Returns the slope of the line that best fits the points, or 0 if there aren't enough points
+        """
+        variance = self._count * self._sum_xx - self._sum_x * self._sum_x
+        if not variance:
+            return 0
+        return (self._count * self._sum_xy - self._sum_x * self._sum_y) / variance
+
+
+class _Samples:
+    """
+    Samples the memory in use, accumulating the trend of the heap size and of the count of each type of object
+    """
+    def __init__(self, application):
+        """
+        :param application: The application under test
+        """
+        self._application = application
+        self.heap = _Trend()
+        self.objects = {}
+        self.first = None
+        self.last = None
+
+        # The number of actions at each sample so far, so that the trend of a type that appears late starts at zero
+        self._actions = []
+
+    def take(self, actions):
+        """
+        Takes a sample after collecting any garbage
+
+        :param actions: The number of actions dispatched so far
+        :return: Nothing
+        """
+        gc.collect()
+
+        # Accumulate the trend of each type
+        counts = _count_objects()
+        for cls, count in counts.items():
+            # Ignore the objects of the soak itself
+            if cls.__module__ == __name__:
+                continue
+            if cls not in self.objects:
+                self.objects[cls] = _Trend()
+                for previous in self._actions:
+                    self.objects[cls].add(previous, 0)
+            self.objects[cls].add(actions, count)
+
+        # Types that have gone count as zero
+        for cls, trend in self.objects.items():
+            if cls not in counts:
+                trend.add(actions, 0)
+
+        self._actions.append(actions)
+        total = sum(counts.values())
+        del counts
+
+        # Read the heap size last, once the trends have been allocated and the counts have been freed, so that the soak
+        # only measures its own memory when it grows
+        heap = tracemalloc.get_traced_memory()[0]
+        self.heap.add(actions, heap)
+
+        # Record the subscriptions, which must not outlive the components that made them
+        sample = (self._application.store.receiver_count, len(self._application.dispatcher._dispatchers))
+        if self.first is None:
+            self.first = sample
+        self.last = sample
+
+        print('{:>10} actions {:>10} bytes {:>8} objects {:>4} receivers {:>4} dispatchers'.format(
+            actions, heap, total, sample[0], sample[1]
+        ))
+
+
+def _write_diff(path, baseline, snapshot):
+    """
+    Writes the allocation sites that grew the most between two heap snapshots
+
+    :param path: The file to write the diff to
+    :param baseline: The snapshot taken after the warm up
+    :param snapshot: The snapshot taken at the end
+    :return: Nothing
+    """
+    with open(path, 'w') as f:
+        for statistic in snapshot.compare_to(baseline, 'traceback')[:_diff_entries]:
+            f.write('{:+d} bytes in {:+d} blocks (now {} bytes)\n'.format(
+                statistic.size_diff, statistic.count_diff, statistic.size
+            ))
+            for line in statistic.traceback.format():
+                f.write('    ' + line + '\n')
+            f.write('\n')
+
+
+def soak(actions=_default_actions, remount_every=_default_remount_every, samples=_default_samples,
+         max_growth=_default_max_growth, max_objects=_default_max_objects, frames=_default_frames,
+         diff_file='soak_heap_diff.txt'):
+    """
+    Runs the soak test
+
+    :param actions: The number of actions to dispatch after the warm up
+    :param remount_every: The number of actions between unmounting and mounting the application again
+    :param samples: The number of samples to take, after a warm up of the same length as the interval between them
+    :param max_growth: The limit on heap growth, in bytes per million actions
+    :param max_objects: The limit on the growth of the number of objects of any one type, per million actions
+    :param frames: The number of frames recorded for each allocation, for the tracebacks in the heap diff
+    :param diff_file: The file to write the heap diff to if the soak fails
+    :return: True if the soak passed
+    """
+    interval = max(1, actions // samples)
+
+    # Ignore the allocations made by tracemalloc itself
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+    tracemalloc.start(frames)
+    try:
+        application = _Application()
+        application.mount()
+        sampled = _Samples(application)
+
+        # Run the warm up, and the actions after it, sampling after every interval
+        baseline = None
+        start = time.perf_counter()
+        for i in range(interval + actions):
+            # Unmount and mount the application again every so often
+            if i and not i % remount_every:
+                application.unmount()
+                application.mount()
+
+            # Alternate between decreasing and increasing the counter
+            application.click(i % 2)
+
+            if not (i + 1) % interval:
+                # Snapshot the heap after the warm up, to diff against if the soak fails. The warm up isn't sampled,
+                # since it includes everything that is allocated once (including by taking the snapshot).
+                if baseline is None:
+                    baseline = tracemalloc.take_snapshot().filter_traces(filters)
+                else:
+                    sampled.take(i + 1 - interval)
+
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+    finally:
+        tracemalloc.stop()
+
+    print('\n{} actions and {} mounts in {:.1f}s'.format(interval + actions, application.mounts, elapsed))
+
+    failures = []
+
+    # Check the heap growth over the samples
+    growth = sampled.heap.slope * 1000000
+    print('Heap growth: {:.0f} bytes per million actions (limit {})'.format(growth, max_growth))
+    if growth > max_growth:
+        failures.append('the heap grew by {:.0f} bytes per million actions'.format(growth))
+
+    # Check the growth of each type of object
+    for cls, trend in sampled.objects.items():
+        type_growth = trend.slope * 1000000
+        if type_growth > max_objects:
+            failures.append('{}.{} objects grew by {:.0f} per million actions'.format(
+                cls.__module__, cls.__qualname__, type_growth
+            ))
+
+    # Check the subscriptions
+    for i, name in enumerate(('receivers', 'dispatchers')):
+        if sampled.last[i] > sampled.first[i]:
+            failures.append('{} grew from {} to {}'.format(name, sampled.first[i], sampled.last[i]))
+
+    if not failures:
+        print('Passed')
+        return True
+
+    for failure in failures:
+        print('Failed: ' + failure)
+
+    _write_diff(diff_file, baseline, snapshot)
+    print('The allocations that grew the most since the warm up were written to ' + diff_file)
+
+    return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Soak tests the framework for memory growth')
+    parser.add_argument('--actions', type=int, default=_default_actions, help='the number of actions to dispatch')
+    parser.add_argument(
+        '--remount-every', type=int, default=_default_remount_every,
+        help='the number of actions between unmounting and mounting the application again'
+    )
+    parser.add_argument('--samples', type=int, default=_default_samples, help='the number of samples to take')
+    parser.add_argument(
+        '--max-growth', type=int, default=_default_max_growth,
+        help='the limit on heap growth, in bytes per million actions'
+    )
+    parser.add_argument(
+        '--max-objects', type=int, default=_default_max_objects,
+        help='the limit on the growth of the number of objects of any one type, per million actions'
+    )
+    parser.add_argument(
+        '--frames', type=int, default=_default_frames,
+        help='the number of frames recorded for each allocation, for the tracebacks in the heap diff'
+    )
+    parser.add_argument(
+        '--diff-file', default='soak_heap_diff.txt', help='the file to write the heap diff to if the soak fails'
+    )
+    arguments = parser.parse_args()
+
+    sys.exit(0 if soak(
+        arguments.actions, arguments.remount_every, arguments.samples, arguments.max_growth, arguments.max_objects,
+        arguments.frames, arguments.diff_file
+    ) else 1)
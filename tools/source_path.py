@@ -0,0 +1,13 @@
+# Puts the application source on the import path, so that the tools in this directory can import the framework, stores
+# and components as the application does. The tools are run by CPython and are kept out of src, so that transcrypt
+# doesn't mirror or transpile them and editing them doesn't trigger a rebuild.
+#
+# Tools import this before anything from src.
+import os
+import sys
+
+# The directory containing the python source of the application
+source_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+if source_directory not in sys.path:
+    sys.path.insert(0, source_directory)
@@ -1,18 +1,63 @@
 const path = require('path');
 const execSync = require('child_process').execSync;
+const fs = require('fs');
 const WebpackWatchPlugin = require('webpack-watch-files-plugin')['default'];
 
-// The root python file that is the entry point for the application
-const index_file = __dirname + "/src/index.py";
+// The root python file that is the entry point for the application, transcrypt transpiles it from the optimised mirror
+// of the source (see build_constant_elements.py) in to __target__
+const index_file = __dirname + "/src/__optimised__/index.py";
+const target_directory = __dirname + "/src/__target__";
+
+// The production build names each chunk by a hash of its content, so that browsers can cache them indefinitely and
+// only fetch the chunks that changed after a deploy. The matching pattern is in build_service_worker.py
+const hashed_filename = "[name].[contenthash:8].js";
+
+// When set (see benchmark_build.py), the duration of each phase of the build and the module stats are written to this
+// file
+const timings_file = process.env.BUILD_TIMINGS;
+
+// When set, full builds are spread over several transcrypt processes (see build_parallel.py). This only pays off on
+// machines with many cores and trees with many modules, on small trees starting the processes costs more than it saves
+const build_parallel = process.env.BUILD_PARALLEL;
+
+// When set (see benchmark_hot_reload.py), the dev server reloads the whole page whenever anything in src changes, as it
+// did before python changes were delivered with hot module replacement
+const full_reload = process.env.FULL_RELOAD;
+
+// The duration of each phase of the build in milliseconds
+const timings = {};
+
+function timed(phase, fn) {
+    // Runs the function, adding its duration to the phase
+    const start = Date.now();
+    fn();
+    timings[phase] = (timings[phase] || 0) + Date.now() - start;
+}
 
 module.exports = (env, argv) => {
-    function build_index_python() {
-        // Execute transcrypt to transpile the index python file to javascript
-        execSync('.venv/bin/transcrypt -b -n -m -e 6 ' + index_file, {stdio: [0, 1, 2]});
+    function build_index_python(full) {
+        // Generate the react classes for the components ahead of time, rather than creating them when the application
+        // first renders each component. Transcrypt copies the generated module in to __target__
+        execSync('.venv/bin/python tools/build_react_classes.py', {stdio: [0, 1, 2]});
+
+        // Transpile the index python file to javascript. A full build (-b) retranspiles every module, otherwise
+        // transcrypt only retranspiles modules that changed, which keeps the other files in __target__ untouched so
+        // that hot module replacement only swaps what actually changed. Both first mirror the source in to
+        // __optimised__, hoisting constant dom elements, and the mirror only rewrites the files that changed. The
+        // transcrypt options must match those in build_parallel.py
+        if (full && build_parallel) {
+            execSync('.venv/bin/python tools/build_parallel.py', {stdio: [0, 1, 2]});
+        } else {
+            execSync('.venv/bin/python tools/build_constant_elements.py', {stdio: [0, 1, 2]});
+            execSync(
+                '.venv/bin/transcrypt ' + (full ? '-b ' : '') + '-n -m -e 6 -od ' + target_directory + ' ' + index_file,
+                {stdio: [0, 1, 2]}
+            );
+        }
     }
 
-    // Always execute the python build at startup to make sure the content in __target__ exists
-    build_index_python();
+    // Always execute a full python build at startup to make sure the content in __target__ exists
+    timed('transpile', () => build_index_python(true));
 
     // Our Plugin that watches for any file changes in /src that are not in the __target__ directory, and than runs
     // transcrypt to retranspile the changes
@@ -32,20 +77,20 @@ module.exports = (env, argv) => {
                 const changedFile = this.getChangedFiles(_compiler);
                 // Check that there were actually one or more changed files
                 if (changedFile.length) {
-                    // If no files that triggered the watch reside in the __target__ directory, then that means a python
-                    // file in our source tree must have changed and we should rebuild the javascript from the python
-                    // using transcrypt
+                    // If no files that triggered the watch reside in the __target__ or __optimised__ directories, then
+                    // that means a python file in our source tree must have changed and we should rebuild the
+                    // javascript from the python using transcrypt
                     let compile_python = true;
                     for (let file in changedFile) {
                         file = changedFile[file];
-                        if (file.includes('__target__')) {
+                        if (file.includes('__target__') || file.includes('__optimised__')) {
                             compile_python = false;
                         }
                     }
 
                     // Rebuild if no files that changed were in the __target__ directory
                     if (compile_python) {
-                        build_index_python();
+                        build_index_python(false);
                     }
                 }
                 return done();
@@ -53,13 +98,81 @@ module.exports = (env, argv) => {
         }
     }
 
+    // Our Plugin that prerenders the initial view of the application in to index.html once the production bundle has
+    // been emitted, so that the first paint doesn't have to wait for the bundle to load and render
+    class PrerenderPlugin {
+        apply(compiler) {
+            compiler.hooks.afterEmit.tap('PrerenderPlugin', (compilation) => {
+                // The hashed files of the entry's chunks, in the order they must be loaded in
+                const scripts = compilation.entrypoints.get('app').getFiles().filter((file) => file.endsWith('.js'));
+
+                // Run the application headlessly with python, writing the markup and initial state in to index.html,
+                // along with the scripts in place of app.js
+                timed('prerender', () => execSync(
+                    '.venv/bin/python tools/prerender.py build/index.html ' + compilation.outputOptions.path +
+                    '/index.html ' + scripts.join(' '),
+                    {stdio: [0, 1, 2]}
+                ));
+            });
+        }
+    }
+
+    // Our Plugin that generates a service worker once index.html has been prerendered, which precaches index.html and
+    // the chunks it loads so that repeat visits start without waiting for the network
+    class ServiceWorkerPlugin {
+        apply(compiler) {
+            compiler.hooks.afterEmit.tap('ServiceWorkerPlugin', (compilation) => {
+                timed('service worker', () => execSync(
+                    '.venv/bin/python tools/build_service_worker.py ' + compilation.outputOptions.path,
+                    {stdio: [0, 1, 2]}
+                ));
+            });
+        }
+    }
+
+    // Our Plugin that times the phases of the webpack build, and writes the timings and module stats to timings_file
+    class BuildTimingsPlugin {
+        apply(compiler) {
+            const started = {};
+            const begin = (phase) => () => {
+                started[phase] = Date.now();
+            };
+            const end = (phase) => () => {
+                timings[phase] = (timings[phase] || 0) + Date.now() - started[phase];
+            };
+
+            // Resolving and building the modules
+            compiler.hooks.compile.tap('BuildTimingsPlugin', begin('modules'));
+            compiler.hooks.compilation.tap('BuildTimingsPlugin', (compilation) => {
+                compilation.hooks.finishModules.tap('BuildTimingsPlugin', end('modules'));
+
+                // Minification runs in optimizeChunkAssets, so time from before the first tap until after the last
+                compilation.hooks.optimizeChunkAssets.tap({name: 'BuildTimingsPlugin', stage: -1000}, begin('minify'));
+                compilation.hooks.afterOptimizeChunkAssets.tap('BuildTimingsPlugin', end('minify'));
+            });
+
+            // Writing the bundle
+            compiler.hooks.emit.tap('BuildTimingsPlugin', begin('emit'));
+            compiler.hooks.afterEmit.tap({name: 'BuildTimingsPlugin', stage: -1000}, end('emit'));
+
+            // Write the timings and the size of every module once the build is done
+            compiler.hooks.done.tap('BuildTimingsPlugin', (stats) => {
+                fs.writeFileSync(timings_file, JSON.stringify({
+                    timings: timings,
+                    stats: stats.toJson({all: false, modules: true, nestedModules: true, assets: true}),
+                }));
+            });
+        }
+    }
+
     const debug = argv.mode !== 'production';
 
     return {
-        entry: ["__target__/index.js"],
+        entry: {app: ["__target__/index.js"]},
         output: {
             path: __dirname + "/dist",
-            filename: "app.js"
+            filename: debug ? "app.js" : hashed_filename,
+            chunkFilename: debug ? "[name].js" : hashed_filename,
         },
 
         optimization: debug ? {
@@ -68,6 +181,43 @@ module.exports = (env, argv) => {
         } : {
             minimize: true,
             noEmitOnErrors: true,
+
+            // Split the bundle in to chunks that change independently, so that a deploy which only changes the
+            // application leaves the cached runtime and framework chunks valid
+            splitChunks: {
+                chunks: 'all',
+                cacheGroups: {
+                    default: false,
+                    vendors: false,
+                    // The Transcrypt runtime, which only changes when Transcrypt is upgraded
+                    transcrypt: {
+                        test: /[\\/]__target__[\\/]org\.transcrypt\.__runtime__\.js$/,
+                        name: 'transcrypt',
+                        priority: 30,
+                        enforce: true,
+                    },
+                    // The framework layer, lib/react and lib/flux
+                    framework: {
+                        test: /[\\/]__target__[\\/]lib\.(react|flux)\./,
+                        name: 'framework',
+                        priority: 20,
+                        enforce: true,
+                    },
+                    // React and any other node packages
+                    vendor: {
+                        test: /[\\/]node_modules[\\/]/,
+                        name: 'vendor',
+                        priority: 10,
+                        enforce: true,
+                    },
+                },
+            },
+
+            // Keep webpack's own runtime out of the chunks, and give modules and chunks ids that don't change when
+            // other modules are added or removed, so that a chunk's hash only changes when its own code does
+            runtimeChunk: 'single',
+            moduleIds: 'hashed',
+            chunkIds: 'named',
         },
 
         resolve: {
@@ -85,22 +235,27 @@ module.exports = (env, argv) => {
                 path.resolve(__dirname, 'src'),
             ],
             publicPath: '/',
-            watchContentBase: true,
+            // Python changes are delivered with hot module replacement (see index.py), watching the content base would
+            // reload the whole page whenever a python file in src changes and lose the application state
+            watchContentBase: !!full_reload,
+            hot: !full_reload,
             watchOptions: {
                 poll: true,
-                hot: true,
-                watch: true,
             },
         },
 
-        plugins: debug ? [
+        plugins: (timings_file ? [new BuildTimingsPlugin()] : []).concat(debug ? [
             new WebpackWatchPlugin({
                 files: [
                     './src/**/*.py',
-                    '!./src/__target__/**/*'
+                    '!./src/__target__/**/*',
+                    '!./src/__optimised__/**/*'
                 ],
             }),
             new BuildIndexPythonPlugin(),
-        ] : [],
+        ] : [
+            new PrerenderPlugin(),
+            new ServiceWorkerPlugin(),
+        ]),
     }
 }